@@ -0,0 +1,61 @@
+"""Thread pool that keeps blocking storage I/O off the event loop.
+
+The **I/O pool** (``STORAGE_IO_THREADS``, default 8 threads) is created lazily
+and runs the synchronous storage calls behind the ``a*`` helpers in
+:mod:`backend.storage`. It is a plain ``concurrent.futures`` executor awaited
+through ``loop.run_in_executor``, so it is not tied to any one event loop.
+Document builds have their own pool, see :mod:`backend.export_engine`.
+
+Calls made while serving a profiled request run under the profiler (see
+:mod:`backend.profiling`).
+"""
+
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from . import profiling
+
+R = TypeVar("R")
+
+_lock = threading.Lock()
+_io_pool: ThreadPoolExecutor | None = None
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def io_pool() -> ThreadPoolExecutor:
+    """Return the bounded thread pool used for blocking storage I/O."""
+    global _io_pool
+    with _lock:
+        if _io_pool is None:
+            _io_pool = ThreadPoolExecutor(
+                max_workers=_env_int("STORAGE_IO_THREADS", 8),
+                thread_name_prefix="storage-io",
+            )
+        return _io_pool
+
+
+async def run_io(fn: Callable[..., R], *args: Any, **kwargs: Any) -> R:
+    """Run a blocking storage call on the I/O pool and await its result."""
+    loop = asyncio.get_running_loop()
+    call = functools.partial(fn, *args, **kwargs)
+    recording = profiling.active()
+    if recording is not None:
+        call = functools.partial(recording.call, call)
+    return await loop.run_in_executor(io_pool(), call)
+
+
+def shutdown() -> None:
+    """Stop the I/O pool, waiting for in-flight work (called on app shutdown)."""
+    global _io_pool
+    with _lock:
+        if _io_pool is not None:
+            _io_pool.shutdown(wait=True)
+        _io_pool = None
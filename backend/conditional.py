@@ -0,0 +1,25 @@
+"""Helpers for HTTP conditional requests (ETag / If-None-Match / If-Match)."""
+
+
+def make_etag(digest: str) -> str:
+    """Return a strong ETag header value for a content digest."""
+    return f'"{digest}"'
+
+
+def etag_matches(header: str | None, etag: str, weak: bool = True) -> bool:
+    """Return True if an ``If-None-Match``/``If-Match`` header lists *etag*.
+
+    Handles comma-separated lists and ``*``. With *weak* (for
+    ``If-None-Match``) a ``W/`` validator compares equal to its strong form;
+    ``If-Match`` needs the strong comparison RFC 9110 prescribes, where a
+    weak validator never matches.
+    """
+    if not header:
+        return False
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if weak:
+            candidate = candidate.removeprefix("W/")
+        if candidate == "*" or candidate == etag:
+            return True
+    return False
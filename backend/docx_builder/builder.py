@@ -5,17 +5,23 @@ python-docx. TipTap JSON content is traversed recursively and mapped to
 the appropriate python-docx primitives.
 """
 
+import hashlib
 import os
+import time
 from io import BytesIO
 from pathlib import Path
-from typing import Sequence
+from typing import Iterator, Sequence
 
 from docx import Document
 from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.image.image import Image
 from docx.oxml import OxmlElement
 from docx.oxml.ns import qn
 from docx.shared import Inches, Pt
 
+from ..hashing import canonical_json
+from ..images import RENDITION_WIDTHS
+from ..metrics import BUILD_STAGE_SECONDS
 from ..models import (
     ImageQuestion,
     MCQQuestion,
@@ -26,6 +32,15 @@ from ..models import (
     TableQuestion,
     TextQuestion,
 )
+from .. import tiptap
+from .fragments import body_length, capture, get_fragment_cache, renumber_drawings, splice
+from .pictures import add_picture, load_image
+from .tables import add_table
+
+
+# Bump whenever a change to this module alters the generated documents, so
+# cached exports built by an older version are no longer served.
+BUILDER_VERSION = "4"
 
 
 # ── Data-dir helper (read at call-time so tests can monkeypatch) ──────────────
@@ -47,14 +62,20 @@ def build_docx(paper: Paper) -> bytes:
     Returns:
         Raw bytes of a valid ``.docx`` file.
     """
-    doc = Document()
-    _apply_margins(doc, paper.style)
-    _apply_default_font(doc, paper.style)
-    _add_header_footer(doc, paper.style)
-    _add_paper_header(doc, paper.header, paper.style)
-    _add_questions(doc, paper.questions, paper.style)
-    buf = BytesIO()
-    doc.save(buf)
+    stage = BUILD_STAGE_SECONDS.time
+    with stage("paper", "setup"):
+        doc = Document()
+        _apply_margins(doc, paper.style)
+        _apply_default_font(doc, paper.style)
+        _add_header_footer(doc, paper.style)
+    with stage("paper", "header"):
+        _add_paper_header(doc, paper.header, paper.style)
+    _add_questions(doc, paper.questions, paper.style)  # times each question type itself
+    with stage("paper", "finalise"):
+        renumber_drawings(doc)
+    with stage("paper", "save"):
+        buf = BytesIO()
+        doc.save(buf)
     return buf.getvalue()
 
 
@@ -67,24 +88,50 @@ def build_answer_key(paper: Paper) -> bytes:
     Returns:
         Raw bytes of a valid ``.docx`` file.
     """
-    doc = Document()
-    _apply_margins(doc, paper.style)
-    _apply_default_font(doc, paper.style)
+    stage = BUILD_STAGE_SECONDS.time
+    with stage("answer_key", "setup"):
+        doc = Document()
+        _apply_margins(doc, paper.style)
+        _apply_default_font(doc, paper.style)
+
+    with stage("answer_key", "body"):
+        title = paper.header.title or "Exam"
+        doc.add_heading(f"Answer Key: {title}", 0)
+
+        mcq_num = 1
+        for q in paper.questions:
+            if q.type == "mcq":
+                assert isinstance(q, MCQQuestion)
+                correct = next((opt.label for opt in q.options if opt.is_correct), "N/A")
+                doc.add_paragraph(f"Q{mcq_num}: {correct}")
+                mcq_num += 1
+
+    with stage("answer_key", "save"):
+        buf = BytesIO()
+        doc.save(buf)
+    return buf.getvalue()
+
 
-    title = paper.header.title or "Exam"
-    doc.add_heading(f"Answer Key: {title}", 0)
+def referenced_uploads(paper: Paper) -> list[str]:
+    """Return the upload filenames a paper's document embeds, in first-use order.
 
-    mcq_num = 1
+    Covers the logo, image questions and inline images inside TipTap content.
+    """
+    names: dict[str, None] = {}
+    if paper.style.logo_filename:
+        names[paper.style.logo_filename] = None
     for q in paper.questions:
-        if q.type == "mcq":
-            assert isinstance(q, MCQQuestion)
-            correct = next((opt.label for opt in q.options if opt.is_correct), "N/A")
-            doc.add_paragraph(f"Q{mcq_num}: {correct}")
-            mcq_num += 1
-
-    buf = BytesIO()
-    doc.save(buf)
-    return buf.getvalue()
+        names.update(dict.fromkeys(_question_uploads(q)))
+    return list(names)
+
+
+def upload_fingerprint(filename: str) -> str:
+    """Return an ``mtime:size`` fingerprint of an upload, or ``"missing"``."""
+    try:
+        stat = (_data_dir() / "uploads" / filename).stat()
+    except (OSError, ValueError):
+        return "missing"
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
 
 
 # ── Document-level helpers ────────────────────────────────────────────────────
@@ -123,11 +170,11 @@ def _add_paper_header(doc: Document, header: PaperHeader, style: PaperStyle) ->
     """Render the institutional header block (logo, title, details row, rule)."""
     # Logo
     if style.logo_filename:
-        logo_path = _data_dir() / "uploads" / style.logo_filename
-        if logo_path.exists():
+        logo = load_image(style.logo_filename, "logo")
+        if logo is not None:
             para = doc.add_paragraph()
             para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-            para.add_run().add_picture(str(logo_path), width=Inches(1.5))
+            _add_picture(para.add_run(), logo, "logo")
 
     # Institution name
     if header.institution:
@@ -183,44 +230,94 @@ def _add_horizontal_rule(doc: Document) -> None:
 
 
 def _add_questions(doc: Document, questions: Sequence[Question], style: PaperStyle) -> None:
-    """Render all questions, inserting section headings when the section changes."""
+    """Render all questions, inserting section headings when the section changes.
+
+    Each question's body elements are cached as an OOXML fragment keyed by
+    its content, number, heading and the paper style; unchanged questions are
+    spliced in from the cache and only edited ones are rendered again.
+
+    Each question's time, cache hit or not, is recorded as the build stage
+    ``question_<type>``.
+    """
+    cache = get_fragment_cache()
+    style_json = canonical_json(style, exclude=frozenset())
     current_section: str = ""
     for num, q in enumerate(questions, start=1):
+        started = time.perf_counter()
         # Section heading when section label changes
-        if q.section and q.section != current_section:
+        with_heading = bool(q.section and q.section != current_section)
+        if with_heading:
             current_section = q.section
-            doc.add_heading(current_section, level=2)
-
-        marks_str = _marks_label(q.marks)
-
-        if isinstance(q, TextQuestion):
-            _write_question_prefix(doc, num, marks_str)
-            _tiptap_to_doc(doc, q.content, style)
-
-        elif isinstance(q, MCQQuestion):
-            _write_question_prefix(doc, num, marks_str)
-            _tiptap_to_doc(doc, q.stem, style)
-            for opt in q.options:
-                doc.add_paragraph(f"    ({opt.label}) {opt.text}")
-
-        elif isinstance(q, TableQuestion):
-            _write_question_prefix(doc, num, marks_str)
-            _tiptap_to_doc(doc, q.content, style)
 
-        elif isinstance(q, ImageQuestion):
-            _write_question_prefix(doc, num, marks_str)
-            img_path = _data_dir() / "uploads" / q.filename
-            if img_path.exists():
-                para = doc.add_paragraph()
-                para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                para.add_run().add_picture(str(img_path), width=Inches(4))
-            if q.caption:
-                cap = doc.add_paragraph(q.caption)
-                cap.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                if cap.runs:
-                    cap.runs[0].italic = True
+        if not cache.max_bytes:
+            _add_question(doc, q, num, with_heading)
+        else:
+            key = _fragment_key(q, num, with_heading, style_json)
+            fragment = cache.get(key)
+            if fragment is not None:
+                splice(doc, fragment)
+            else:
+                start = body_length(doc)
+                _add_question(doc, q, num, with_heading)
+                cache.put(key, capture(doc, start))
+        BUILD_STAGE_SECONDS.observe(time.perf_counter() - started, "paper", f"question_{q.type}")
+
+
+def _fragment_key(q: Question, num: int, with_heading: bool, style_json: bytes) -> str:
+    """Return the fragment-cache key for one rendered question."""
+    digest = hashlib.sha256(f"{BUILDER_VERSION}\0{num}\0{with_heading}\0".encode())
+    digest.update(style_json)
+    digest.update(canonical_json(q, exclude=frozenset({"id"})))
+    for name in _question_uploads(q):
+        digest.update(f"\0{name}\0{upload_fingerprint(name)}".encode())
+    return digest.hexdigest()
+
+
+def _question_uploads(q: Question) -> Iterator[str]:
+    """Yield the upload filenames a single question embeds."""
+    if isinstance(q, ImageQuestion):
+        yield q.filename
+    elif isinstance(q, MCQQuestion):
+        yield from tiptap.compile_doc(q.stem).uploads
+    else:
+        yield from tiptap.compile_doc(q.content).uploads
+
+
+def _add_question(doc: Document, q: Question, num: int, with_heading: bool) -> None:
+    """Render one question (and its section heading, if it opens a section)."""
+    if with_heading:
+        doc.add_heading(q.section, level=2)
+
+    marks_str = _marks_label(q.marks)
+
+    if isinstance(q, TextQuestion):
+        _write_question_prefix(doc, num, marks_str)
+        _tiptap_to_doc(doc, q.content)
+
+    elif isinstance(q, MCQQuestion):
+        _write_question_prefix(doc, num, marks_str)
+        _tiptap_to_doc(doc, q.stem)
+        for opt in q.options:
+            doc.add_paragraph(f"    ({opt.label}) {opt.text}")
+
+    elif isinstance(q, TableQuestion):
+        _write_question_prefix(doc, num, marks_str)
+        _tiptap_to_doc(doc, q.content)
+
+    elif isinstance(q, ImageQuestion):
+        _write_question_prefix(doc, num, marks_str)
+        image = load_image(q.filename, "question")
+        if image is not None:
+            para = doc.add_paragraph()
+            para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+            _add_picture(para.add_run(), image, "question")
+        if q.caption:
+            cap = doc.add_paragraph(q.caption)
+            cap.alignment = WD_ALIGN_PARAGRAPH.CENTER
+            if cap.runs:
+                cap.runs[0].italic = True
 
-        doc.add_paragraph()  # spacer between questions
+    doc.add_paragraph()  # spacer between questions
 
 
 def _marks_label(marks: float) -> str:
@@ -244,69 +341,66 @@ def _write_question_prefix(doc: Document, num: int, marks_str: str) -> None:
 # ── TipTap JSON → python-docx ─────────────────────────────────────────────────
 
 
-def _tiptap_text(node: dict) -> str:
-    """Recursively extract plain text from a TipTap JSON node."""
-    if node.get("type") == "text":
-        return node.get("text", "")
-    return "".join(_tiptap_text(child) for child in node.get("content", []))
+def _add_picture(run, image: Image, kind: str) -> None:
+    """Embed *image* in *run* at the printed width of *kind*."""
+    add_picture(run, image, Inches(RENDITION_WIDTHS[kind]))
 
 
-def _tiptap_to_doc(doc: Document, node: dict, style: PaperStyle) -> None:
-    """Recursively map TipTap JSON nodes to python-docx document elements.
+def _tiptap_to_doc(parent, node: dict) -> None:
+    """Map TipTap JSON to python-docx document elements.
 
-    Handles: doc, paragraph (with text marks), heading, bulletList,
-    orderedList, table/tableRow/tableCell, and inline images.
+    The JSON is compiled once (see :func:`backend.tiptap.compile_doc`) and its
+    blocks rendered by :func:`_render_block`. *parent* is the document or, for
+    content inside a table, the table cell being filled.
     """
-    node_type = node.get("type", "")
-
-    if node_type == "doc":
-        for child in node.get("content", []):
-            _tiptap_to_doc(doc, child, style)
-
-    elif node_type == "paragraph":
-        para = doc.add_paragraph()
-        for child in node.get("content", []):
-            child_type = child.get("type", "")
-            if child_type == "text":
-                run = para.add_run(child.get("text", ""))
-                for mark in child.get("marks", []):
-                    mark_type = mark.get("type", "")
-                    if mark_type == "bold":
-                        run.bold = True
-                    elif mark_type == "italic":
-                        run.italic = True
-                    elif mark_type == "underline":
-                        run.underline = True
-            elif child_type == "image":
-                src: str = child.get("attrs", {}).get("src", "")
-                if "/api/uploads/" in src:
-                    fname = src.rsplit("/", 1)[-1]
-                    img_path = _data_dir() / "uploads" / fname
-                    if img_path.exists():
-                        para.add_run().add_picture(str(img_path), width=Inches(3))
-
-    elif node_type == "heading":
-        level: int = node.get("attrs", {}).get("level", 1)
-        doc.add_heading(_tiptap_text(node), level=level)
-
-    elif node_type == "bulletList":
-        for item in node.get("content", []):
-            doc.add_paragraph(_tiptap_text(item), style="List Bullet")
-
-    elif node_type == "orderedList":
-        for item in node.get("content", []):
-            doc.add_paragraph(_tiptap_text(item), style="List Number")
-
-    elif node_type == "table":
-        rows = node.get("content", [])  # tableRow nodes
-        if not rows:
-            return
-        n_rows = len(rows)
-        n_cols = max(len(row.get("content", [])) for row in rows)
-        if n_cols == 0:
-            return
-        table = doc.add_table(rows=n_rows, cols=n_cols)
-        table.style = "Table Grid"
-        for i, row in enumerate(rows):
-            for j, cell_node in enumerate(row.get("content", [])):
-                table.cell(i, j).text = _tiptap_text(cell_node)
+    for block in tiptap.compile_doc(node).blocks:
+        _render_block(parent, block)
+
+
+def _render_paragraph(parent, block: tiptap.Paragraph) -> None:
+    para = parent.add_paragraph()
+    for inline in block.inlines:
+        if isinstance(inline, tiptap.Text):
+            run = para.add_run(inline.value)
+            if inline.bold:
+                run.bold = True
+            if inline.italic:
+                run.italic = True
+            if inline.underline:
+                run.underline = True
+        elif isinstance(inline, tiptap.Image) and inline.upload:
+            image = load_image(inline.upload, "inline")
+            if image is not None:
+                _add_picture(para.add_run(), image, "inline")
+
+
+def _render_heading(parent, block: tiptap.Heading) -> None:
+    # As Document.add_heading: level 0 is the title; clamp to the built-in styles
+    level = block.level if isinstance(block.level, int) else 1
+    style = "Title" if level == 0 else f"Heading {min(max(level, 1), 9)}"
+    parent.add_paragraph(block.text(), style=style)
+
+
+def _render_list(parent, block: tiptap.List) -> None:
+    style = "List Number" if block.ordered else "List Bullet"
+    for item in block.items:
+        parent.add_paragraph(item.text(), style=style)
+
+
+def _render_table(parent, block: tiptap.Table) -> None:
+    add_table(parent, block, _render_block)
+
+
+_BLOCK_RENDERERS = {
+    tiptap.Paragraph: _render_paragraph,
+    tiptap.Heading: _render_heading,
+    tiptap.List: _render_list,
+    tiptap.Table: _render_table,
+}
+
+
+def _render_block(parent, block: tiptap.Node) -> None:
+    """Render one compiled block into *parent*; unsupported blocks are skipped."""
+    renderer = _BLOCK_RENDERERS.get(type(block))
+    if renderer is not None:
+        renderer(parent, block)
@@ -0,0 +1,150 @@
+"""Process-wide cache of rendered per-question OOXML fragments.
+
+A fragment is the run of ``w:body`` children one question produces (optional
+section heading, prefix, content, spacer) serialised to XML, together with
+the parsed image of every picture it embeds. Splicing a cached fragment into
+a new document relates those images to it and rewrites each ``r:embed`` to
+the relationship id of the new document, so fragments are portable between
+documents.
+
+The cache is an LRU bounded by ``DOCX_FRAGMENT_CACHE_MB`` (default 32; 0
+disables it), read when the cache is first used.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from docx.document import Document
+from docx.image.image import Image
+from docx.oxml import parse_xml
+from docx.oxml.ns import qn
+from lxml import etree
+
+from .pictures import relate_image
+
+_MB = 1024 * 1024
+_EMBED = qn("r:embed")
+
+
+@dataclass(frozen=True, slots=True)
+class Fragment:
+    """Serialised body elements of one rendered question."""
+
+    elements: tuple[bytes, ...]
+    images: dict[str, Image]  # relationship id at capture time → image
+
+    @property
+    def size(self) -> int:
+        return sum(map(len, self.elements)) + sum(len(image.blob) for image in self.images.values())
+
+
+class FragmentCache:
+    """Byte-bounded LRU of :class:`Fragment` objects keyed by content hash."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, Fragment] = OrderedDict()
+        self._used = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Fragment | None:
+        with self._lock:
+            fragment = self._entries.get(key)
+            if fragment is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return fragment
+
+    def put(self, key: str, fragment: Fragment) -> None:
+        size = fragment.size
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._used -= previous.size
+            self._entries[key] = fragment
+            self._used += size
+            while self._used > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._used -= evicted.size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._used = 0
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._used,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+_cache: FragmentCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_fragment_cache() -> FragmentCache:
+    """Return the process-wide fragment cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = FragmentCache(int(float(os.getenv("DOCX_FRAGMENT_CACHE_MB", "32")) * _MB))
+        return _cache
+
+
+# ── Capture and splice ────────────────────────────────────────────────────────
+
+
+def body_length(doc: Document) -> int:
+    """Return the number of content children in the body (``w:sectPr`` excluded)."""
+    body = doc.element.body
+    return len(body) - (1 if body.sectPr is not None else 0)
+
+
+def capture(doc: Document, start: int) -> Fragment:
+    """Serialise the body children added since the body had *start* children."""
+    body = doc.element.body
+    new_elements = body[start : body_length(doc)]
+    images: dict[str, Image] = {}
+    for element in new_elements:
+        for r_id in element.xpath(".//a:blip/@r:embed"):
+            images[r_id] = doc.part.related_parts[r_id].image
+    return Fragment(tuple(etree.tostring(el) for el in new_elements), images)
+
+
+def splice(doc: Document, fragment: Fragment) -> None:
+    """Append a cached fragment to the body, remapping its image relationships."""
+    r_ids = {old: relate_image(doc.part, image) for old, image in fragment.images.items()}
+    body = doc.element.body
+    sect_pr = body.sectPr
+    for xml in fragment.elements:
+        element = parse_xml(xml)
+        if r_ids:
+            for blip in element.xpath(".//a:blip"):
+                blip.set(_EMBED, r_ids[blip.get(_EMBED)])
+        if sect_pr is not None:
+            sect_pr.addprevious(element)
+        else:
+            body.append(element)
+
+
+def renumber_drawings(doc: Document, first_id: int = 1) -> None:
+    """Give every drawing in the body a unique ``wp:docPr`` id, in document order.
+
+    Spliced fragments carry the ids they had in the document they were
+    captured from, which may clash with the ids of neighbouring drawings.
+    """
+    for shape_id, doc_pr in enumerate(doc.element.body.xpath(".//wp:docPr"), start=first_id):
+        doc_pr.set("id", str(shape_id))
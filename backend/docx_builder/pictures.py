@@ -0,0 +1,150 @@
+"""Process-wide cache of parsed images for embedding with python-docx.
+
+``run.add_picture(path)`` re-reads the file, re-hashes it and re-parses its
+header for every call, and then scans the whole document for the next shape
+id. The builder instead embeds :class:`docx.image.image.Image` objects kept
+in an LRU keyed on the upload filename, rendition kind and upload mtime, so
+a hot logo is read and parsed once per process, not once per export.
+
+Shape ids are left at 0 here; :func:`.fragments.renumber_drawings` assigns
+the final ids once the body is complete.
+
+The cache is bounded by ``DOCX_IMAGE_CACHE_MB`` (default 64; 0 disables
+it), read when the cache is first used.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from docx.image.image import Image
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.oxml.shape import CT_Inline
+from docx.parts.story import StoryPart
+from docx.shared import Length
+from docx.text.run import Run
+
+from ..images import rendition_for
+
+_MB = 1024 * 1024
+
+ImageKey = tuple[str, str, int]  # (upload filename, rendition kind, upload mtime_ns)
+
+
+def _data_dir() -> Path:
+    return Path(os.getenv("DATA_DIR", "/data"))
+
+
+class ImageCache:
+    """Byte-bounded LRU of parsed :class:`Image` objects."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[ImageKey, Image] = OrderedDict()
+        self._used = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: ImageKey) -> Image | None:
+        with self._lock:
+            image = self._entries.get(key)
+            if image is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return image
+
+    def put(self, key: ImageKey, image: Image) -> None:
+        size = len(image.blob)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._used -= len(previous.blob)
+            self._entries[key] = image
+            self._used += size
+            while self._used > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._used -= len(evicted.blob)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._used = 0
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._used,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+_cache: ImageCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_image_cache() -> ImageCache:
+    """Return the process-wide image cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ImageCache(int(float(os.getenv("DOCX_IMAGE_CACHE_MB", "64")) * _MB))
+        return _cache
+
+
+# ── Loading and embedding ─────────────────────────────────────────────────────
+
+
+def load_image(filename: str, kind: str) -> Image | None:
+    """Return the parsed rendition of an upload, or ``None`` if it does not exist.
+
+    Args:
+        filename: Upload filename (under ``<DATA_DIR>/uploads``).
+        kind: Rendition kind (see :data:`backend.images.RENDITION_WIDTHS`).
+    """
+    try:
+        mtime_ns = (_data_dir() / "uploads" / filename).stat().st_mtime_ns
+    except (OSError, ValueError):
+        return None
+    key = (filename, kind, mtime_ns)
+    cache = get_image_cache()
+    image = cache.get(key)
+    if image is None:
+        path = rendition_for(filename, kind)
+        if path is None:
+            return None
+        image = Image.from_file(str(path))
+        cache.put(key, image)
+    return image
+
+
+def relate_image(part: StoryPart, image: Image) -> str:
+    """Return the relationship id of *image* from *part*, adding the image part if new.
+
+    The public ``part.get_or_add_image()`` only takes a path or stream, which
+    it reads and parses again, so this calls the ``ImageParts`` helpers behind
+    it directly. They are private; pyproject.toml caps python-docx and
+    ``test_python_docx_image_part_internals`` fails if an upgrade drops them.
+    """
+    image_parts = part.package.image_parts
+    image_part = image_parts._get_by_sha1(image.sha1) or image_parts._add_image_part(image)
+    return part.relate_to(image_part, RT.IMAGE)
+
+
+def add_picture(run: Run, image: Image, width: Length) -> None:
+    """Append *image* to *run* as an inline picture *width* wide.
+
+    Equivalent to ``run.add_picture`` but reuses an already parsed image and
+    an existing image part with the same SHA-1, and skips the shape-id scan.
+    """
+    r_id = relate_image(run.part, image)
+    cx, cy = image.scaled_dimensions(width, None)
+    run._r.add_drawing(CT_Inline.new_pic_inline(0, r_id, image.filename, cx, cy))
@@ -0,0 +1,163 @@
+"""Linear-time rendering of TipTap tables.
+
+``Table.cell(row, col)`` in python-docx rebuilds the table's whole cell grid
+on every call, so filling a table cell by cell is quadratic in its size.
+:func:`add_table` instead places every cell on the grid once, from the
+compiled cells' ``colspan``/``rowspan`` (see :mod:`backend.tiptap`), and appends the ``w:tr``/``w:tc``
+elements directly:
+
+- a ``colspan`` cell gets ``w:gridSpan``;
+- a ``rowspan`` cell starts a vertical merge (``w:vMerge="restart"``), and
+  each row it covers gets a continuation cell at the same grid column;
+- leading rows made only of ``tableHeader`` cells become header rows
+  (``w:tblHeader``, repeated on every page) with bold text;
+- rows shorter than the widest row are padded with empty cells.
+
+Cell content is rendered by the caller, block by block, so cells keep their
+marks, lists and images, and tables nest.
+"""
+
+import copy
+from typing import Any, Callable, NamedTuple, Sequence
+
+from docx.oxml import OxmlElement
+from docx.oxml.table import CT_Tc
+from docx.shared import Emu
+from docx.table import Table, _Cell
+
+from ..tiptap import Cell, Node, Row
+from ..tiptap import Table as TableNode
+
+
+class Slot(NamedTuple):
+    """One ``w:tc`` of a laid-out row."""
+
+    node: Cell | None  # the TipTap cell; None for a merge continuation or padding
+    colspan: int
+    merge: str | None  # "restart", "continue" or None
+
+
+def layout(rows: Sequence[Row]) -> tuple[list[list[Slot]], int]:
+    """Place the cells of compiled table rows on a grid.
+
+    Args:
+        rows: The rows of a compiled TipTap table.
+
+    Returns:
+        The slots of every row, left to right, and the number of grid columns.
+        Each row's slots span the full width.
+    """
+    below: dict[int, list[int]] = {}  # start column → [rows still covered, colspan]
+    grid: list[list[Slot]] = []
+    ends: list[int] = []
+    for row in rows:
+        slots: list[Slot] = []
+        touched: set[int] = set()
+        col = 0
+        for cell in row.cells:
+            col = _continue_merges(slots, below, touched, col)
+            colspan, rowspan = cell.colspan, cell.rowspan
+            slots.append(Slot(cell, colspan, "restart" if rowspan > 1 else None))
+            if rowspan > 1:
+                below[col] = [rowspan - 1, colspan]
+                touched.add(col)
+            col += colspan
+        # Merges still running to the right of the row's last cell
+        for start in sorted(c for c in below if c >= col and c not in touched):
+            if start >= col:
+                slots.extend(Slot(None, 1, None) for _ in range(start - col))
+                col = _continue_merges(slots, below, touched, start)
+        # A merge overlapped by a wider cell in this row loses the row
+        for start in [c for c in below if c not in touched]:
+            _shorten(below, start)
+        grid.append(slots)
+        ends.append(col)
+
+    width = max(ends, default=0)
+    for slots, end in zip(grid, ends):
+        slots.extend(Slot(None, 1, None) for _ in range(width - end))
+    return grid, width
+
+
+def _continue_merges(slots: list[Slot], below: dict[int, list[int]], touched: set[int], col: int) -> int:
+    """Append continuation slots for the merges covering *col* onwards; return the next free column."""
+    while col in below and col not in touched:
+        colspan = below[col][1]
+        slots.append(Slot(None, colspan, "continue"))
+        touched.add(col)
+        _shorten(below, col)
+        col += colspan
+    return col
+
+
+def _shorten(below: dict[int, list[int]], col: int) -> None:
+    below[col][0] -= 1
+    if below[col][0] <= 0:
+        del below[col]
+
+
+def add_table(parent: Any, node: TableNode, render: Callable[[_Cell, Node], None]) -> Table | None:
+    """Append a compiled TipTap table to *parent* as a ``Table Grid`` table.
+
+    Args:
+        parent: The document or table cell to add the table to.
+        node: The compiled ``table`` node.
+        render: Renders one compiled block into a cell.
+
+    Returns:
+        The new table, or ``None`` if *node* has no cells.
+    """
+    grid, width = layout(node.rows)
+    if not width:
+        return None
+    table = parent.add_table(0, width)
+    table.style = "Table Grid"
+    tbl = table._tbl
+    col_widths = [col.w for col in tbl.tblGrid.gridCol_lst]
+
+    # Empty cells, one per (column, colspan, merge), copied for every cell
+    templates: dict[tuple[int, int, str | None], CT_Tc] = {}
+    header = True
+    for slots in grid:
+        cells = [slot.node for slot in slots if slot.node is not None]
+        header = header and bool(cells) and all(cell.header for cell in cells)
+        tr = tbl.add_tr()
+        if header:
+            tr.get_or_add_trPr().append(OxmlElement("w:tblHeader"))
+        col = 0
+        for slot in slots:
+            key = (col, slot.colspan, slot.merge)
+            template = templates.get(key)
+            if template is None:
+                template = templates[key] = _empty_cell(col_widths[col : col + slot.colspan], slot)
+            tc = copy.deepcopy(template)
+            tr.append(tc)
+            if slot.node is not None:
+                _fill(_Cell(tc, table), tc, slot.node, render, bold=header)
+            col += slot.colspan
+    return table
+
+
+def _empty_cell(widths: list[Any], slot: Slot) -> CT_Tc:
+    """Return a ``w:tc`` with the properties of *slot* and one empty paragraph."""
+    tc = CT_Tc.new()
+    if None not in widths:
+        tc.width = Emu(sum(widths))
+    if slot.colspan > 1:
+        tc.grid_span = slot.colspan
+    if slot.merge:
+        tc.vMerge = slot.merge
+    return tc
+
+
+def _fill(cell: _Cell, tc: CT_Tc, node: Cell, render: Callable[[_Cell, Node], None], bold: bool) -> None:
+    """Render a TipTap cell's blocks into *cell*, replacing its placeholder paragraph."""
+    placeholder = tc.p_lst[0]
+    for child in node.blocks:
+        render(cell, child)
+    if len(tc.p_lst) + len(tc.tbl_lst) > 1:
+        tc.remove(placeholder)
+    if bold:
+        for para in cell.paragraphs:
+            for run in para.runs:
+                run.bold = True
@@ -0,0 +1,239 @@
+"""Content-addressed cache of generated ``.docx`` documents.
+
+A document is identified by :func:`export_key`: a hash over the canonical
+paper JSON (without id/timestamps), the mtime and size of every upload the
+document embeds, the builder version and the kind of document. Identical
+exports therefore map to the same key, which doubles as the response ETag.
+
+Documents are kept in a two-level LRU: a bounded in-memory tier in front of a
+bounded directory of ``<key>.docx`` files under ``<DATA_DIR>/cache/exports``.
+
+:func:`cached_build` is the read-through entry point used by the export
+endpoints: it serves from the cache and builds on the export engine on a miss.
+Concurrent misses for the same key share one build (see
+:mod:`backend.singleflight`), so a double-click or a room of proctors
+downloading the same paper costs one build, not one each. A profiled request
+(see :mod:`backend.profiling`) bypasses both, so its profile covers a build.
+:func:`build_with_retry` wraps it for callers that would rather wait for room
+in a full export queue than fail fast (batch exports and export jobs).
+
+Configuration (env vars, read when the cache is first used):
+
+- ``EXPORT_CACHE_MEMORY_MB`` — in-memory budget (default 64; 0 disables)
+- ``EXPORT_CACHE_DISK_MB`` — on-disk budget (default 512; 0 disables)
+"""
+
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable
+
+from . import profiling
+from .concurrency import run_io
+from .docx_builder.builder import (
+    BUILDER_VERSION,
+    build_answer_key,
+    build_docx,
+    referenced_uploads,
+    upload_fingerprint,
+)
+from .export_engine import EngineBusy, get_engine
+from .hashing import canonical_json
+from .metrics import EXPORT_OUTPUT_BYTES
+from .models import Paper
+from .singleflight import SingleFlight
+
+_MB = 1024 * 1024
+
+# Document kind → builder
+BUILDERS: dict[str, Callable[[Paper], bytes]] = {
+    "paper": build_docx,
+    "answer_key": build_answer_key,
+}
+
+
+def _data_dir() -> Path:
+    return Path(os.getenv("DATA_DIR", "/data"))
+
+
+def export_key(paper: Paper, kind: str) -> str:
+    """Return the cache key (hex SHA-256) of one export of *paper*.
+
+    Args:
+        paper: Paper being exported.
+        kind: Document kind, e.g. ``"paper"`` or ``"answer_key"``.
+    """
+    digest = hashlib.sha256(f"{kind}\0{BUILDER_VERSION}\0".encode())
+    digest.update(canonical_json(paper))
+    for name in referenced_uploads(paper):
+        digest.update(f"\0{name}\0{upload_fingerprint(name)}".encode())
+    return digest.hexdigest()
+
+
+class ExportCache:
+    """Two-level (memory, disk) LRU of document bytes keyed by :func:`export_key`."""
+
+    def __init__(self, directory: Path, memory_bytes: int, disk_bytes: int) -> None:
+        self.directory = directory
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self._lock = threading.Lock()
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._memory_used = 0
+        self._disk_used: int | None = None  # sized lazily from the directory
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> bytes | None:
+        """Return cached document bytes, promoting disk hits into memory."""
+        with self._lock:
+            content = self._memory.get(key)
+            if content is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return content
+        path = self._path(key)
+        try:
+            content = path.read_bytes()
+            os.utime(path)  # mtime doubles as the disk tier's recency
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+            self._remember(key, content)
+        return content
+
+    def put(self, key: str, content: bytes) -> None:
+        """Store document bytes in both tiers, evicting least-recently-used entries."""
+        with self._lock:
+            self._remember(key, content)
+        if not self.disk_bytes or len(content) > self.disk_bytes:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(content)
+        with self._lock:
+            try:
+                replaced = path.stat().st_size  # rewriting a key frees the old file
+            except OSError:
+                replaced = 0
+            tmp.replace(path)
+            if self._disk_used is None:
+                self._disk_used = sum(f.stat().st_size for f in self.directory.glob("*.docx"))
+            else:
+                self._disk_used += len(content) - replaced
+            if self._disk_used > self.disk_bytes:
+                self._evict_disk()
+
+    def _remember(self, key: str, content: bytes) -> None:
+        """Insert into the memory tier (lock held)."""
+        if len(content) > self.memory_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_used -= len(previous)
+        self._memory[key] = content
+        self._memory_used += len(content)
+        while self._memory_used > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_used -= len(evicted)
+
+    def _evict_disk(self) -> None:
+        """Delete the least recently used files until the disk tier fits (lock held)."""
+        files = []
+        for file in self.directory.glob("*.docx"):
+            try:
+                stat = file.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime_ns, stat.st_size, file))
+        files.sort()
+        used = sum(size for _, size, _ in files)
+        target = self.disk_bytes * 9 // 10  # leave headroom so eviction is not per-put
+        for _, size, file in files:
+            if used <= target:
+                break
+            file.unlink(missing_ok=True)
+            used -= size
+        self._disk_used = used
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.docx"
+
+
+_caches: dict[Path, ExportCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache() -> ExportCache:
+    """Return the export cache for the current ``DATA_DIR``."""
+    directory = _data_dir() / "cache" / "exports"
+    with _caches_lock:
+        cache = _caches.get(directory)
+        if cache is None:
+            cache = ExportCache(
+                directory,
+                memory_bytes=int(float(os.getenv("EXPORT_CACHE_MEMORY_MB", "64")) * _MB),
+                disk_bytes=int(float(os.getenv("EXPORT_CACHE_DISK_MB", "512")) * _MB),
+            )
+            _caches[directory] = cache
+        return cache
+
+
+async def cached_build(paper: Paper, kind: str, key: str | None = None) -> bytes:
+    """Return one export of *paper*, building it on the export engine on a cache miss.
+
+    Args:
+        paper: Paper being exported.
+        kind: Document kind, a key of :data:`BUILDERS`.
+        key: Precomputed :func:`export_key`, if the caller already has it.
+
+    Raises:
+        EngineBusy: The export queue is full.
+        ExportTimeout: The build exceeded the engine timeout.
+        Exception: Whatever the builder raised.
+    """
+    if key is None:
+        key = await run_io(export_key, paper, kind)
+    cache = get_cache()
+    profiled = profiling.active() is not None
+    content = None if profiled else await run_io(cache.get, key)
+    if content is None:
+
+        async def build() -> bytes:
+            built = await get_engine().run(BUILDERS[kind], paper)
+            await run_io(cache.put, key, built)
+            return built
+
+        content = await (build() if profiled else flights.run(key, build))
+    EXPORT_OUTPUT_BYTES.observe(len(content), kind)
+    return content
+
+
+async def build_with_retry(paper: Paper, kind: str, key: str | None = None) -> bytes:
+    """Return :func:`cached_build`, waiting for room while the export queue is full.
+
+    Raises:
+        EngineBusy: The queue stayed full for the engine timeout.
+        ExportTimeout: The build exceeded the engine timeout.
+        Exception: Whatever the builder raised.
+    """
+    deadline = time.monotonic() + get_engine().timeout
+    while True:
+        try:
+            return await cached_build(paper, kind, key)
+        except EngineBusy as exc:
+            if time.monotonic() >= deadline:
+                raise
+            await asyncio.sleep(min(exc.retry_after, 1))
+
+
+# Process-wide: identical builds coalesce whichever request or loop asks for them
+flights = SingleFlight()
@@ -0,0 +1,291 @@
+"""Export engine: runs document builds on a worker pool with a bounded queue.
+
+``build_docx`` and ``build_answer_key`` are pure-CPU python-docx/lxml work
+that holds the GIL, so by default they run in a pool of worker *processes*
+sized to the machine. At most ``workers + queue_size`` builds are accepted at
+once; further submissions fail fast with :class:`EngineBusy` (surfaced as
+``503`` + ``Retry-After``) instead of queueing without limit. Every job has a
+timeout, and the engine keeps counters for queue depth and build time.
+
+Builds started while serving a profiled request run under ``cProfile``; all
+others are sampled so the slowest can be kept (see :mod:`backend.profiling`).
+
+Configuration (env vars, read when the engine is first used):
+
+- ``EXPORT_EXECUTOR`` — ``process`` (default) or ``thread``
+- ``EXPORT_WORKERS`` — pool size (default: CPU count)
+- ``EXPORT_QUEUE_SIZE`` — builds allowed to wait for a worker (default: 2 × workers)
+- ``EXPORT_TIMEOUT`` — seconds a caller waits for one build (default: 60)
+"""
+
+import asyncio
+import importlib
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import (
+    Executor,
+    Future,
+    InvalidStateError,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from typing import Any, Callable, TypeVar
+
+from . import metrics, profiling
+
+R = TypeVar("R")
+
+EXPORT_EXECUTORS = ("thread", "process")
+
+
+class EngineBusy(Exception):
+    """Raised when the export queue is full; ``retry_after`` is a hint in seconds."""
+
+    def __init__(self, retry_after: int) -> None:
+        super().__init__("Export queue is full.")
+        self.retry_after = retry_after
+
+
+class ExportTimeout(Exception):
+    """Raised when a build does not finish within the engine's timeout."""
+
+
+def _target_name(fn: Callable[..., Any]) -> str:
+    """Return the ``module:qualname`` reference a worker process resolves *fn* from."""
+    return f"{fn.__module__}:{fn.__qualname__}"
+
+
+def _resolve(target: str) -> Callable[..., Any]:
+    module, _, qualname = target.partition(":")
+    obj: Any = importlib.import_module(module)
+    for attr in qualname.split("."):
+        obj = getattr(obj, attr)
+    return obj
+
+
+def _run_job(
+    data_dir: str | None, fn: Callable[..., R] | str, *args: Any, profile: bool = False
+) -> tuple[R, float, metrics.Snapshot | None, Any]:
+    """Worker entry point: run *fn* and report how long the build itself took.
+
+    Process workers receive *fn* as a ``module:qualname`` string so the job
+    never depends on pickling a particular function object. ``DATA_DIR`` is
+    passed explicitly because worker processes only inherit the environment
+    from the moment they were started. They also return the metrics the build
+    recorded (see :func:`backend.metrics.drain`), for the engine to merge
+    into the web worker's own.
+
+    The last element is the build's profile: pstats data when *profile* is
+    set (``None`` if another profile was running), otherwise its
+    :class:`~backend.profiling.Samples` (``None`` when sampling is off).
+    """
+    if data_dir is not None and os.environ.get("DATA_DIR") != data_dir:
+        os.environ["DATA_DIR"] = data_dir
+    in_pool_process = isinstance(fn, str)
+    if in_pool_process:
+        fn = _resolve(fn)
+    start = time.perf_counter()
+    if profile:
+        result, report = profiling.profile_call(fn, *args)
+    else:
+        with profiling.sampled() as report:
+            result = fn(*args)
+    elapsed = time.perf_counter() - start
+    return result, elapsed, metrics.drain() if in_pool_process else None, report
+
+
+class ExportEngine:
+    """A worker pool that accepts a bounded number of build jobs at a time."""
+
+    def __init__(
+        self,
+        *,
+        kind: str = "process",
+        workers: int | None = None,
+        queue_size: int | None = None,
+        timeout: float = 60.0,
+    ) -> None:
+        if kind not in EXPORT_EXECUTORS:
+            raise ValueError(f"Unknown EXPORT_EXECUTOR {kind!r}; expected one of {EXPORT_EXECUTORS}.")
+        self.kind = kind
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = 2 * self.workers if queue_size is None else queue_size
+        self.capacity = self.workers + self.queue_size
+        self.timeout = timeout
+        self._pool: Executor = (
+            ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            if kind == "process"
+            else ThreadPoolExecutor(self.workers, thread_name_prefix="export")
+        )
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._counters = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0, "timed_out": 0}
+        self._build_seconds_total = 0.0
+        self._build_seconds_max = 0.0
+        self._wait_seconds_total = 0.0
+
+    # ── Submission ────────────────────────────────────────────────────────────
+
+    def submit(self, fn: Callable[..., R], *args: Any) -> "Future[R]":
+        """Queue a build and return a future for its result.
+
+        Args:
+            fn: Build function, e.g. ``build_docx``. For the process pool it
+                must be a module-level function.
+            *args: Arguments for *fn* (must be picklable for the process pool).
+
+        Raises:
+            EngineBusy: ``workers + queue_size`` builds are already in flight.
+        """
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                self._counters["rejected"] += 1
+                raise EngineBusy(self._retry_after())
+            self._in_flight += 1
+            self._counters["submitted"] += 1
+
+        result: Future[R] = Future()
+        submitted = time.perf_counter()
+        recording = profiling.active()
+        try:
+            target = _target_name(fn) if self.kind == "process" else fn
+            job = self._pool.submit(_run_job, os.getenv("DATA_DIR"), target, *args, profile=recording is not None)
+        except BaseException:
+            with self._lock:
+                self._in_flight -= 1
+            raise
+        # Cancelling the caller's future withdraws the job if it has not started yet.
+        result.add_done_callback(lambda f: f.cancelled() and job.cancel())
+        if recording is not None:
+            # Before _finish wakes the caller, so the profile is complete when the response starts
+            job.add_done_callback(lambda j: self._record_profile(j, recording))
+        job.add_done_callback(lambda j: self._finish(j, result, submitted))
+        if recording is None:
+            job.add_done_callback(lambda j: self._keep_if_slow(j, _target_name(fn), args))
+        return result
+
+    async def run(self, fn: Callable[..., R], *args: Any) -> R:
+        """Submit a build and await its result, honouring the engine timeout.
+
+        Raises:
+            EngineBusy: The queue is full.
+            ExportTimeout: The build took longer than ``timeout`` seconds. A
+                queued job is withdrawn; one already running finishes in the
+                background and its result is discarded.
+        """
+        future = self.submit(fn, *args)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            with self._lock:
+                self._counters["timed_out"] += 1
+            raise ExportTimeout(f"Export did not finish within {self.timeout:g} s.") from None
+
+    def _finish(self, job: Future, result: Future, submitted: float) -> None:
+        """Record the outcome of a pool job and hand it to the caller's future."""
+        elapsed = time.perf_counter() - submitted
+        error = None if job.cancelled() else job.exception()
+        with self._lock:
+            self._in_flight -= 1
+            if error is not None:
+                self._counters["failed"] += 1
+            elif not job.cancelled():
+                _, build_seconds, recorded, _ = job.result()
+                if recorded is not None:
+                    metrics.merge(recorded)
+                self._counters["completed"] += 1
+                self._build_seconds_total += build_seconds
+                self._build_seconds_max = max(self._build_seconds_max, build_seconds)
+                self._wait_seconds_total += max(elapsed - build_seconds, 0.0)
+        try:
+            if job.cancelled():
+                result.cancel()
+            elif error is not None:
+                result.set_exception(error)
+            else:
+                result.set_result(job.result()[0])
+        except InvalidStateError:  # the caller already gave up on this job
+            pass
+
+    @staticmethod
+    def _record_profile(job: Future, recording: profiling.Recording) -> None:
+        """Merge a profiled build's pstats data into the request's recording."""
+        if not job.cancelled() and job.exception() is None:
+            recording.add(job.result()[3])
+
+    @staticmethod
+    def _keep_if_slow(job: Future, target: str, args: tuple[Any, ...]) -> None:
+        """Offer a finished build's sampled profile to the slowest-exports store."""
+        if job.cancelled() or job.exception() is not None:
+            return
+        _, build_seconds, _, samples = job.result()
+        if samples is not None:
+            profiling.get_store().offer_export(target, build_seconds, samples, args[0] if args else None)
+
+    # ── Introspection ─────────────────────────────────────────────────────────
+
+    def _retry_after(self) -> int:
+        """Estimate seconds until a slot frees up (called with the lock held)."""
+        completed = self._counters["completed"]
+        average = self._build_seconds_total / completed if completed else 1.0
+        return max(1, math.ceil(average * self._in_flight / self.workers))
+
+    def stats(self) -> dict[str, Any]:
+        """Return a snapshot of queue depth, throughput and build-time counters."""
+        with self._lock:
+            completed = self._counters["completed"]
+            return {
+                "executor": self.kind,
+                "workers": self.workers,
+                "capacity": self.capacity,
+                "in_flight": self._in_flight,
+                "running": min(self._in_flight, self.workers),
+                "queue_depth": max(self._in_flight - self.workers, 0),
+                **self._counters,
+                "build_seconds_total": round(self._build_seconds_total, 6),
+                "build_seconds_max": round(self._build_seconds_max, 6),
+                "build_seconds_avg": round(self._build_seconds_total / completed, 6) if completed else 0.0,
+                "queue_wait_seconds_avg": round(self._wait_seconds_total / completed, 6) if completed else 0.0,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the worker pool, cancelling builds that have not started."""
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+# ── Process-wide engine ───────────────────────────────────────────────────────
+
+_engine: ExportEngine | None = None
+_engine_lock = threading.Lock()
+
+
+def _env_number(name: str, cast: Callable[[str], R]) -> R | None:
+    value = os.getenv(name)
+    return cast(value) if value else None
+
+
+def get_engine() -> ExportEngine:
+    """Return the process-wide export engine, creating it from env vars on first use."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = ExportEngine(
+                kind=os.getenv("EXPORT_EXECUTOR", "process"),
+                workers=_env_number("EXPORT_WORKERS", int),
+                queue_size=_env_number("EXPORT_QUEUE_SIZE", int),
+                timeout=_env_number("EXPORT_TIMEOUT", float) or 60.0,
+            )
+        return _engine
+
+
+def shutdown_engine() -> None:
+    """Shut the process-wide engine down (called on app shutdown)."""
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.shutdown()
+            _engine = None
@@ -0,0 +1,248 @@
+"""Asynchronous export jobs: submit now, poll, download the finished document.
+
+A job builds one export (paper or answer key) of a saved paper in the
+background. The HTTP request that submits it returns immediately, so a slow
+build no longer holds a connection open long enough for proxies to time it
+out. Jobs run on a small pool of dispatcher threads, each driving
+:func:`backend.export_cache.build_with_retry` on its own event loop: a job
+reads through the export cache, shares a build with any request exporting the
+same content at the same time, and waits while the engine's queue is full, so
+the engine still bounds CPU use.
+
+Each job is recorded as ``<job id>.json`` and its document as
+``<job id>.docx`` under ``<DATA_DIR>/export-jobs``; both are deleted once the
+job has been finished for longer than the TTL. Submitting a paper whose
+export key (see :func:`backend.export_cache.export_key`) matches a queued,
+running or finished unexpired job returns that job instead of a new one.
+
+Configuration (env vars, read when first used):
+
+- ``EXPORT_JOB_THREADS`` — dispatcher threads (default 4)
+- ``EXPORT_JOB_TTL`` — seconds finished jobs and artifacts are kept (default 3600)
+- ``EXPORT_JOB_MAX_PENDING`` — queued + running jobs accepted (default 500)
+"""
+
+import asyncio
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Literal
+
+from pydantic import BaseModel
+
+from .export_cache import build_with_retry
+from .models import Paper
+
+JobState = Literal["queued", "running", "done", "failed"]
+
+_SWEEP_INTERVAL = 60.0  # seconds between expiry sweeps
+
+
+class JobsBusy(Exception):
+    """Raised when too many jobs are already queued or running."""
+
+
+class ExportJob(BaseModel):
+    """Status record of one export job."""
+
+    id: str
+    paper_id: str
+    kind: str
+    key: str
+    filename: str
+    state: JobState = "queued"
+    error: str | None = None
+    created_at: str
+    finished_at: str | None = None
+    expires_at: str | None = None
+
+    @property
+    def active(self) -> bool:
+        return self.state in ("queued", "running")
+
+
+def _data_dir() -> Path:
+    return Path(os.getenv("DATA_DIR", "/data"))
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _ttl() -> float:
+    return float(os.getenv("EXPORT_JOB_TTL", "3600"))
+
+
+# ── Store ─────────────────────────────────────────────────────────────────────
+
+
+class JobStore:
+    """Job records and artifacts of one data directory."""
+
+    def __init__(self, directory: Path, ttl: float, max_pending: int) -> None:
+        self.directory = directory
+        self.ttl = ttl
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._jobs: dict[str, ExportJob] = {}
+        self._by_key: dict[str, str] = {}
+        self._last_sweep = float("-inf")
+
+    def submit(self, paper: Paper, kind: str, key: str, filename: str) -> tuple[ExportJob, bool]:
+        """Return ``(job, created)``, reusing a live job with the same export key.
+
+        Raises:
+            JobsBusy: ``max_pending`` jobs are already queued or running.
+        """
+        self.sweep()
+        with self._lock:
+            existing = self._jobs.get(self._by_key.get(key, ""))
+            if existing is not None and (existing.active or self._artifact_exists(existing)):
+                return existing.model_copy(), False
+            if sum(job.active for job in self._jobs.values()) >= self.max_pending:
+                raise JobsBusy()
+            job = ExportJob(
+                id=str(uuid.uuid4()),
+                paper_id=paper.id,
+                kind=kind,
+                key=key,
+                filename=filename,
+                created_at=_now().isoformat(),
+            )
+            self._jobs[job.id] = job
+            self._by_key[key] = job.id
+            self._persist(job)
+        _pool().submit(self._run, job.id, paper)
+        return job.model_copy(), True
+
+    def get(self, job_id: str) -> ExportJob | None:
+        """Return a job's current record, or ``None`` if unknown or expired."""
+        self.sweep()
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return job.model_copy()
+        # Possibly submitted by another server process sharing the data dir
+        try:
+            return ExportJob.model_validate_json(self._record_path(job_id).read_bytes())
+        except (OSError, ValueError):
+            return None
+
+    def artifact_path(self, job: ExportJob) -> Path:
+        return self.directory / f"{job.id}.docx"
+
+    def sweep(self, force: bool = False) -> None:
+        """Delete jobs (records and artifacts) whose TTL has passed.
+
+        Runs at most once per ``_SWEEP_INTERVAL`` unless *force* is set.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_sweep < _SWEEP_INTERVAL:
+                return
+            self._last_sweep = now
+        cutoff = _now().isoformat()
+        # Unfinished jobs this process does not know (its owner exited) go stale
+        stale_before = datetime.fromtimestamp(time.time() - self.ttl, timezone.utc).isoformat()
+        for record in self.directory.glob("*.json"):
+            try:
+                job = ExportJob.model_validate_json(record.read_bytes())
+            except (OSError, ValueError):
+                continue
+            if job.expires_at is not None:
+                expired = job.expires_at <= cutoff
+            else:
+                with self._lock:
+                    orphaned = job.id not in self._jobs
+                expired = orphaned and job.created_at <= stale_before
+            if expired:
+                self._forget(job)
+
+    # ── Worker side ───────────────────────────────────────────────────────────
+
+    def _run(self, job_id: str, paper: Paper) -> None:
+        with self._lock:
+            job = self._jobs[job_id]
+            job.state = "running"
+            self._persist(job)
+        try:
+            content = asyncio.run(build_with_retry(paper, job.kind, job.key))
+            path = self.artifact_path(job)
+            tmp = path.with_name(f".{path.name}.tmp")
+            tmp.write_bytes(content)
+            tmp.replace(path)
+            state, error = "done", None
+        except Exception as exc:
+            state, error = "failed", str(exc) or type(exc).__name__
+        finished = _now()
+        with self._lock:
+            job.state = state
+            job.error = error
+            job.finished_at = finished.isoformat()
+            job.expires_at = datetime.fromtimestamp(finished.timestamp() + self.ttl, timezone.utc).isoformat()
+            self._persist(job)
+
+    # ── Helpers (lock held where it matters) ──────────────────────────────────
+
+    def _record_path(self, job_id: str) -> Path:
+        return self.directory / f"{job_id}.json"
+
+    def _persist(self, job: ExportJob) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._record_path(job.id)
+        tmp = path.with_name(f".{path.name}.tmp")
+        tmp.write_text(job.model_dump_json())
+        tmp.replace(path)
+
+    def _artifact_exists(self, job: ExportJob) -> bool:
+        return job.state == "done" and self.artifact_path(job).exists()
+
+    def _forget(self, job: ExportJob) -> None:
+        with self._lock:
+            self._jobs.pop(job.id, None)
+            if self._by_key.get(job.key) == job.id:
+                del self._by_key[job.key]
+        self.artifact_path(job).unlink(missing_ok=True)
+        self._record_path(job.id).unlink(missing_ok=True)
+
+
+# ── Module-level pool and stores ──────────────────────────────────────────────
+
+
+_executor: ThreadPoolExecutor | None = None
+_stores: dict[Path, JobStore] = {}
+_lock = threading.Lock()
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                int(os.getenv("EXPORT_JOB_THREADS", "4")), thread_name_prefix="export-job"
+            )
+        return _executor
+
+
+def get_store() -> JobStore:
+    """Return the job store of the current ``DATA_DIR``."""
+    directory = _data_dir() / "export-jobs"
+    with _lock:
+        store = _stores.get(directory)
+        if store is None:
+            store = JobStore(directory, _ttl(), int(os.getenv("EXPORT_JOB_MAX_PENDING", "500")))
+            _stores[directory] = store
+        return store
+
+
+def shutdown(wait: bool = False) -> None:
+    """Stop the dispatcher threads, dropping jobs that have not started."""
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,43 @@
+"""Canonical content hashes for domain models.
+
+Two models hash equal when they would render and behave identically, so
+bookkeeping fields (identity and timestamps) are left out of the hash.
+"""
+
+import hashlib
+import json
+from typing import Any
+
+from pydantic import BaseModel
+
+# Fields that never influence what a paper or template looks like.
+VOLATILE_FIELDS: frozenset[str] = frozenset({"id", "created_at", "updated_at"})
+
+
+def canonical_json(data: BaseModel, exclude: frozenset[str] = VOLATILE_FIELDS) -> bytes:
+    """Serialise *data* to JSON with sorted keys and no insignificant whitespace.
+
+    Args:
+        data: Model to serialise.
+        exclude: Top-level fields to leave out.
+    """
+    return canonical_dumps(data.model_dump(mode="json", exclude=set(exclude)))
+
+
+def canonical_dumps(value: Any) -> bytes:
+    """Serialise plain JSON data deterministically (sorted keys, compact)."""
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def content_hash(data: BaseModel, exclude: frozenset[str] = VOLATILE_FIELDS) -> str:
+    """Return the hex SHA-256 of :func:`canonical_json` for *data*."""
+    return hashlib.sha256(canonical_json(data, exclude)).hexdigest()
+
+
+def json_content_hash(data: dict[str, Any], exclude: frozenset[str] = VOLATILE_FIELDS) -> str:
+    """Return :func:`content_hash` of a model from its stored JSON, without validating it.
+
+    Equal to ``content_hash(model)`` when *data* is ``model.model_dump(mode="json")``.
+    """
+    kept = {key: value for key, value in data.items() if key not in exclude}
+    return hashlib.sha256(canonical_dumps(kept)).hexdigest()
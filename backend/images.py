@@ -0,0 +1,139 @@
+"""DOCX-ready renditions of uploaded images.
+
+Uploads are often multi-megabyte phone photos, while the builder prints them
+at most a few inches wide. For each place an image can appear the builder
+uses a rendition downscaled to ``width × RENDITION_DPI`` pixels, with EXIF
+orientation applied and re-encoded (JPEG for photos, PNG for anything with
+transparency or originally PNG/GIF).
+
+Renditions live in ``<DATA_DIR>/renditions`` as ``<upload stem>.<kind>.<ext>``.
+They are produced in the background right after an upload and on demand by
+the builder if missing or older than their source. An image that is already
+small enough is hard-linked rather than re-encoded.
+"""
+
+import logging
+import os
+import shutil
+import threading
+from pathlib import Path
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+# Printed width in inches of each place the builder embeds an image.
+RENDITION_WIDTHS: dict[str, float] = {"logo": 1.5, "question": 4.0, "inline": 3.0}
+# Pixel density renditions are sized for; comfortably above print quality.
+RENDITION_DPI = 200
+JPEG_QUALITY = 85
+
+# Formats python-docx can embed as-is when no resize is needed.
+_EMBEDDABLE = {"PNG", "JPEG", "GIF"}
+_ORIENTATION = 0x0112  # EXIF tag
+
+
+def _data_dir() -> Path:
+    return Path(os.getenv("DATA_DIR", "/data"))
+
+
+def _upload_path(filename: str) -> Path:
+    return _data_dir() / "uploads" / filename
+
+
+def target_pixels(kind: str) -> int:
+    """Return the pixel width of the rendition used for *kind*."""
+    return round(RENDITION_WIDTHS[kind] * RENDITION_DPI)
+
+
+def rendition_for(filename: str, kind: str) -> Path | None:
+    """Return the file the builder should embed for an upload shown as *kind*.
+
+    Creates the rendition if it is missing or stale. Falls back to the
+    original upload if it cannot be decoded by Pillow.
+
+    Args:
+        filename: Upload filename (under ``<DATA_DIR>/uploads``).
+        kind: One of ``RENDITION_WIDTHS`` (``"logo"``, ``"question"``, ``"inline"``).
+
+    Returns:
+        Path to embed, or ``None`` if the upload does not exist.
+    """
+    source = _upload_path(filename)
+    try:
+        source_mtime = source.stat().st_mtime_ns
+    except (OSError, ValueError):
+        return None
+    for existing in _candidates(filename, kind):
+        try:
+            if existing.stat().st_mtime_ns >= source_mtime:
+                return existing
+        except OSError:
+            continue
+    try:
+        return _render(source, filename, kind)
+    except (OSError, UnidentifiedImageError, Image.DecompressionBombError) as exc:
+        logger.warning("Using original %s; rendition failed: %s", filename, exc)
+        return source
+
+
+def prepare_renditions(filename: str) -> None:
+    """Create every rendition of an upload (run as a background task after upload)."""
+    for kind in RENDITION_WIDTHS:
+        rendition_for(filename, kind)
+
+
+def _candidates(filename: str, kind: str) -> list[Path]:
+    stem = Path(filename).stem
+    directory = _data_dir() / "renditions"
+    return [directory / f"{stem}.{kind}.{ext}" for ext in ("jpg", "png", "gif")]
+
+
+def _render(source: Path, filename: str, kind: str) -> Path:
+    """Write the rendition of *source* for *kind* and return its path."""
+    directory = _data_dir() / "renditions"
+    directory.mkdir(parents=True, exist_ok=True)
+    stem = Path(filename).stem
+    width = target_pixels(kind)
+
+    with Image.open(source) as img:
+        source_format = img.format or ""
+        rotated = img.getexif().get(_ORIENTATION, 1) != 1  # must be baked in
+        oriented = ImageOps.exif_transpose(img) if rotated else img
+        needs_work = oriented.width > width or source_format not in _EMBEDDABLE or rotated
+        if not needs_work:
+            ext = "jpg" if source_format == "JPEG" else source_format.lower()
+            dest = directory / f"{stem}.{kind}.{ext}"
+            _link_or_copy(source, dest)
+            return dest
+
+        if oriented.width > width:
+            height = max(1, round(oriented.height * width / oriented.width))
+            oriented = oriented.resize((width, height), Image.Resampling.LANCZOS)
+        has_alpha = oriented.mode in ("RGBA", "LA", "PA") or "transparency" in oriented.info
+        if source_format in ("PNG", "GIF") or has_alpha:
+            dest = directory / f"{stem}.{kind}.png"
+            save_kwargs: dict = {"format": "PNG", "optimize": True}
+            if oriented.mode not in ("RGB", "RGBA", "L", "LA", "P"):
+                oriented = oriented.convert("RGBA")
+        else:
+            dest = directory / f"{stem}.{kind}.jpg"
+            save_kwargs = {"format": "JPEG", "quality": JPEG_QUALITY, "optimize": True, "progressive": True}
+            if oriented.mode != "RGB":
+                oriented = oriented.convert("RGB")
+        save_kwargs["dpi"] = (RENDITION_DPI, RENDITION_DPI)
+
+        tmp = dest.with_name(f".{dest.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        oriented.save(tmp, **save_kwargs)
+        tmp.replace(dest)
+        return dest
+
+
+def _link_or_copy(source: Path, dest: Path) -> None:
+    """Publish *source* as *dest* without re-encoding (hard link, else copy)."""
+    tmp = dest.with_name(f".{dest.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        os.link(source, tmp)
+    except OSError:
+        shutil.copyfile(source, tmp)
+    tmp.replace(dest)
@@ -0,0 +1,136 @@
+"""Minimal RFC 6902 JSON Patch (with RFC 6901 JSON Pointer) for plain JSON values.
+
+Supports all six operations: ``add``, ``remove``, ``replace``, ``move``,
+``copy`` and ``test``. A patch is applied to a deep copy of the document;
+the original is never modified, and a failing operation leaves no partial
+result behind.
+"""
+
+import copy
+from typing import Any
+
+
+class JsonPatchError(ValueError):
+    """Raised for a malformed patch or an operation that cannot be applied."""
+
+
+class JsonPatchTestFailed(JsonPatchError):
+    """Raised when a ``test`` operation does not match the document."""
+
+
+def parse_pointer(pointer: str) -> list[str]:
+    """Split a JSON Pointer into unescaped reference tokens."""
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise JsonPatchError(f"Invalid JSON Pointer {pointer!r}.")
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+
+def apply_patch(document: Any, patch: list[dict[str, Any]]) -> Any:
+    """Return the result of applying *patch* to a copy of *document*.
+
+    Raises:
+        JsonPatchTestFailed: A ``test`` operation failed.
+        JsonPatchError: The patch is malformed or a path does not resolve.
+    """
+    result = copy.deepcopy(document)
+    for index, operation in enumerate(patch):
+        try:
+            result = _apply_one(result, operation)
+        except JsonPatchError as exc:
+            raise type(exc)(f"Operation {index}: {exc}") from None
+    return result
+
+
+def _apply_one(doc: Any, operation: dict[str, Any]) -> Any:
+    if not isinstance(operation, dict):
+        raise JsonPatchError("Each operation must be an object.")
+    op = operation.get("op")
+    path = _member(operation, "path")
+    tokens = parse_pointer(path)
+
+    if op == "add":
+        return _add(doc, tokens, copy.deepcopy(_member(operation, "value")))
+    if op == "remove":
+        return _remove(doc, tokens)[0]
+    if op == "replace":
+        value = copy.deepcopy(_member(operation, "value"))
+        doc, _ = _remove(doc, tokens)
+        return _add(doc, tokens, value)
+    if op == "move":
+        source = parse_pointer(_member(operation, "from"))
+        if tokens[: len(source)] == source and tokens != source:
+            raise JsonPatchError("Cannot move a value into one of its own children.")
+        doc, value = _remove(doc, source)
+        return _add(doc, tokens, value)
+    if op == "copy":
+        value = copy.deepcopy(_get(doc, parse_pointer(_member(operation, "from"))))
+        return _add(doc, tokens, value)
+    if op == "test":
+        if _get(doc, tokens) != _member(operation, "value"):
+            raise JsonPatchTestFailed(f"Test failed at {path!r}.")
+        return doc
+    raise JsonPatchError(f"Unknown operation {op!r}.")
+
+
+def _member(operation: dict[str, Any], name: str) -> Any:
+    if name not in operation:
+        raise JsonPatchError(f"Missing {name!r}.")
+    return operation[name]
+
+
+def _get(doc: Any, tokens: list[str]) -> Any:
+    for token in tokens:
+        doc = _child(doc, token)
+    return doc
+
+
+def _child(container: Any, token: str) -> Any:
+    if isinstance(container, dict):
+        if token not in container:
+            raise JsonPatchError(f"Path member {token!r} not found.")
+        return container[token]
+    if isinstance(container, list):
+        return container[_index(container, token)]
+    raise JsonPatchError(f"Cannot descend into a scalar at {token!r}.")
+
+
+def _index(array: list, token: str, *, allow_end: bool = False) -> int:
+    if allow_end and token == "-":
+        return len(array)
+    if not token.isdigit() or (token != "0" and token.startswith("0")):
+        raise JsonPatchError(f"Invalid array index {token!r}.")
+    index = int(token)
+    if index > len(array) or (index == len(array) and not allow_end):
+        raise JsonPatchError(f"Array index {index} out of range.")
+    return index
+
+
+def _add(doc: Any, tokens: list[str], value: Any) -> Any:
+    if not tokens:
+        return value
+    parent = _get(doc, tokens[:-1])
+    last = tokens[-1]
+    if isinstance(parent, dict):
+        parent[last] = value
+    elif isinstance(parent, list):
+        parent.insert(_index(parent, last, allow_end=True), value)
+    else:
+        raise JsonPatchError(f"Cannot add to a scalar at {last!r}.")
+    return doc
+
+
+def _remove(doc: Any, tokens: list[str]) -> tuple[Any, Any]:
+    """Remove the value at *tokens*; return ``(document, removed value)``."""
+    if not tokens:
+        return None, doc
+    parent = _get(doc, tokens[:-1])
+    last = tokens[-1]
+    if isinstance(parent, dict):
+        if last not in parent:
+            raise JsonPatchError(f"Path member {last!r} not found.")
+        return doc, parent.pop(last)
+    if isinstance(parent, list):
+        return doc, parent.pop(_index(parent, last))
+    raise JsonPatchError(f"Cannot remove from a scalar at {last!r}.")
@@ -1,9 +1,14 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse
 from pathlib import Path
 import os
+from typing import Any
+
+from . import concurrency, export_engine, export_jobs, metrics, profiling, search
+from .models import Paper, Template
+from .storage import bank_stats, cache_stats, flush, rebuild_index
 
 
 def get_data_dir() -> Path:
@@ -15,17 +20,36 @@ async def lifespan(app: FastAPI):
     data_dir = get_data_dir()
     for sub in ("papers", "templates", "uploads"):
         (data_dir / sub).mkdir(parents=True, exist_ok=True)
+    # Reconcile listing indexes with anything changed while the server was down
+    rebuild_index("papers", Paper)
+    rebuild_index("templates", Template)
+    export_jobs.get_store().sweep(force=True)
+    search.get_index().sync()
+    metrics.start()
     yield
+    export_jobs.shutdown()
+    export_engine.shutdown_engine()
+    concurrency.shutdown()
+    # After the I/O pool has drained, so no save can land in the buffer behind the flush
+    flush()
+    metrics.stop()
 
 
 app = FastAPI(title="Exam Builder", lifespan=lifespan)
+app.add_middleware(metrics.MetricsMiddleware)
+app.add_middleware(profiling.ProfilingMiddleware)
 
-from .routers import uploads, papers, templates, export  # noqa: E402
+from .routers import uploads, papers, questions, templates, export, export_batch, jobs, profiles, search as search_router  # noqa: E402
 app.include_router(uploads.router, prefix="/api/uploads", tags=["uploads"])
 # Export routes registered BEFORE papers CRUD so /export doesn't match /{paper_id}
 app.include_router(export.router, prefix="/api/papers", tags=["export"])
+app.include_router(export_batch.router, prefix="/api/papers", tags=["export"])
+app.include_router(jobs.router, prefix="/api/papers", tags=["export"])
 app.include_router(papers.router, prefix="/api/papers", tags=["papers"])
+app.include_router(questions.router, prefix="/api/papers", tags=["questions"])
 app.include_router(templates.router, prefix="/api/templates", tags=["templates"])
+app.include_router(search_router.router, prefix="/api/search", tags=["search"])
+app.include_router(profiles.router, prefix="/api/profiles", tags=["profiling"])
 
 
 @app.get("/api/health")
@@ -33,6 +57,19 @@ async def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/api/storage/stats")
+async def storage_stats() -> dict[str, Any]:
+    """Return the counters of the storage read cache and the question bank."""
+    return {"cache": cache_stats(), "bank": bank_stats()}
+
+
+@app.get("/api/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics() -> PlainTextResponse:
+    """Return every worker's metrics in the Prometheus text format (see :mod:`backend.metrics`)."""
+    counts = await concurrency.run_io(metrics.collect)
+    return PlainTextResponse(metrics.render(counts), media_type="text/plain; version=0.0.4")
+
+
 # Serve React SPA in production (after frontend build)
 STATIC_DIR = Path(__file__).parent.parent / "frontend" / "dist"
 if STATIC_DIR.exists():
@@ -0,0 +1,351 @@
+"""In-process metrics exposed at ``/api/metrics`` in the Prometheus text format.
+
+Instrumented code records into module-level :class:`Counter` and
+:class:`Histogram` objects. Recording takes one lock and a couple of
+additions. There is no client library, and nothing happens per request
+beyond that.
+
+Every uvicorn worker keeps its own counts. To answer for the whole server,
+each worker writes a snapshot of its counts to ``<METRICS_DIR>/<pid>.json``
+(default ``<DATA_DIR>/.metrics``): every ``METRICS_FLUSH_SECONDS`` (default 5)
+from a background thread, on shutdown, and whenever it serves a scrape. The
+scraped worker merges all snapshots. Other workers' numbers can therefore be
+up to one flush interval old. Snapshots of workers that are no longer
+running are removed when a worker starts. Prometheus treats the resulting
+drop as a counter reset.
+
+Export builds running in the process pool record their stage timings in the
+pool process. :func:`drain` hands those back to the engine with each result,
+which merges them into the worker's counts (see
+:mod:`backend.export_engine`).
+"""
+
+import bisect
+import json
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator
+
+logger = logging.getLogger(__name__)
+
+# Seconds; spans a cached storage read to a pathological export.
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Bytes; 1 KiB to 64 MiB in powers of four.
+SIZE_BUCKETS = tuple(float(1024 * 4**n) for n in range(9))
+
+Snapshot = dict[str, dict[str, Any]]
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._lock = threading.Lock()
+        self._series: dict[tuple[str, ...], Any] = {}
+        _REGISTRY[name] = self
+
+    def snapshot(self, reset: bool = False) -> dict[str, Any]:
+        with self._lock:
+            series = [[list(key), _copy(value)] for key, value in self._series.items()]
+            if reset:
+                self._series.clear()
+        return {"type": self.kind, "help": self.help, "labels": list(self.labels), "series": series}
+
+
+class Counter(_Metric):
+    """A monotonically increasing count per label combination."""
+
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._series[labels] = self._series.get(labels, 0) + amount
+
+
+class Histogram(_Metric):
+    """Observations counted into fixed buckets, with their sum, per label combination."""
+
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, help: str, labels: tuple[str, ...] = (), buckets: tuple[float, ...] = LATENCY_BUCKETS
+    ) -> None:
+        super().__init__(name, help, labels)
+        self.buckets = buckets
+
+    def observe(self, value: float, *labels: str) -> None:
+        # Per-bucket (not cumulative) counts, the last one for +Inf, then the sum
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        """Observe the wall-clock seconds the ``with`` block takes."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def snapshot(self, reset: bool = False) -> dict[str, Any]:
+        return {**super().snapshot(reset), "buckets": list(self.buckets)}
+
+
+def _copy(value: Any) -> Any:
+    return list(value) if isinstance(value, list) else value
+
+
+_REGISTRY: dict[str, _Metric] = {}
+
+
+# ── Metrics ───────────────────────────────────────────────────────────────────
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route", "status")
+)
+BUILD_STAGE_SECONDS = Histogram(
+    "docx_build_stage_seconds", "Time spent in each stage of a document build.", ("document", "stage")
+)
+EXPORT_OUTPUT_BYTES = Histogram(
+    "export_output_bytes", "Size of the documents served by the export endpoints.", ("kind",), SIZE_BUCKETS
+)
+UPLOAD_BYTES = Histogram("upload_size_bytes", "Size of accepted image uploads.", buckets=SIZE_BUCKETS)
+STORAGE_SECONDS = Histogram(
+    "storage_operation_seconds", "Latency of storage operations.", ("operation", "directory")
+)
+STORAGE_BYTES_WRITTEN = Counter(
+    "storage_bytes_written_total", "Payload bytes written to the storage engine.", ("directory",)
+)
+
+
+# ── Snapshots ─────────────────────────────────────────────────────────────────
+
+
+def snapshot() -> Snapshot:
+    """Return this process's counts, keyed by metric name."""
+    return {name: metric.snapshot() for name, metric in _REGISTRY.items()}
+
+
+def drain() -> Snapshot:
+    """Return this process's counts and reset them (used by export pool processes)."""
+    return {name: metric.snapshot(reset=True) for name, metric in _REGISTRY.items()}
+
+
+def merge(counts: Snapshot) -> None:
+    """Add counts from another process (see :func:`drain`) to this process's."""
+    for name, family in counts.items():
+        metric = _REGISTRY.get(name)
+        if metric is None:
+            continue
+        with metric._lock:
+            _add_series(metric._series, family["series"])
+
+
+def combine(snapshots: list[Snapshot]) -> Snapshot:
+    """Sum several processes' snapshots into one."""
+    families: Snapshot = {}
+    for snap in snapshots:
+        for name, family in snap.items():
+            target = families.setdefault(name, {**family, "series": {}})
+            _add_series(target["series"], family["series"])
+    for family in families.values():
+        family["series"] = [[list(key), value] for key, value in family["series"].items()]
+    return families
+
+
+def _add_series(series: dict[tuple[str, ...], Any], additions: list[list[Any]]) -> None:
+    """Add snapshot ``[labels, value]`` pairs to a series dict, value by value."""
+    for labels, value in additions:
+        key = tuple(labels)
+        current = series.get(key)
+        if current is None:
+            series[key] = _copy(value)
+        elif isinstance(current, list):
+            series[key] = [a + b for a, b in zip(current, value)]
+        else:
+            series[key] = current + value
+
+
+# ── Exposition ────────────────────────────────────────────────────────────────
+
+
+def render(counts: Snapshot) -> str:
+    """Render a snapshot in the Prometheus text exposition format (version 0.0.4)."""
+    lines: list[str] = []
+    for name in sorted(counts):
+        family = counts[name]
+        lines.append(f"# HELP {name} {family['help']}")
+        lines.append(f"# TYPE {name} {family['type']}")
+        labelnames = family["labels"]
+        for labels, value in sorted(family["series"], key=lambda item: item[0]):
+            pairs = list(zip(labelnames, labels))
+            if family["type"] == "counter":
+                lines.append(f"{name}{_labels(pairs)} {_number(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip([*family["buckets"], math.inf], value[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == math.inf else _number(bound)
+                lines.append(f"{name}_bucket{_labels([*pairs, ('le', le)])} {cumulative}")
+            lines.append(f"{name}_sum{_labels(pairs)} {_number(value[-1])}")
+            lines.append(f"{name}_count{_labels(pairs)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+def _labels(pairs: list[tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+# ── Sharing between workers ───────────────────────────────────────────────────
+
+
+def metrics_dir() -> Path:
+    data_dir = Path(os.getenv("DATA_DIR", "/data"))
+    return Path(os.getenv("METRICS_DIR", str(data_dir / ".metrics")))
+
+
+def write_snapshot() -> None:
+    """Publish this process's counts for the other workers' scrapes."""
+    directory = metrics_dir()
+    path = directory / f"{os.getpid()}.json"
+    tmp = directory / f".{os.getpid()}.tmp"
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        tmp.write_text(json.dumps(snapshot(), separators=(",", ":")))
+        os.replace(tmp, path)
+    except OSError:
+        logger.warning("Could not write metrics snapshot to %s", path, exc_info=True)
+
+
+def collect() -> Snapshot:
+    """Return the combined counts of every worker (this one's are current)."""
+    write_snapshot()
+    snapshots = []
+    for file in metrics_dir().glob("*.json"):
+        try:
+            snapshots.append(json.loads(file.read_text()))
+        except (OSError, ValueError):  # being replaced or removed right now
+            continue
+    return combine(snapshots)
+
+
+def _remove_stale_snapshots() -> None:
+    for file in metrics_dir().glob("*.json"):
+        try:
+            pid = int(file.stem)
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            file.unlink(missing_ok=True)
+        except (ValueError, PermissionError):  # not ours, or a live process of another user
+            continue
+
+
+class _Flusher:
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-flush", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            write_snapshot()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+_flusher: _Flusher | None = None
+
+
+def start() -> None:
+    """Start publishing this worker's snapshot periodically (called on app startup)."""
+    global _flusher
+    _remove_stale_snapshots()
+    if _flusher is None:
+        _flusher = _Flusher(float(os.getenv("METRICS_FLUSH_SECONDS", "5")))
+
+
+def stop() -> None:
+    """Stop the periodic flush and publish a final snapshot (called on app shutdown)."""
+    global _flusher
+    if _flusher is not None:
+        _flusher.stop()
+        _flusher = None
+    write_snapshot()
+
+
+# ── HTTP middleware ───────────────────────────────────────────────────────────
+
+
+class MetricsMiddleware:
+    """ASGI middleware observing each HTTP request's latency by route template.
+
+    Latency runs until the last body chunk is sent, so streamed responses
+    count in full. Requests that match no route share the ``unmatched``
+    label, so probing random URLs cannot create unbounded series.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - start, scope["method"], route_template(scope), str(status)
+            )
+
+
+def route_template(scope) -> str:
+    """Return the full path template of the route that served *scope*, or ``unmatched``.
+
+    Routes of an included router may carry only their own part of the
+    template (``/{paper_id}``); the router prefix is then taken from the
+    request path, which has one segment per template segment.
+    """
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if template is None:
+        return "unmatched"
+    if ":path}" in template:  # matches any number of segments
+        return template
+    segments = scope["path"].split("/")
+    return "/".join(segments[: len(segments) - template.count("/")]) + template
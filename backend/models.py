@@ -117,6 +117,24 @@ class Paper(BaseModel):
     questions: list[Question] = Field(default_factory=list)
     style: PaperStyle = Field(default_factory=PaperStyle)
 
+    def summary(self) -> "PaperSummary":
+        """Return the lightweight sidebar view of this paper."""
+        return PaperSummary(
+            id=self.id,
+            title=self.header.title or "Untitled",
+            subject=self.header.subject,
+            updated_at=self.updated_at,
+        )
+
+    def has_marked_answers(self) -> bool:
+        """Return True if any MCQ question has a correct option marked."""
+        return any(
+            opt.is_correct
+            for q in self.questions
+            if isinstance(q, MCQQuestion)
+            for opt in q.options
+        )
+
 
 class PaperSummary(BaseModel):
     """Lightweight view used in the sidebar paper list."""
@@ -126,6 +144,17 @@ class PaperSummary(BaseModel):
     subject: str
     updated_at: str
 
+    @classmethod
+    def from_json(cls, data: dict) -> "PaperSummary":
+        """Build the summary from a stored paper's JSON without validating the paper."""
+        header = data.get("header") or {}
+        return cls(
+            id=data["id"],
+            title=header.get("title") or "Untitled",
+            subject=header.get("subject", ""),
+            updated_at=data["updated_at"],
+        )
+
 
 class Template(BaseModel):
     """A reusable paper structure with saved styling."""
@@ -137,6 +166,10 @@ class Template(BaseModel):
     questions: list[Question] = Field(default_factory=list)
     style: PaperStyle = Field(default_factory=PaperStyle)
 
+    def summary(self) -> "TemplateSummary":
+        """Return the lightweight template-picker view of this template."""
+        return TemplateSummary(id=self.id, name=self.name, created_at=self.created_at)
+
 
 class TemplateSummary(BaseModel):
     """Lightweight view used in the template picker."""
@@ -144,3 +177,65 @@ class TemplateSummary(BaseModel):
     id: str
     name: str
     created_at: str
+
+
+class SearchHit(BaseModel):
+    """A question matching a search, with the paper it belongs to."""
+
+    paper_id: str
+    paper_title: str
+    question_id: str
+    question_type: str
+    position: int  # 0-based index of the question in the paper
+    snippet: str  # matching excerpt of the question's text
+    score: float  # relevance, higher is better
+
+
+# ── Request bodies ────────────────────────────────────────────────────────────
+
+
+class ExportBatchRequest(BaseModel):
+    """Papers to export together as one ZIP archive."""
+
+    paper_ids: list[str] = Field(min_length=1, max_length=1000)
+    answer_keys: bool = True  # also export an answer key for papers with marked answers
+
+
+class UpsertQuestion(BaseModel):
+    """Replace the question with the same id, or insert it (at ``index`` or the end)."""
+
+    op: Literal["upsert_question"]
+    question: Question
+    index: int | None = None
+
+
+class DeleteQuestion(BaseModel):
+    """Remove the question with ``id``."""
+
+    op: Literal["delete_question"]
+    id: str
+
+
+class ReorderQuestions(BaseModel):
+    """Put questions in ``order`` (a permutation of all question ids)."""
+
+    op: Literal["reorder_questions"]
+    order: list[str]
+
+
+QuestionOperation = Annotated[
+    Union[UpsertQuestion, DeleteQuestion, ReorderQuestions],
+    Field(discriminator="op"),
+]
+
+
+class QuestionOrder(BaseModel):
+    """New order of a paper's questions (a permutation of all question ids)."""
+
+    order: list[str]
+
+
+class PaperOperations(BaseModel):
+    """Question-level partial update of a paper (alternative to JSON Patch)."""
+
+    operations: list[QuestionOperation]
@@ -0,0 +1,125 @@
+"""Partial updates of a paper: JSON Patch and question-level operations.
+
+Both functions return ``(paper, changed)`` and never modify their input, so
+callers can skip the write entirely when nothing changed.
+"""
+
+from typing import Any, Sequence
+
+from .jsonpatch import apply_patch
+from .models import (
+    DeleteQuestion,
+    Paper,
+    Question,
+    QuestionOperation,
+    ReorderQuestions,
+    UpsertQuestion,
+)
+
+
+class PaperOpError(ValueError):
+    """Raised when an operation cannot be applied to the paper."""
+
+
+class QuestionNotFound(PaperOpError):
+    """Raised when an operation names a question the paper does not have."""
+
+
+def apply_json_patch(paper: Paper, patch: list[dict[str, Any]]) -> tuple[Paper, bool]:
+    """Apply an RFC 6902 patch to the JSON form of *paper*.
+
+    Raises:
+        JsonPatchError: The patch is malformed, or a ``test`` failed.
+        PaperOpError: The patch changes the paper's ``id``.
+        pydantic.ValidationError: The patched document is not a valid paper.
+    """
+    before = paper.model_dump(mode="json")
+    after = apply_patch(before, patch)
+    if after == before:
+        return paper, False
+    if not isinstance(after, dict) or after.get("id") != paper.id:
+        raise PaperOpError("A patch cannot change the paper id.")
+    return Paper.model_validate(after), True
+
+
+def apply_operations(paper: Paper, operations: Sequence[QuestionOperation]) -> tuple[Paper, bool]:
+    """Apply question upsert / delete / reorder operations in order.
+
+    Raises:
+        QuestionNotFound: A delete names an unknown question.
+        PaperOpError: An index is out of range, or a reorder is not a
+            permutation of the paper's question ids.
+    """
+    questions = list(paper.questions)
+    changed = False
+    for operation in operations:
+        if isinstance(operation, UpsertQuestion):
+            changed |= upsert_question(questions, operation.question, operation.index)
+        elif isinstance(operation, DeleteQuestion):
+            del questions[find_question(questions, operation.id)]
+            changed = True
+        elif isinstance(operation, ReorderQuestions):
+            changed |= reorder_questions(questions, operation.order)
+    if not changed:
+        return paper, False
+    return paper.model_copy(update={"questions": questions}), True
+
+
+# ── List helpers (mutate the list they are given) ─────────────────────────────
+#
+# They work on lists of Question models and on lists of stored question JSON
+# alike, so the per-question endpoints can edit a paper without validating it.
+
+
+def upsert_question(questions: list, question: Question | dict, index: int | None = None) -> bool:
+    """Replace the question with the same id (moving it to *index* if given) or insert it.
+
+    Returns:
+        Whether the list changed.
+    """
+    try:
+        current = find_question(questions, _qid(question))
+    except QuestionNotFound:
+        current = None
+    limit = len(questions) - (current is not None)
+    if index is not None and not 0 <= index <= limit:
+        raise PaperOpError(f"Question index {index} out of range 0..{limit}.")
+
+    if current is None:
+        questions.insert(limit if index is None else index, question)
+        return True
+    if questions[current] == question and index in (None, current):
+        return False
+    if index is None or index == current:
+        questions[current] = question
+    else:
+        del questions[current]
+        questions.insert(index, question)
+    return True
+
+
+def reorder_questions(questions: list, order: list[str]) -> bool:
+    """Reorder *questions* to follow *order*; return whether the order changed."""
+    by_id = {_qid(q): q for q in questions}
+    if len(order) != len(questions) or set(order) != by_id.keys():
+        raise PaperOpError("Reorder must list every question id exactly once.")
+    if [_qid(q) for q in questions] == order:
+        return False
+    questions[:] = [by_id[question_id] for question_id in order]
+    return True
+
+
+def find_question(questions: list, question_id: str) -> int:
+    """Return the position of the question with *question_id*.
+
+    Raises:
+        QuestionNotFound: No question has that id.
+    """
+    for position, question in enumerate(questions):
+        if _qid(question) == question_id:
+            return position
+    raise QuestionNotFound(f"Question {question_id!r} not found.")
+
+
+def _qid(question: Question | dict) -> str:
+    return question["id"] if isinstance(question, dict) else question.id
@@ -0,0 +1,481 @@
+"""Opt-in profiling of the storage and export work behind a request.
+
+Profiles are kept under ``<DATA_DIR>/profiles``. Each profile is a
+``<id>.json`` record plus the profile itself. They come from two sources:
+
+- **On demand.** When ``PROFILE_TOKEN`` is set, a request that carries the
+  token in an ``X-Profile-Token`` header or a ``profile`` query parameter is
+  profiled with ``cProfile``. This covers its storage calls (everything run
+  through :func:`backend.concurrency.run_io`) and its export build, including
+  builds in the process pool. The response names the profile in
+  ``X-Profile-Id``. ``/api/profiles/<id>`` serves it as a pstats file, which
+  can be read with ``python -m pstats`` or snakeviz. A profiled export skips
+  the export cache, so the profile always covers a build. Only one
+  deterministic profile runs per process at a time, and calls that overlap
+  another profile run unprofiled (counted as ``skipped``). The newest
+  ``PROFILE_KEEP`` of these profiles are kept (default 20).
+- **Slowest exports.** Every build is sampled: a background thread records
+  the build thread's call stack every ``PROFILE_SAMPLE_INTERVAL`` seconds
+  (default 0.01). Sampling is cheap enough to leave on. The ``PROFILE_SLOWEST``
+  slowest builds are kept as speedscope JSON (default 10; 0 turns sampling
+  off). Open them at https://www.speedscope.app.
+
+A token that is set but wrong is answered with ``403``. When no token is
+configured, the header and parameter are ignored.
+"""
+
+import asyncio
+import contextvars
+import cProfile
+import hmac
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Iterator, Literal, TypeVar
+from urllib.parse import parse_qs
+
+from pydantic import BaseModel
+
+R = TypeVar("R")
+
+TOKEN_HEADER = "x-profile-token"
+TOKEN_PARAM = "profile"
+ID_HEADER = "x-profile-id"
+
+# Function name, file, first line: one speedscope frame / pstats function
+Frame = tuple[str, str, int]
+
+
+def _data_dir() -> Path:
+    return Path(os.getenv("DATA_DIR", "/data"))
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+# ── Access ────────────────────────────────────────────────────────────────────
+
+
+def configured_token() -> str | None:
+    """Return ``PROFILE_TOKEN``, or ``None`` when on-demand profiling is disabled."""
+    return os.getenv("PROFILE_TOKEN") or None
+
+
+def supplied_token(headers: dict[str, str], query: dict[str, list[str]]) -> str | None:
+    """Return the token a request carries in its header or query string, if any."""
+    return headers.get(TOKEN_HEADER) or next(iter(query.get(TOKEN_PARAM, [])), None)
+
+
+def token_matches(supplied: str) -> bool:
+    """Return True if *supplied* is the configured token (compared in constant time)."""
+    token = configured_token()
+    return token is not None and hmac.compare_digest(supplied.encode(), token.encode())
+
+
+# ── Deterministic profiles (on demand) ────────────────────────────────────────
+
+_profiler_lock = threading.Lock()
+
+
+def profile_call(fn: Callable[..., R], *args: Any) -> tuple[R, dict | None]:
+    """Run *fn* under ``cProfile`` and return its result with the raw pstats data.
+
+    The data is ``None`` when another profile is already running in this
+    process. In that case *fn* still runs, just without a profile.
+    """
+    if not _profiler_lock.acquire(blocking=False):
+        return fn(*args), None
+    try:
+        profiler = cProfile.Profile()
+        result = profiler.runcall(fn, *args)
+        profiler.create_stats()
+        return result, profiler.stats
+    finally:
+        _profiler_lock.release()
+
+
+class _RawStats:
+    """Adapts raw pstats data (e.g. from a pool process) for :meth:`pstats.Stats.add`."""
+
+    def __init__(self, stats: dict) -> None:
+        self.stats = stats
+
+    def create_stats(self) -> None:
+        pass
+
+
+class Recording:
+    """The profiles collected while serving one on-demand request, merged into one."""
+
+    def __init__(self) -> None:
+        self.id = uuid.uuid4().hex
+        self.calls = 0
+        self.skipped = 0
+        self._lock = threading.Lock()
+        self._stats = pstats.Stats()
+
+    def add(self, stats: dict | None) -> None:
+        """Merge one call's pstats data (``None``: the call ran unprofiled)."""
+        with self._lock:
+            if stats is None:
+                self.skipped += 1
+                return
+            self.calls += 1
+            self._stats.add(_RawStats(stats))
+
+    def call(self, fn: Callable[[], R]) -> R:
+        """Run *fn* under the profiler and merge its profile into this recording."""
+        result, stats = profile_call(fn)
+        self.add(stats)
+        return result
+
+    def dump(self, path: Path) -> None:
+        with self._lock:
+            self._stats.dump_stats(path)
+
+
+_active: contextvars.ContextVar[Recording | None] = contextvars.ContextVar("profile_recording", default=None)
+
+
+def active() -> Recording | None:
+    """Return the recording of the request being served, if it is profiled."""
+    return _active.get()
+
+
+# ── Sampled profiles (slowest exports) ────────────────────────────────────────
+
+
+class Samples:
+    """Call stacks (outermost frame first) seen while sampling one thread, with counts."""
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.stacks: dict[tuple[Frame, ...], int] = {}
+
+    def add(self, frame: Any) -> None:
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append((code.co_qualname, code.co_filename, code.co_firstlineno))
+            frame = frame.f_back
+        key = tuple(reversed(stack))
+        self.stacks[key] = self.stacks.get(key, 0) + 1
+
+    def speedscope(self, name: str) -> dict[str, Any]:
+        """Return the samples as a speedscope ``sampled`` profile document."""
+        frames: dict[Frame, int] = {}
+        samples = []
+        weights = []
+        for stack, count in self.stacks.items():
+            samples.append([frames.setdefault(frame, len(frames)) for frame in stack])
+            weights.append(round(count * self.interval, 6))
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "exam-builder",
+            "shared": {"frames": [{"name": n, "file": f, "line": line} for n, f, line in frames]},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": round(sum(weights), 6),
+                "samples": samples,
+                "weights": weights,
+            }],
+        }
+
+
+class _Sampler:
+    """One background thread that samples the stacks of every registered thread."""
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._targets: dict[int, Samples] = {}
+        self._wake = threading.Event()
+        threading.Thread(target=self._run, name="profile-sampler", daemon=True).start()
+
+    def register(self) -> Samples:
+        samples = Samples(self.interval)
+        with self._lock:
+            self._targets[threading.get_ident()] = samples
+            self._wake.set()
+        return samples
+
+    def unregister(self) -> None:
+        with self._lock:
+            self._targets.pop(threading.get_ident(), None)
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait()
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                if not self._targets:
+                    self._wake.clear()
+                for ident, samples in self._targets.items():
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        samples.add(frame)
+
+
+_sampler: _Sampler | None = None
+_sampler_lock = threading.Lock()
+
+
+@contextmanager
+def sampled() -> Iterator[Samples | None]:
+    """Sample the calling thread's stack for the duration of the block.
+
+    Yields ``None`` (and samples nothing) when ``PROFILE_SLOWEST`` is 0.
+    """
+    global _sampler
+    if _env_int("PROFILE_SLOWEST", 10) <= 0:
+        yield None
+        return
+    with _sampler_lock:
+        if _sampler is None:
+            _sampler = _Sampler(float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.01")))
+        sampler = _sampler
+    samples = sampler.register()
+    try:
+        yield samples
+    finally:
+        sampler.unregister()
+
+
+# ── Store ─────────────────────────────────────────────────────────────────────
+
+
+class ProfileRecord(BaseModel):
+    """Description of one stored profile."""
+
+    id: str
+    source: Literal["request", "slow_export"]
+    format: Literal["pstats", "speedscope"]
+    created_at: str
+    seconds: float
+    # On-demand profiles
+    method: str | None = None
+    path: str | None = None
+    status: int | None = None
+    calls: int | None = None
+    skipped: int | None = None
+    # Slowest exports
+    target: str | None = None
+    paper_id: str | None = None
+    title: str | None = None
+
+    @property
+    def filename(self) -> str:
+        return f"{self.id}.prof" if self.format == "pstats" else f"{self.id}.speedscope.json"
+
+
+class ProfileStore:
+    """The profiles kept in one directory: the newest on-demand ones and the slowest exports."""
+
+    def __init__(self, directory: Path, keep_requests: int, keep_slowest: int) -> None:
+        self.directory = directory
+        self.keep_requests = keep_requests
+        self.keep_slowest = keep_slowest
+        self._lock = threading.Lock()
+        # Fastest kept export, so faster builds are turned away without touching the disk
+        self._slowest_floor: float | None = None
+
+    def save_request(
+        self, recording: Recording, method: str, path: str, status: int, seconds: float
+    ) -> ProfileRecord:
+        """Store an on-demand recording and drop the oldest beyond ``keep_requests``."""
+        record = ProfileRecord(
+            id=recording.id,
+            source="request",
+            format="pstats",
+            created_at=datetime.now(timezone.utc).isoformat(),
+            seconds=round(seconds, 6),
+            method=method,
+            path=path,
+            status=status,
+            calls=recording.calls,
+            skipped=recording.skipped,
+        )
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            recording.dump(self.directory / record.filename)
+            self._write_record(record)
+            kept = sorted(self.records("request"), key=lambda r: r.created_at)
+            for old in kept[: max(len(kept) - self.keep_requests, 0)]:
+                self._remove(old)
+        return record
+
+    def offer_export(self, target: str, seconds: float, samples: Samples, subject: Any = None) -> ProfileRecord | None:
+        """Keep a sampled build if it is among the ``keep_slowest`` slowest seen.
+
+        Args:
+            target: Build function, as ``module:qualname``.
+            seconds: How long the build took.
+            samples: Its sampled stacks.
+            subject: The build's first argument; a paper's id and title are recorded.
+
+        Returns:
+            The stored record, or ``None`` if the build was not slow enough.
+        """
+        with self._lock:
+            if self._slowest_floor is not None and seconds <= self._slowest_floor:
+                return None
+            # Other workers share the directory, so decide against what is on disk
+            kept = sorted(self.records("slow_export"), key=lambda r: r.seconds)
+            if len(kept) >= self.keep_slowest and seconds <= kept[0].seconds:
+                self._slowest_floor = kept[0].seconds
+                return None
+            header = getattr(subject, "header", None)
+            record = ProfileRecord(
+                id=uuid.uuid4().hex,
+                source="slow_export",
+                format="speedscope",
+                created_at=datetime.now(timezone.utc).isoformat(),
+                seconds=round(seconds, 6),
+                target=target,
+                paper_id=getattr(subject, "id", None),
+                title=getattr(header, "title", None),
+            )
+            self.directory.mkdir(parents=True, exist_ok=True)
+            name = f"{target.rpartition(':')[2]} {record.title or ''}".strip()
+            (self.directory / record.filename).write_text(json.dumps(samples.speedscope(name)))
+            self._write_record(record)
+            kept.append(record)
+            kept.sort(key=lambda r: r.seconds)
+            for old in kept[: max(len(kept) - self.keep_slowest, 0)]:
+                self._remove(old)
+            kept = kept[-self.keep_slowest :]
+            self._slowest_floor = kept[0].seconds if len(kept) >= self.keep_slowest else None
+        return record
+
+    def records(self, source: str | None = None) -> list[ProfileRecord]:
+        """Return the stored profiles, all or those of one source, newest first."""
+        records = []
+        for path in self.directory.glob("*.json"):
+            if path.name.endswith(".speedscope.json"):
+                continue
+            try:
+                record = ProfileRecord.model_validate_json(path.read_bytes())
+            except (OSError, ValueError):  # removed by another worker meanwhile
+                continue
+            if source is None or record.source == source:
+                records.append(record)
+        return sorted(records, key=lambda r: r.created_at, reverse=True)
+
+    def get(self, profile_id: str) -> ProfileRecord | None:
+        """Return one profile's record, or ``None`` if unknown."""
+        if not profile_id.isalnum():
+            return None
+        try:
+            return ProfileRecord.model_validate_json((self.directory / f"{profile_id}.json").read_bytes())
+        except (OSError, ValueError):
+            return None
+
+    def file_path(self, record: ProfileRecord) -> Path:
+        return self.directory / record.filename
+
+    # ── Helpers ───────────────────────────────────────────────────────────────
+
+    def _write_record(self, record: ProfileRecord) -> None:
+        path = self.directory / f"{record.id}.json"
+        tmp = path.with_name(f".{path.name}.tmp")
+        tmp.write_text(record.model_dump_json())
+        tmp.replace(path)
+
+    def _remove(self, record: ProfileRecord) -> None:
+        (self.directory / f"{record.id}.json").unlink(missing_ok=True)
+        self.file_path(record).unlink(missing_ok=True)
+
+
+_stores: dict[Path, ProfileStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_store() -> ProfileStore:
+    """Return the profile store for the current ``DATA_DIR``."""
+    directory = _data_dir() / "profiles"
+    with _stores_lock:
+        store = _stores.get(directory)
+        if store is None:
+            store = ProfileStore(
+                directory,
+                keep_requests=_env_int("PROFILE_KEEP", 20),
+                keep_slowest=_env_int("PROFILE_SLOWEST", 10),
+            )
+            _stores[directory] = store
+        return store
+
+
+# ── HTTP middleware ───────────────────────────────────────────────────────────
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles requests carrying the profiling token.
+
+    The profile is stored once the response starts, so ``X-Profile-Id`` can
+    name it. Requests to ``/api/profiles`` itself are never profiled.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or configured_token() is None or scope["path"].startswith("/api/profiles"):
+            await self.app(scope, receive, send)
+            return
+        headers = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope["headers"]}
+        supplied = supplied_token(headers, parse_qs(scope["query_string"].decode("latin-1")))
+        if supplied is None:
+            await self.app(scope, receive, send)
+            return
+        if not token_matches(supplied):
+            await _forbidden(send)
+            return
+
+        recording = Recording()
+        start = time.perf_counter()
+
+        async def send_wrapper(message) -> None:
+            if message["type"] == "http.response.start":
+                seconds = time.perf_counter() - start
+                # Off the event loop, and outside the recording's context
+                await asyncio.get_running_loop().run_in_executor(
+                    None,
+                    get_store().save_request,
+                    recording,
+                    scope["method"],
+                    scope["path"],
+                    message["status"],
+                    seconds,
+                )
+                message = {**message, "headers": [*message.get("headers", []), (ID_HEADER.encode(), recording.id.encode())]}
+            await send(message)
+
+        reset = _active.set(recording)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _active.reset(reset)
+
+
+async def _forbidden(send) -> None:
+    body = json.dumps({"detail": "Invalid profiling token."}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": 403,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -1,11 +1,24 @@
-"""Export endpoints: generate .docx paper and answer key from a Paper model."""
+"""Export endpoints: generate .docx paper and answer key from a Paper model.
+
+Documents are built by the export engine (see :mod:`backend.export_engine`)
+so a slow build never stalls other requests on the same worker; when its queue
+is full the endpoints answer ``503`` with a ``Retry-After`` hint.
+
+Finished documents are cached by content (see :mod:`backend.export_cache`);
+the cache key is returned as the ``ETag`` so clients can revalidate with
+``If-None-Match`` and receive ``304 Not Modified`` instead of the file.
+"""
 
 import re
+from typing import Any
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import Response
 
-from ..docx_builder.builder import build_answer_key, build_docx
+from ..concurrency import run_io
+from ..conditional import etag_matches, make_etag
+from ..export_cache import cached_build, export_key, flights
+from ..export_engine import EngineBusy, ExportTimeout, get_engine
 from ..models import Paper
 
 router = APIRouter()
@@ -32,72 +45,105 @@ def _safe_filename(title: str) -> str:
     return stem or "exam"
 
 
+async def _build(paper: Paper, kind: str, what: str, key: str) -> bytes:
+    """Return a cached or freshly built export, mapping engine errors to HTTP errors.
+
+    Raises:
+        503: The export queue is full (with ``Retry-After``).
+        504: The build exceeded the engine timeout.
+        500: Document generation failed.
+    """
+    try:
+        return await cached_build(paper, kind, key)
+    except EngineBusy as exc:
+        raise HTTPException(
+            status_code=503,
+            detail="Export queue is full. Please retry shortly.",
+            headers={"Retry-After": str(exc.retry_after)},
+        ) from exc
+    except ExportTimeout as exc:
+        raise HTTPException(status_code=504, detail=str(exc)) from exc
+    except Exception as exc:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to generate {what}: {exc}",
+        ) from exc
+
+
+async def _cached_export(
+    request: Request,
+    paper: Paper,
+    kind: str,
+    what: str,
+    filename: str,
+) -> Response:
+    """Serve an export from the cache, building and caching it on a miss.
+
+    Answers ``304`` when the client's ``If-None-Match`` already names the
+    document's content key.
+    """
+    key = await run_io(export_key, paper, kind)
+    headers = {"ETag": make_etag(key), "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    content = await _build(paper, kind, what, key)
+    headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return Response(content=content, media_type=DOCX_MIME, headers=headers)
+
+
+@router.get("/export/stats")
+async def export_stats() -> dict[str, Any]:
+    """Return export engine counters: queue depth, throughput and build times.
+
+    ``coalesced`` counts requests that shared an identical build already in
+    progress instead of starting their own.
+    """
+    return {**get_engine().stats(), "coalesced": flights.stats()["coalesced"]}
+
+
 @router.post("/export")
-async def export_paper(paper: Paper) -> Response:
+async def export_paper(paper: Paper, request: Request) -> Response:
     """Generate a formatted exam paper and stream it as a ``.docx`` download.
 
     Args:
         paper: Complete paper model with questions and styling.
 
     Returns:
-        ``.docx`` file as a streaming attachment.
+        ``.docx`` file as a streaming attachment (``304`` when the client's
+        ``If-None-Match`` matches).
 
     Raises:
         500: If document generation fails unexpectedly.
+        503: The export queue is full.
+        504: Document generation timed out.
     """
-    try:
-        content = build_docx(paper)
-    except Exception as exc:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Failed to generate document: {exc}",
-        ) from exc
-
     filename = _safe_filename(paper.header.title) + ".docx"
-    return Response(
-        content=content,
-        media_type=DOCX_MIME,
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
-    )
+    return await _cached_export(request, paper, "paper", "document", filename)
 
 
 @router.post("/export-answer-key")
-async def export_answer_key(paper: Paper) -> Response:
+async def export_answer_key(paper: Paper, request: Request) -> Response:
     """Generate an answer-key ``.docx`` for all MCQ questions with marked answers.
 
     Args:
         paper: Paper whose MCQ questions have ``is_correct`` set on at least one option.
 
     Returns:
-        Answer-key ``.docx`` file as a streaming attachment.
+        Answer-key ``.docx`` file as a streaming attachment (``304`` when the
+        client's ``If-None-Match`` matches).
 
     Raises:
         400: No MCQ correct answers have been marked.
         500: If document generation fails unexpectedly.
+        503: The export queue is full.
+        504: Document generation timed out.
     """
-    has_answers = any(
-        opt.is_correct
-        for q in paper.questions
-        if q.type == "mcq"
-        for opt in q.options  # type: ignore[union-attr]
-    )
-    if not has_answers:
+    if not paper.has_marked_answers():
         raise HTTPException(
             status_code=400,
             detail="No MCQ correct answers marked. Mark at least one correct answer to export an answer key.",
         )
 
-    try:
-        content = build_answer_key(paper)
-    except Exception as exc:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Failed to generate answer key: {exc}",
-        ) from exc
-
     filename = _safe_filename(paper.header.title) + "_answer_key.docx"
-    return Response(
-        content=content,
-        media_type=DOCX_MIME,
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
-    )
+    return await _cached_export(request, paper, "answer_key", "answer key", filename)
@@ -0,0 +1,233 @@
+"""Batch export: many saved papers (and their answer keys) as one ZIP download.
+
+Papers are loaded from storage and built concurrently through
+:func:`backend.export_cache.build_with_retry`, so the export engine still
+bounds CPU use and unchanged papers are cache hits. Each document is appended to the
+archive as soon as it is ready and the archive bytes written so far are sent
+immediately: the ZIP is written to a non-seekable sink (entries carry data
+descriptors), so the whole archive is never held in memory.
+
+A paper that cannot be loaded or built does not abort the batch; it is listed
+with its error in ``manifest.json``, the last entry of the archive.
+
+Progress is reported by ``GET /export-batch/{batch_id}``, where the id is
+returned in the ``X-Batch-Id`` response header. Progress is kept in memory
+by the worker process that serves the batch.
+"""
+
+import asyncio
+import json
+import time
+import uuid
+import zipfile
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+
+from ..export_cache import build_with_retry
+from ..export_engine import EngineBusy, get_engine
+from ..models import ExportBatchRequest, Paper
+from ..storage import aload_item
+from .export import _safe_filename
+
+router = APIRouter()
+
+MAX_TRACKED_BATCHES = 100  # progress records kept for finished batches
+
+
+# ── Progress ──────────────────────────────────────────────────────────────────
+
+
+@dataclass
+class BatchProgress:
+    """Live counters of one batch export."""
+
+    id: str
+    papers_total: int
+    papers_done: int = 0
+    documents_written: int = 0
+    state: str = "running"  # running | finished | cancelled
+    errors: list[dict[str, str]] = field(default_factory=list)
+    started_at: float = field(default_factory=time.time)
+    finished_at: float | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "state": self.state,
+            "papers_total": self.papers_total,
+            "papers_done": self.papers_done,
+            "papers_failed": len({e["paper_id"] for e in self.errors}),
+            "documents_written": self.documents_written,
+            "errors": self.errors,
+            "elapsed_seconds": round((self.finished_at or time.time()) - self.started_at, 3),
+        }
+
+
+_batches: OrderedDict[str, BatchProgress] = OrderedDict()
+
+
+def _track(progress: BatchProgress) -> None:
+    _batches[progress.id] = progress
+    while len(_batches) > MAX_TRACKED_BATCHES:
+        _batches.popitem(last=False)
+
+
+# ── Building ──────────────────────────────────────────────────────────────────
+
+
+@dataclass
+class _PaperResult:
+    paper_id: str
+    title: str = ""
+    files: list[tuple[str, bytes]] = field(default_factory=list)
+    errors: list[str] = field(default_factory=list)
+
+
+async def _export_paper(paper_id: str, answer_keys: bool) -> _PaperResult:
+    """Load and build every document of one paper, recording errors instead of raising."""
+    result = _PaperResult(paper_id)
+    try:
+        paper = await aload_item("papers", paper_id, Paper)
+    except Exception as exc:
+        result.errors.append(f"Failed to load paper: {exc}")
+        return result
+    if paper is None:
+        result.errors.append("Paper not found.")
+        return result
+
+    result.title = paper.header.title
+    stem = f"{_safe_filename(paper.header.title)}_{paper_id[:8]}"
+    documents = [("paper", f"{stem}.docx")]
+    if answer_keys and paper.has_marked_answers():
+        documents.append(("answer_key", f"{stem}_answer_key.docx"))
+    for kind, name in documents:
+        try:
+            result.files.append((name, await build_with_retry(paper, kind)))
+        except EngineBusy:
+            result.errors.append(f"Failed to generate {kind}: export queue is full.")
+        except Exception as exc:
+            result.errors.append(f"Failed to generate {kind}: {exc!s}")
+    return result
+
+
+# ── Streaming ZIP ─────────────────────────────────────────────────────────────
+
+
+class _Sink:
+    """Write-only, non-seekable file object buffering ZIP output until drained."""
+
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+
+    def write(self, data: bytes) -> int:
+        self._buffer += data
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+def _entry(name: str, compress_type: int) -> zipfile.ZipInfo:
+    info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+    info.compress_type = compress_type
+    return info
+
+
+async def _stream_batch(
+    progress: BatchProgress, paper_ids: list[str], answer_keys: bool
+) -> AsyncIterator[bytes]:
+    """Yield the ZIP archive of a batch, one finished paper at a time.
+
+    At most ``workers`` papers are being built and at most ``workers`` more
+    are waiting to be written, bounding memory independently of batch size.
+    """
+    concurrency = max(1, min(get_engine().workers, len(paper_ids)))
+    results: asyncio.Queue[_PaperResult] = asyncio.Queue(maxsize=concurrency)
+    pending = iter(paper_ids)
+
+    async def worker() -> None:
+        for paper_id in pending:
+            await results.put(await _export_paper(paper_id, answer_keys))
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    sink = _Sink()
+    archive = zipfile.ZipFile(sink, "w")
+    manifest = []
+    try:
+        for _ in paper_ids:
+            result = await results.get()
+            for name, content in result.files:
+                # .docx files are already deflated; storing them avoids recompressing
+                archive.writestr(_entry(name, zipfile.ZIP_STORED), content)
+                progress.documents_written += 1
+                yield sink.drain()
+            progress.papers_done += 1
+            progress.errors.extend({"paper_id": result.paper_id, "error": e} for e in result.errors)
+            manifest.append({
+                "paper_id": result.paper_id,
+                "title": result.title,
+                "files": [name for name, _ in result.files],
+                "errors": result.errors,
+            })
+        archive.writestr(
+            _entry("manifest.json", zipfile.ZIP_DEFLATED),
+            json.dumps({"papers": manifest}, indent=2),
+        )
+        archive.close()
+        progress.state = "finished"
+        yield sink.drain()
+    finally:
+        for task in workers:
+            task.cancel()
+        if progress.state == "running":
+            progress.state = "cancelled"
+        progress.finished_at = time.time()
+
+
+# ── Endpoints ─────────────────────────────────────────────────────────────────
+
+
+@router.post("/export-batch")
+async def export_batch(body: ExportBatchRequest) -> StreamingResponse:
+    """Export many saved papers as one streamed ``.zip`` of ``.docx`` files.
+
+    Args:
+        body: Paper IDs (duplicates ignored) and whether to include answer keys.
+
+    Returns:
+        ``application/zip`` stream; the batch id for progress polling is in
+        the ``X-Batch-Id`` header.
+    """
+    paper_ids = list(dict.fromkeys(body.paper_ids))
+    progress = BatchProgress(id=str(uuid.uuid4()), papers_total=len(paper_ids))
+    _track(progress)
+    return StreamingResponse(
+        _stream_batch(progress, paper_ids, body.answer_keys),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": 'attachment; filename="papers.zip"',
+            "X-Batch-Id": progress.id,
+        },
+    )
+
+
+@router.get("/export-batch/{batch_id}")
+async def export_batch_progress(batch_id: str) -> dict[str, Any]:
+    """Return the progress of a batch export.
+
+    Raises:
+        404: Unknown (or long finished) batch id.
+    """
+    progress = _batches.get(batch_id)
+    if progress is None:
+        raise HTTPException(status_code=404, detail="Batch not found.")
+    return progress.to_dict()
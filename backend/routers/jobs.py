@@ -0,0 +1,114 @@
+"""Asynchronous export job endpoints: submit, poll status, download.
+
+See :mod:`backend.export_jobs` for how jobs are run, stored and expired.
+"""
+
+from typing import Any, Literal
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import FileResponse, JSONResponse
+
+from ..concurrency import run_io
+from ..conditional import make_etag
+from ..export_cache import export_key
+from ..export_jobs import ExportJob, JobsBusy, get_store
+from ..models import Paper
+from ..storage import aload_item
+from .export import DOCX_MIME, _safe_filename
+
+router = APIRouter()
+
+
+def _view(job: ExportJob) -> dict[str, Any]:
+    """Return the public JSON view of a job."""
+    data = job.model_dump(exclude={"key"})
+    data["status_url"] = f"/api/papers/export-jobs/{job.id}"
+    data["download_url"] = f"/api/papers/export-jobs/{job.id}/download" if job.state == "done" else None
+    return data
+
+
+@router.post("/{paper_id}/export-jobs", status_code=202)
+async def submit_export_job(
+    paper_id: str, kind: Literal["paper", "answer_key"] = Query("paper")
+) -> JSONResponse:
+    """Queue an export of a saved paper and return its job immediately.
+
+    Submitting the same paper content again while a matching job is queued,
+    running or finished (and not expired) returns that job with ``200``.
+
+    Args:
+        paper_id: ID of the saved paper.
+        kind: ``paper`` (default) or ``answer_key``.
+
+    Returns:
+        Job status with a ``Location`` header pointing at the status endpoint.
+
+    Raises:
+        400: ``kind=answer_key`` but no MCQ correct answers are marked.
+        404: Paper not found.
+        503: Too many jobs are already pending.
+    """
+    paper = await aload_item("papers", paper_id, Paper)
+    if paper is None:
+        raise HTTPException(status_code=404, detail="Paper not found.")
+    if kind == "answer_key" and not paper.has_marked_answers():
+        raise HTTPException(
+            status_code=400,
+            detail="No MCQ correct answers marked. Mark at least one correct answer to export an answer key.",
+        )
+
+    suffix = "_answer_key.docx" if kind == "answer_key" else ".docx"
+    filename = _safe_filename(paper.header.title) + suffix
+    key = await run_io(export_key, paper, kind)
+    try:
+        job, created = await run_io(get_store().submit, paper, kind, key, filename)
+    except JobsBusy as exc:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many export jobs pending. Please retry shortly.",
+            headers={"Retry-After": "5"},
+        ) from exc
+    return JSONResponse(
+        _view(job),
+        status_code=202 if created else 200,
+        headers={"Location": f"/api/papers/export-jobs/{job.id}"},
+    )
+
+
+@router.get("/export-jobs/{job_id}")
+async def get_export_job(job_id: str) -> dict[str, Any]:
+    """Return the status of an export job.
+
+    Raises:
+        404: Unknown or expired job.
+    """
+    job = await run_io(get_store().get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Export job not found.")
+    return _view(job)
+
+
+@router.get("/export-jobs/{job_id}/download")
+async def download_export_job(job_id: str) -> FileResponse:
+    """Download the document produced by a finished export job.
+
+    Raises:
+        404: Unknown or expired job.
+        409: The job has not finished, or it failed.
+    """
+    store = get_store()
+    job = await run_io(store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Export job not found.")
+    if job.state != "done":
+        detail = f"Export job failed: {job.error}" if job.state == "failed" else f"Export job is {job.state}."
+        raise HTTPException(status_code=409, detail=detail)
+    path = store.artifact_path(job)
+    if not await run_io(path.exists):
+        raise HTTPException(status_code=404, detail="Export job not found.")
+    return FileResponse(
+        path,
+        media_type=DOCX_MIME,
+        filename=job.filename,
+        headers={"ETag": make_etag(job.key)},
+    )
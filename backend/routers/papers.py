@@ -1,58 +1,249 @@
-"""Papers CRUD endpoints."""
+"""Papers CRUD endpoints.
+
+A paper's ``ETag`` is its content hash (:func:`backend.hashing.content_hash`),
+which ignores ``id`` and the timestamps. ``GET`` honours ``If-None-Match``;
+``POST`` and ``PATCH`` honour ``If-Match`` and answer ``412`` when the stored
+paper has moved on, so concurrent editors cannot silently overwrite each
+other. Saves that would not change the paper are not written at all.
+
+Every write or delete schedules a refresh of the paper's rows in the search
+index (:mod:`backend.search`) once the response is sent.
+"""
 
 from datetime import datetime
+from typing import Any, Callable, Literal
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Body, HTTPException, Query, Request, Response
+from pydantic import ValidationError
 
-from ..models import Paper, PaperSummary
-from ..storage import delete_item, list_items, load_item, save_item
+from .. import search
+from ..concurrency import run_io
+from ..conditional import etag_matches, make_etag
+from ..hashing import content_hash
+from ..jsonpatch import JsonPatchError, JsonPatchTestFailed
+from ..models import Paper, PaperOperations, PaperSummary
+from ..paper_ops import PaperOpError, QuestionNotFound, apply_json_patch, apply_operations
+from ..storage import (
+    InvalidCursor,
+    ListQuery,
+    PreconditionFailed,
+    SaveResult,
+    adelete_item,
+    aitem_hash,
+    alist_page,
+    aload_item,
+    asave_item,
+    aupdate_document,
+)
 
 router = APIRouter()
 
+# API sort names → storage sort fields
+_SORTS = {"updated_at": "sort_ts", "title": "title", "subject": "subject"}
+
+
+def _if_match(request: Request) -> Callable[[str | None], bool] | None:
+    """Return a save precondition enforcing the request's ``If-Match`` header, if any."""
+    header = request.headers.get("if-match")
+    if header is None:
+        return None
+    return lambda current: current is not None and etag_matches(header, make_etag(current), weak=False)
+
+
+async def _save(
+    paper: Paper,
+    precondition: Callable[[str | None], bool] | None,
+    background_tasks: BackgroundTasks,
+) -> SaveResult:
+    """Save *paper* unless unchanged, and schedule its search re-index if written.
+
+    Raises:
+        412: *precondition* rejected the stored paper.
+    """
+    try:
+        result = await asave_item("papers", paper.id, paper, precondition=precondition, skip_unchanged=True)
+    except PreconditionFailed as exc:
+        headers = {"ETag": make_etag(exc.current_hash)} if exc.current_hash else None
+        raise HTTPException(
+            status_code=412, detail="Paper was changed by someone else.", headers=headers
+        ) from exc
+    if result.written:
+        background_tasks.add_task(run_io, search.refresh_paper, paper.id)
+    return result
+
+
+def _local_iso(moment: datetime) -> str:
+    """Return *moment* in the naive local-time ISO form ``updated_at`` is stored in."""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone().replace(tzinfo=None)
+    return moment.isoformat()
+
 
 @router.get("", response_model=list[PaperSummary])
-async def list_papers() -> list[PaperSummary]:
-    """Return a lightweight summary of all saved papers, newest first."""
-    papers = list_items("papers", Paper)
-    return [
-        PaperSummary(
-            id=p.id,
-            title=p.header.title or "Untitled",
-            subject=p.header.subject,
-            updated_at=p.updated_at,
-        )
-        for p in papers
-    ]
+async def list_papers(
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: str | None = Query(None, description="X-Next-Cursor of the previous page"),
+    sort: Literal["updated_at", "title", "subject"] = "updated_at",
+    order: Literal["asc", "desc"] | None = Query(None, description="Default: desc for updated_at, else asc"),
+    subject: str | None = None,
+    updated_from: datetime | None = Query(None, description="Only papers updated at or after this time"),
+    updated_to: datetime | None = Query(None, description="Only papers updated before this time"),
+) -> list[PaperSummary]:
+    """Return one page of paper summaries, newest first by default.
+
+    When more papers follow, the ``X-Next-Cursor`` response header carries
+    the cursor for the next page.
+
+    Raises:
+        400: ``cursor`` is malformed or was issued for a different sort or filter.
+    """
+    query = ListQuery(
+        sort=_SORTS[sort],
+        descending=(order or ("desc" if sort == "updated_at" else "asc")) == "desc",
+        limit=limit,
+        subject=subject,
+        since=None if updated_from is None else _local_iso(updated_from),
+        until=None if updated_to is None else _local_iso(updated_to),
+    )
+    try:
+        page = await alist_page("papers", Paper, PaperSummary, query, cursor)
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return page.items
 
 
 @router.post("", response_model=Paper)
-async def save_paper(paper: Paper) -> Paper:
-    """Create or update a paper. Always bumps ``updated_at``."""
+async def save_paper(
+    paper: Paper, request: Request, response: Response, background_tasks: BackgroundTasks
+) -> Paper:
+    """Create or update a paper.
+
+    ``updated_at`` is bumped only when the content changes; saving an
+    unchanged paper returns the stored timestamps and writes nothing.
+
+    Raises:
+        412: ``If-Match`` does not name the stored paper's ETag.
+    """
     paper.updated_at = datetime.now().isoformat()
-    save_item("papers", paper.id, paper)
+    result = await _save(paper, _if_match(request), background_tasks)
+    if not result.written:
+        paper.updated_at = result.summary.get("updated_at", paper.updated_at)
+    response.headers["ETag"] = make_etag(result.content_hash)
     return paper
 
 
 @router.get("/{paper_id}", response_model=Paper)
-async def get_paper(paper_id: str) -> Paper:
+async def get_paper(paper_id: str, request: Request, response: Response) -> Any:
     """Fetch a single paper by ID.
 
+    Answers ``304`` when ``If-None-Match`` names the paper's current ETag.
+
     Raises:
         404: Paper not found.
     """
-    paper = load_item("papers", paper_id, Paper)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        current = await aitem_hash("papers", paper_id, Paper)
+        if current is not None and etag_matches(if_none_match, make_etag(current)):
+            return Response(status_code=304, headers={"ETag": make_etag(current)})
+    paper = await aload_item("papers", paper_id, Paper)
     if paper is None:
         raise HTTPException(status_code=404, detail="Paper not found.")
+    response.headers["ETag"] = make_etag(await run_io(content_hash, paper))
     return paper
 
 
+@router.patch("/{paper_id}", response_model=Paper)
+async def patch_paper(
+    paper_id: str,
+    request: Request,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    body: list[dict[str, Any]] | PaperOperations = Body(...),
+) -> Paper:
+    """Partially update a stored paper.
+
+    The body is either an RFC 6902 JSON Patch (a list of operations, sent as
+    ``application/json-patch+json`` or ``application/json``) or an object
+    ``{"operations": [...]}`` of ``upsert_question`` / ``delete_question`` /
+    ``reorder_questions`` operations. The paper is only written, and
+    ``updated_at`` only bumped, if the operations change it.
+
+    The operations are applied and saved under the paper's lock (see
+    :func:`backend.storage.update_document`), so concurrent PATCHes and
+    per-question writes never overwrite each other. With ``If-Match`` they
+    are only applied to the version of the paper the client names.
+
+    Raises:
+        400: Malformed patch, bad index/reorder, or an attempt to change the id.
+        404: Paper (or a question named by ``delete_question``) not found.
+        409: A JSON Patch ``test`` operation failed.
+        412: ``If-Match`` does not name the stored paper's ETag.
+        422: The patched document is not a valid paper.
+    """
+    if_match = request.headers.get("if-match")
+    precondition = None if if_match is None else (
+        lambda current: etag_matches(if_match, make_etag(current), weak=False)
+    )
+    patched: Paper | None = None
+    stored_updated_at = ""
+
+    def mutate(data: dict[str, Any]) -> bool:
+        # Runs under the paper's lock, so a concurrent write cannot slip in
+        # between reading the paper and saving the patched version.
+        nonlocal patched, stored_updated_at
+        stored_updated_at = data.get("updated_at", "")
+        patched = Paper.model_validate(data)
+        if isinstance(body, PaperOperations):
+            patched, changed = apply_operations(patched, body.operations)
+        else:
+            patched, changed = apply_json_patch(patched, body)
+        if changed:
+            patched.updated_at = datetime.now().isoformat()
+            data.clear()
+            data.update(patched.model_dump(mode="json"))
+        return changed
+
+    try:
+        result = await aupdate_document(
+            "papers", paper_id, mutate, PaperSummary.from_json, precondition=precondition, skip_unchanged=True
+        )
+    except PreconditionFailed as exc:
+        raise HTTPException(
+            status_code=412, detail="Paper was changed by someone else.",
+            headers={"ETag": make_etag(exc.current_hash)},
+        ) from exc
+    except JsonPatchTestFailed as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+    except QuestionNotFound as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+    except (JsonPatchError, PaperOpError) as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except ValidationError as exc:
+        errors = exc.errors(include_url=False, include_context=False)
+        raise HTTPException(status_code=422, detail=errors) from exc
+    if result is None or patched is None:
+        raise HTTPException(status_code=404, detail="Paper not found.")
+
+    if result.written:
+        background_tasks.add_task(run_io, search.refresh_paper, paper_id)
+    else:  # nothing but timestamps changed: report what is stored
+        patched.updated_at = stored_updated_at
+    response.headers["ETag"] = make_etag(result.content_hash)
+    return patched
+
+
 @router.delete("/{paper_id}")
-async def delete_paper(paper_id: str) -> dict[str, str]:
+async def delete_paper(paper_id: str, background_tasks: BackgroundTasks) -> dict[str, str]:
     """Delete a paper by ID.
 
     Raises:
         404: Paper not found.
     """
-    if not delete_item("papers", paper_id):
+    if not await adelete_item("papers", paper_id):
         raise HTTPException(status_code=404, detail="Paper not found.")
+    background_tasks.add_task(run_io, search.refresh_paper, paper_id)
     return {"deleted": paper_id}
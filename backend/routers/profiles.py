@@ -0,0 +1,65 @@
+"""Profile endpoints: list and download stored profiles (admin only).
+
+See :mod:`backend.profiling` for how profiles are captured. Every endpoint
+needs the ``PROFILE_TOKEN``, in an ``X-Profile-Token`` header or a
+``profile`` query parameter.
+"""
+
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import FileResponse
+
+from .. import profiling
+from ..concurrency import run_io
+
+router = APIRouter()
+
+_MEDIA_TYPES = {"pstats": "application/octet-stream", "speedscope": "application/json"}
+
+
+def require_admin(request: Request) -> None:
+    """Reject requests without the profiling token.
+
+    Raises:
+        404: Profiling is disabled (no ``PROFILE_TOKEN`` configured).
+        403: The token is missing or wrong.
+    """
+    if profiling.configured_token() is None:
+        raise HTTPException(status_code=404, detail="Profiling is disabled.")
+    query = {key: request.query_params.getlist(key) for key in request.query_params}
+    supplied = profiling.supplied_token(dict(request.headers), query)
+    if supplied is None or not profiling.token_matches(supplied):
+        raise HTTPException(status_code=403, detail="Invalid profiling token.")
+
+
+def _view(record: profiling.ProfileRecord) -> dict[str, Any]:
+    """Return the public JSON view of a profile record."""
+    data = record.model_dump(exclude_none=True)
+    data["download_url"] = f"/api/profiles/{record.id}"
+    return data
+
+
+@router.get("", dependencies=[Depends(require_admin)])
+async def list_profiles() -> list[dict[str, Any]]:
+    """Return every stored profile, newest first.
+
+    ``source`` is ``request`` for on-demand profiles and ``slow_export`` for
+    the automatically kept slowest builds.
+    """
+    return [_view(record) for record in await run_io(profiling.get_store().records)]
+
+
+@router.get("/{profile_id}", dependencies=[Depends(require_admin)])
+async def download_profile(profile_id: str) -> FileResponse:
+    """Download one profile: a pstats file or a speedscope JSON document.
+
+    Raises:
+        404: Unknown profile, or it was rotated out.
+    """
+    store = profiling.get_store()
+    record = await run_io(store.get, profile_id)
+    path = store.file_path(record) if record is not None else None
+    if path is None or not await run_io(path.exists):
+        raise HTTPException(status_code=404, detail="Profile not found.")
+    return FileResponse(path, media_type=_MEDIA_TYPES[record.format], filename=record.filename)
@@ -0,0 +1,166 @@
+"""Per-question endpoints under a saved paper.
+
+Each request validates only the question it touches (against the
+``Question`` union) and edits the stored paper as plain JSON through
+:func:`backend.storage.update_document`, so it never validates the rest of
+the paper. The paper is still read, hashed and (when it changes) written
+whole, once per request. A write, an ``updated_at`` bump and a search
+re-index only happen when the paper actually changes.
+
+Writes honour ``If-Match`` against the paper's ``ETag`` (see
+:mod:`.papers`) and answer ``412`` when the paper has moved on; responses
+carry the paper's new ``ETag``.
+"""
+
+from datetime import datetime
+from typing import Any, Callable
+
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Request, Response
+from pydantic import TypeAdapter
+
+from .. import search
+from ..concurrency import run_io
+from ..conditional import etag_matches, make_etag
+from ..models import PaperSummary, Question, QuestionOrder
+from ..paper_ops import (
+    PaperOpError,
+    QuestionNotFound,
+    find_question,
+    reorder_questions,
+    upsert_question,
+)
+from ..storage import PreconditionFailed, aload_document, aupdate_document
+
+router = APIRouter()
+
+_question = TypeAdapter(Question)
+
+
+async def _update(
+    paper_id: str,
+    edit: Callable[[list[dict[str, Any]]], bool],
+    request: Request,
+    response: Response,
+    background_tasks: BackgroundTasks,
+) -> dict[str, Any]:
+    """Apply *edit* to the stored question list and return the paper's JSON.
+
+    *edit* receives the list of question JSON objects, edits it in place and
+    returns whether it changed. A change schedules the paper's search re-index.
+    The paper's resulting ``ETag`` is set on *response*.
+
+    Raises:
+        400: The edit is invalid (bad index or reorder).
+        404: Paper or question not found.
+        412: ``If-Match`` does not name the stored paper's ETag.
+    """
+    if_match = request.headers.get("if-match")
+    precondition = None if if_match is None else (
+        lambda current: etag_matches(if_match, make_etag(current), weak=False)
+    )
+
+    def mutate(data: dict[str, Any]) -> bool:
+        changed = edit(data["questions"])
+        if changed:
+            data["updated_at"] = datetime.now().isoformat()
+        return changed
+
+    try:
+        result = await aupdate_document(
+            "papers", paper_id, mutate, PaperSummary.from_json, precondition=precondition
+        )
+    except PreconditionFailed as exc:
+        raise HTTPException(
+            status_code=412, detail="Paper was changed by someone else.",
+            headers={"ETag": make_etag(exc.current_hash)},
+        ) from exc
+    except QuestionNotFound as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+    except PaperOpError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    if result is None:
+        raise HTTPException(status_code=404, detail="Paper not found.")
+    if result.written:
+        background_tasks.add_task(run_io, search.refresh_paper, paper_id)
+    response.headers["ETag"] = make_etag(result.content_hash)
+    return result.data
+
+
+@router.get("/{paper_id}/questions/{question_id}", response_model=Question)
+async def get_question(paper_id: str, question_id: str) -> Any:
+    """Fetch one question of a paper.
+
+    Raises:
+        404: Paper or question not found.
+    """
+    data = await aload_document("papers", paper_id)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Paper not found.")
+    try:
+        return _question.validate_python(data["questions"][find_question(data["questions"], question_id)])
+    except QuestionNotFound as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+
+
+@router.put("/{paper_id}/questions/{question_id}", response_model=Question)
+async def put_question(
+    paper_id: str,
+    question_id: str,
+    question: Question,
+    request: Request,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    index: int | None = Query(None, ge=0, description="Position to insert or move the question to"),
+) -> Any:
+    """Create or replace one question of a paper.
+
+    The question's ``id`` is taken from the path. New questions are appended
+    unless ``index`` is given.
+
+    Raises:
+        400: ``index`` out of range.
+        404: Paper not found.
+        412: ``If-Match`` does not name the stored paper's ETag.
+    """
+    question.id = question_id
+    stored = question.model_dump(mode="json")
+    await _update(
+        paper_id, lambda questions: upsert_question(questions, stored, index), request, response, background_tasks
+    )
+    return question
+
+
+@router.delete("/{paper_id}/questions/{question_id}")
+async def delete_question(
+    paper_id: str, question_id: str, request: Request, response: Response, background_tasks: BackgroundTasks
+) -> dict[str, str]:
+    """Remove one question from a paper.
+
+    Raises:
+        404: Paper or question not found.
+        412: ``If-Match`` does not name the stored paper's ETag.
+    """
+
+    def remove(questions: list[dict[str, Any]]) -> bool:
+        del questions[find_question(questions, question_id)]
+        return True
+
+    await _update(paper_id, remove, request, response, background_tasks)
+    return {"deleted": question_id}
+
+
+@router.put("/{paper_id}/question-order")
+async def reorder_paper_questions(
+    paper_id: str, body: QuestionOrder, request: Request, response: Response, background_tasks: BackgroundTasks
+) -> QuestionOrder:
+    """Reorder a paper's questions.
+
+    Raises:
+        400: ``order`` is not a permutation of the paper's question ids.
+        404: Paper not found.
+        412: ``If-Match`` does not name the stored paper's ETag.
+    """
+    await _update(
+        paper_id, lambda questions: reorder_questions(questions, body.order), request, response, background_tasks
+    )
+    return body
@@ -0,0 +1,22 @@
+"""Full-text search across the questions of all saved papers."""
+
+from fastapi import APIRouter, Query
+
+from .. import search
+from ..concurrency import run_io
+from ..models import SearchHit
+
+router = APIRouter()
+
+
+@router.get("", response_model=list[SearchHit])
+async def search_questions(
+    q: str = Query(..., min_length=1, max_length=200, description="Words to find (prefix match)"),
+    limit: int = Query(20, ge=1, le=100),
+) -> list[SearchHit]:
+    """Return the questions best matching ``q``, best first.
+
+    Every word of ``q`` must appear in a question, as a word or word prefix,
+    in its text, MCQ stem or options, or image caption.
+    """
+    return await run_io(search.get_index().search, q, limit)
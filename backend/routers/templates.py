@@ -1,27 +1,52 @@
 """Templates CRUD endpoints."""
 
-from fastapi import APIRouter, HTTPException
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException, Query, Response
 
 from ..models import Template, TemplateSummary
-from ..storage import delete_item, list_items, load_item, save_item
+from ..storage import InvalidCursor, ListQuery, adelete_item, alist_page, aload_item, asave_item
 
 router = APIRouter()
 
+# API sort names → storage sort fields
+_SORTS = {"created_at": "sort_ts", "name": "title"}
+
 
 @router.get("", response_model=list[TemplateSummary])
-async def list_templates() -> list[TemplateSummary]:
-    """Return a lightweight summary of all saved templates, newest first."""
-    templates = list_items("templates", Template)
-    return [
-        TemplateSummary(id=t.id, name=t.name, created_at=t.created_at)
-        for t in templates
-    ]
+async def list_templates(
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: str | None = Query(None, description="X-Next-Cursor of the previous page"),
+    sort: Literal["created_at", "name"] = "created_at",
+    order: Literal["asc", "desc"] | None = Query(None, description="Default: desc for created_at, else asc"),
+) -> list[TemplateSummary]:
+    """Return one page of template summaries, newest first by default.
+
+    When more templates follow, the ``X-Next-Cursor`` response header carries
+    the cursor for the next page.
+
+    Raises:
+        400: ``cursor`` is malformed or was issued for a different sort.
+    """
+    query = ListQuery(
+        sort=_SORTS[sort],
+        descending=(order or ("desc" if sort == "created_at" else "asc")) == "desc",
+        limit=limit,
+    )
+    try:
+        page = await alist_page("templates", Template, TemplateSummary, query, cursor)
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return page.items
 
 
 @router.post("", response_model=Template)
 async def save_template(template: Template) -> Template:
     """Create or update a template."""
-    save_item("templates", template.id, template)
+    await asave_item("templates", template.id, template)
     return template
 
 
@@ -32,7 +57,7 @@ async def get_template(template_id: str) -> Template:
     Raises:
         404: Template not found.
     """
-    template = load_item("templates", template_id, Template)
+    template = await aload_item("templates", template_id, Template)
     if template is None:
         raise HTTPException(status_code=404, detail="Template not found.")
     return template
@@ -45,6 +70,6 @@ async def delete_template(template_id: str) -> dict[str, str]:
     Raises:
         404: Template not found.
     """
-    if not delete_item("templates", template_id):
+    if not await adelete_item("templates", template_id):
         raise HTTPException(status_code=404, detail="Template not found.")
     return {"deleted": template_id}
@@ -3,7 +3,7 @@
 Security controls applied (Secure Code Guardian):
 - Allow-list of permitted MIME types (not a block-list)
 - Magic-byte validation — content-type header alone is untrusted user input
-- Hard file-size cap (10 MB) enforced server-side
+- Hard file-size cap (10 MB) enforced server-side while streaming
 - UUID-based filenames prevent path traversal and enumeration
 - Files served with Content-Disposition: inline (no execution)
 """
@@ -12,9 +12,13 @@ import os
 import uuid
 from pathlib import Path
 
-from fastapi import APIRouter, HTTPException, UploadFile, File
+from fastapi import APIRouter, BackgroundTasks, HTTPException, UploadFile, File
 from fastapi.responses import FileResponse
 
+from ..concurrency import run_io
+from ..images import prepare_renditions
+from ..metrics import UPLOAD_BYTES
+
 router = APIRouter()
 
 # ── Configuration ─────────────────────────────────────────────────────────────
@@ -23,6 +27,7 @@ ALLOWED_MIME_TYPES: frozenset[str] = frozenset(
     {"image/png", "image/jpeg", "image/gif", "image/webp"}
 )
 MAX_UPLOAD_BYTES: int = 10 * 1024 * 1024  # 10 MB
+CHUNK_BYTES: int = 64 * 1024  # read size while streaming an upload to disk
 
 # Magic-byte signatures for each allowed type
 _MAGIC: dict[str, list[bytes]] = {
@@ -31,6 +36,7 @@ _MAGIC: dict[str, list[bytes]] = {
     "image/gif": [b"GIF87a", b"GIF89a"],
     "image/webp": [b"RIFF"],  # full check: RIFF....WEBP (checked separately)
 }
+_MAGIC_PREFIX_BYTES = 12  # enough of the file to check any signature above
 
 
 def _uploads_dir() -> Path:
@@ -45,13 +51,63 @@ def _validate_magic(content_type: str, data: bytes) -> bool:
     return any(data[: len(sig)] == sig for sig in signatures)
 
 
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=400,
+        detail=f"File too large. Maximum size is {MAX_UPLOAD_BYTES // 1024 // 1024} MB.",
+    )
+
+
+async def _stream_to_disk(file: UploadFile, content_type: str, dest: Path) -> int:
+    """Copy an upload to *dest* chunk by chunk, validating as it goes.
+
+    The magic bytes are checked on the first chunk and the size cap on every
+    chunk, so a bad upload is rejected without reading the rest of it and at
+    most one chunk is held in memory. *dest* is removed on any failure.
+
+    Returns:
+        Number of bytes written.
+
+    Raises:
+        400: Magic bytes do not match *content_type*, or the file is too large.
+    """
+    out = await run_io(open, dest, "wb")
+    try:
+        received = 0
+        chunk = await file.read(max(CHUNK_BYTES, _MAGIC_PREFIX_BYTES))
+        # Reject polyglot / mislabelled (or empty) files before writing anything
+        if not _validate_magic(content_type, chunk):
+            raise HTTPException(
+                status_code=400,
+                detail="File content does not match the declared image type.",
+            )
+        while chunk:
+            received += len(chunk)
+            if received > MAX_UPLOAD_BYTES:
+                raise _too_large()
+            await run_io(out.write, chunk)
+            chunk = await file.read(CHUNK_BYTES)
+    except BaseException:
+        await run_io(out.close)
+        await run_io(dest.unlink, True)
+        raise
+    await run_io(out.close)
+    return received
+
+
 # ── Endpoints ─────────────────────────────────────────────────────────────────
 
 
 @router.post("/image")
-async def upload_image(file: UploadFile = File(...)) -> dict[str, str]:
+async def upload_image(
+    background_tasks: BackgroundTasks, file: UploadFile = File(...)
+) -> dict[str, str]:
     """Accept an image upload, validate it, and store it under a UUID filename.
 
+    The body is streamed to disk in ``CHUNK_BYTES`` pieces rather than read
+    into memory, so peak memory per upload stays constant. The DOCX-ready
+    renditions of the image are generated after the response is sent.
+
     Returns:
         JSON with ``filename`` (storage name) and ``url`` (GET path).
 
@@ -68,26 +124,19 @@ async def upload_image(file: UploadFile = File(...)) -> dict[str, str]:
             ),
         )
 
-    content = await file.read()
-
-    # 2. Size check (server-side — never trust Content-Length header alone)
-    if len(content) > MAX_UPLOAD_BYTES:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File too large. Maximum size is {MAX_UPLOAD_BYTES // 1024 // 1024} MB.",
-        )
-
-    # 3. Magic-byte validation — reject polyglot / mislabelled files
-    if not _validate_magic(file.content_type, content):
-        raise HTTPException(
-            status_code=400,
-            detail="File content does not match the declared image type.",
-        )
+    # 2. Early size check — the multipart parser has already counted the part
+    if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+        raise _too_large()
 
-    # 4. Store under a UUID filename to prevent path traversal / enumeration
+    # 3. Stream to a temp file in the uploads directory under a UUID filename
+    #    (prevents path traversal / enumeration); published by atomic rename.
     ext = (file.filename or "").rsplit(".", 1)[-1].lower() if "." in (file.filename or "") else "bin"
     filename = f"{uuid.uuid4()}.{ext}"
-    (_uploads_dir() / filename).write_bytes(content)
+    final_path = _uploads_dir() / filename
+    tmp_path = final_path.with_name(f".{filename}.part")
+    UPLOAD_BYTES.observe(await _stream_to_disk(file, file.content_type, tmp_path))
+    await run_io(tmp_path.replace, final_path)
+    background_tasks.add_task(run_io, prepare_renditions, filename)
 
     return {"filename": filename, "url": f"/api/uploads/{filename}"}
 
@@ -100,8 +149,9 @@ async def get_image(filename: str) -> FileResponse:
         400: Filename contains path traversal characters.
         404: File not found.
     """
-    # Guard against path traversal (e.g. "../../../etc/passwd")
-    if ".." in filename or "/" in filename:
+    # Guard against path traversal (e.g. "../../../etc/passwd") and against
+    # serving uploads that are still being streamed (".<name>.part")
+    if ".." in filename or "/" in filename or filename.startswith("."):
         raise HTTPException(status_code=400, detail="Invalid filename.")
 
     path = _uploads_dir() / filename
@@ -0,0 +1,222 @@
+"""Full-text search over the questions of every saved paper.
+
+The index is an SQLite FTS5 table in its own database at ``SEARCH_DB_PATH``
+(default ``<DATA_DIR>/search.db``), independent of the storage engine. Each
+question is one row holding its searchable text: the plain text of its
+TipTap content, an MCQ's stem and options, or an image's caption.
+
+Papers are re-indexed after every save or delete (:func:`refresh_paper`,
+which re-reads the stored paper, so out-of-order refreshes still leave the
+latest version indexed) and reconciled with storage at startup and on first
+use (:meth:`SearchIndex.sync`), using the content hashes the storage index
+already keeps. Unchanged papers are never re-indexed.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any
+
+from .hashing import json_content_hash
+from .models import Paper, SearchHit
+from .storage import list_hashes, load_document
+from .tiptap import compile_doc
+
+_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS question_text USING fts5(
+    body,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE TABLE IF NOT EXISTS question_rows (
+    rowid       INTEGER PRIMARY KEY,
+    paper_id    TEXT    NOT NULL,
+    question_id TEXT    NOT NULL,
+    position    INTEGER NOT NULL,
+    type        TEXT    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS question_rows_by_paper ON question_rows (paper_id);
+CREATE TABLE IF NOT EXISTS indexed_papers (
+    paper_id     TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    title        TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+_TOKEN = re.compile(r"\w+")
+
+
+def question_text(question: dict[str, Any]) -> str:
+    """Return the searchable text of a stored question's JSON."""
+    kind = question.get("type")
+    if kind == "mcq":
+        options = " ".join(option.get("text", "") for option in question.get("options", []))
+        return f"{compile_doc(question.get('stem', {})).text(' ')} {options}".strip()
+    if kind == "image":
+        return question.get("caption", "")
+    return compile_doc(question.get("content", {})).text(" ")
+
+
+def match_expression(query: str) -> str | None:
+    """Turn free text into an FTS5 query: every word must match, as a prefix.
+
+    Returns ``None`` when *query* has no words. Quoting each token keeps FTS5
+    operators and punctuation in user input from being interpreted.
+    """
+    tokens = _TOKEN.findall(query.lower())
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+class SearchIndex:
+    """FTS5 index of question text, one database file per data directory."""
+
+    def __init__(self, db_path: Path) -> None:
+        self.db_path = db_path
+        self._local = threading.local()
+        self._sync_lock = threading.Lock()
+        self._synced = False
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        conn: sqlite3.Connection | None = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ── Updates ───────────────────────────────────────────────────────────────
+
+    def index_paper(self, data: dict[str, Any]) -> bool:
+        """Index a stored paper's JSON, replacing its previous rows.
+
+        Returns:
+            Whether anything changed (``False`` when this version is already indexed).
+        """
+        paper_id = data["id"]
+        digest = json_content_hash(data)
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT content_hash FROM indexed_papers WHERE paper_id = ?", (paper_id,)
+        ).fetchone()
+        if row is not None and row[0] == digest:
+            return False
+        title = (data.get("header") or {}).get("title") or "Untitled"
+        with conn:
+            self._delete_rows(conn, paper_id)
+            for position, question in enumerate(data.get("questions", [])):
+                cursor = conn.execute(
+                    "INSERT INTO question_rows (paper_id, question_id, position, type) VALUES (?, ?, ?, ?)",
+                    (paper_id, question.get("id", ""), position, question.get("type", "")),
+                )
+                conn.execute(
+                    "INSERT INTO question_text (rowid, body) VALUES (?, ?)",
+                    (cursor.lastrowid, question_text(question)),
+                )
+            conn.execute(
+                "INSERT OR REPLACE INTO indexed_papers (paper_id, content_hash, title) VALUES (?, ?, ?)",
+                (paper_id, digest, title),
+            )
+        return True
+
+    def remove_paper(self, paper_id: str) -> None:
+        """Drop every row of a paper from the index."""
+        conn = self._connect()
+        with conn:
+            self._delete_rows(conn, paper_id)
+            conn.execute("DELETE FROM indexed_papers WHERE paper_id = ?", (paper_id,))
+
+    def refresh(self, paper_id: str) -> None:
+        """Bring one paper's rows in line with its stored version (or its absence)."""
+        data = load_document("papers", paper_id)
+        if data is None:
+            self.remove_paper(paper_id)
+        else:
+            self.index_paper(data)
+
+    def sync(self) -> int:
+        """Reconcile the index with storage: index new or changed papers, drop deleted ones.
+
+        Returns:
+            Number of papers re-indexed or removed.
+        """
+        with self._sync_lock:
+            stored = list_hashes("papers", Paper)
+            indexed = dict(self._connect().execute("SELECT paper_id, content_hash FROM indexed_papers"))
+            stale = [pid for pid, digest in stored.items() if indexed.get(pid) != digest]
+            stale += [pid for pid in indexed if pid not in stored]
+            for paper_id in stale:
+                self.refresh(paper_id)
+            self._synced = True
+            return len(stale)
+
+    @staticmethod
+    def _delete_rows(conn: sqlite3.Connection, paper_id: str) -> None:
+        conn.execute(
+            "DELETE FROM question_text WHERE rowid IN (SELECT rowid FROM question_rows WHERE paper_id = ?)",
+            (paper_id,),
+        )
+        conn.execute("DELETE FROM question_rows WHERE paper_id = ?", (paper_id,))
+
+    # ── Queries ───────────────────────────────────────────────────────────────
+
+    def search(self, query: str, limit: int = 20) -> list[SearchHit]:
+        """Return the questions best matching *query*, best first (BM25 ranking)."""
+        expression = match_expression(query)
+        if expression is None:
+            return []
+        if not self._synced:
+            self.sync()
+        rows = self._connect().execute(
+            "SELECT r.paper_id, p.title, r.question_id, r.type, r.position,"
+            "       snippet(question_text, 0, '', '', '…', 16), -rank"
+            " FROM question_text"
+            " JOIN question_rows r ON r.rowid = question_text.rowid"
+            " JOIN indexed_papers p ON p.paper_id = r.paper_id"
+            " WHERE question_text MATCH ? ORDER BY rank LIMIT ?",
+            (expression, limit),
+        )
+        return [
+            SearchHit(
+                paper_id=paper_id,
+                paper_title=title,
+                question_id=question_id,
+                question_type=kind,
+                position=position,
+                snippet=snippet,
+                score=score,
+            )
+            for paper_id, title, question_id, kind, position, snippet, score in rows
+        ]
+
+
+# One index per database path, so each data directory has its own.
+_indexes: dict[Path, SearchIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def _db_path() -> Path:
+    data_dir = Path(os.getenv("DATA_DIR", "/data"))
+    return Path(os.getenv("SEARCH_DB_PATH", str(data_dir / "search.db")))
+
+
+def get_index() -> SearchIndex:
+    """Return the search index for the configured data directory."""
+    path = _db_path()
+    with _indexes_lock:
+        index = _indexes.get(path)
+        if index is None:
+            index = _indexes[path] = SearchIndex(path)
+        return index
+
+
+def refresh_paper(paper_id: str) -> None:
+    """Re-index one paper after it was saved or deleted (see :meth:`SearchIndex.refresh`)."""
+    get_index().refresh(paper_id)
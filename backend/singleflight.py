@@ -0,0 +1,71 @@
+"""In-process single-flight: concurrent calls with the same key share one result.
+
+The first caller for a key (the leader) runs the work; callers arriving while
+it runs await the leader's result instead of repeating the work. The shared
+result lives in a :class:`concurrent.futures.Future`, so callers on different
+event loops (or threads) can join the same flight.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, TypeVar
+
+T = TypeVar("T")
+
+
+class _LeaderCancelled(Exception):
+    """Set on a flight whose leader was cancelled; followers then retry."""
+
+
+class SingleFlight:
+    """Coalesces concurrent awaitable calls that share a key."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._flights: dict[str, Future] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def run(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Return ``await fn()``, sharing one call among concurrent callers of *key*.
+
+        Followers receive the leader's result or exception. If the leader is
+        cancelled (e.g. its client disconnected) a follower takes over.
+        """
+        while True:
+            with self._lock:
+                flight = self._flights.get(key)
+                if flight is None:
+                    flight = self._flights[key] = Future()
+                    self.leaders += 1
+                    leader = True
+                else:
+                    self.coalesced += 1
+                    leader = False
+
+            if not leader:
+                try:
+                    # Shielded: a cancelled follower must not cancel the shared future
+                    return await asyncio.shield(asyncio.wrap_future(flight))
+                except _LeaderCancelled:
+                    continue
+
+            try:
+                result = await fn()
+            except asyncio.CancelledError:
+                flight.set_exception(_LeaderCancelled())
+                raise
+            except BaseException as exc:
+                flight.set_exception(exc)
+                raise
+            else:
+                flight.set_result(result)
+                return result
+            finally:
+                with self._lock:
+                    self._flights.pop(key, None)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {"in_flight": len(self._flights), "leaders": self.leaders, "coalesced": self.coalesced}
@@ -0,0 +1,641 @@
+"""Storage for papers and templates behind a pluggable engine.
+
+The engine is chosen with the ``STORAGE_BACKEND`` env var (read at call time,
+next to ``DATA_DIR``):
+
+- ``files`` (default) — one JSON file per item, see :mod:`.files`
+- ``sqlite`` — a single WAL-mode database at ``SQLITE_PATH``
+  (default ``<DATA_DIR>/exam-builder.db``), see :mod:`.sqlite`
+
+Existing ``papers/`` and ``templates/`` directories can be imported into the
+SQLite engine with ``python -m backend.storage.migrate``.
+
+With ``STORAGE_WRITE_BEHIND_MS`` set, writes are buffered for that many
+milliseconds and repeated saves of one item coalesced into a single write
+(see :mod:`.writebehind`); :func:`flush` writes the buffer out on shutdown.
+
+:func:`list_page` answers sorted, filtered listings one page at a time with
+opaque keyset cursors, from the file index's sorted views or SQLite's indexes.
+
+:func:`load_item` serves unchanged items from a bounded LRU of validated
+models (``STORAGE_CACHE_MB``, default 32; ``0`` disables it), see
+:mod:`.cache` and :func:`cache_stats`.
+
+Papers and templates store each question once, in a content-addressed bank
+shared by all items (see :mod:`.bank`); set ``QUESTION_BANK=0`` to store
+questions inline instead. Either way every function here takes and returns
+items with their full questions.
+
+Every stored item's summary also records its ``content_hash`` (see
+:mod:`backend.hashing`), which lets :func:`save_item` skip writes that would
+not change anything and enforce ``If-Match``-style preconditions, and lets
+:func:`item_hash` answer conditional GETs without reading the item.
+
+Every facade call's latency and the bytes it writes are recorded in
+:mod:`backend.metrics`.
+
+Routers use the ``a*`` coroutine variants, which run the same calls on the
+bounded storage I/O pool (see :mod:`backend.concurrency`) so disk and database
+access never blocks the event loop.
+"""
+
+import base64
+import functools
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any, Callable, Generic, TypeVar, Type, cast
+
+from pydantic import BaseModel
+
+from ..concurrency import run_io
+from ..hashing import content_hash, json_content_hash
+from ..metrics import STORAGE_BYTES_WRITTEN, STORAGE_SECONDS
+from .bank import COLLAPSED, QuestionBank, has_refs
+from .base import InvalidCursor, ListQuery, PreconditionFailed, StorageBackend, Summariser
+from .cache import ModelCache
+from .files import FileBackend
+from .sqlite import SQLiteBackend
+from .writebehind import WriteBehindBackend
+
+T = TypeVar("T", bound=BaseModel)
+S = TypeVar("S", bound=BaseModel)
+F = TypeVar("F", bound=Callable[..., Any])
+
+BACKENDS = ("files", "sqlite")
+
+# One engine instance per (kind, location), so per-engine caches survive across requests.
+_backends: dict[tuple[str, Path], StorageBackend] = {}
+
+_MB = 1024 * 1024
+
+_model_cache: ModelCache | None = None
+
+# The question bank of each engine instance in _backends (or opened by a tool).
+_banks: dict[StorageBackend, QuestionBank] = {}
+_banks_lock = threading.Lock()
+
+# Striped per-item locks serialising read-modify-write cycles within this process
+_ITEM_LOCKS = tuple(threading.Lock() for _ in range(64))
+
+
+def _item_lock(directory: str, item_id: str) -> threading.Lock:
+    return _ITEM_LOCKS[hash((directory, item_id)) % len(_ITEM_LOCKS)]
+
+
+def _timed(operation: str) -> Callable[[F], F]:
+    """Record a facade call's latency as storage *operation* on its directory."""
+
+    def decorate(fn: F) -> F:
+        @functools.wraps(fn)
+        def timed(directory: str, *args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return fn(directory, *args, **kwargs)
+            finally:
+                STORAGE_SECONDS.observe(time.perf_counter() - start, operation, directory)
+
+        return cast(F, timed)
+
+    return decorate
+
+
+@dataclass(frozen=True)
+class SaveResult:
+    """Outcome of :func:`save_item`."""
+
+    written: bool  # False when the stored item already had this content
+    content_hash: str
+    summary: dict[str, Any]  # summary of the item as now stored
+
+
+@dataclass(frozen=True)
+class DocumentUpdate:
+    """Outcome of :func:`update_document`."""
+
+    data: dict[str, Any]  # the item's JSON after the update
+    content_hash: str  # of *data*, i.e. the item's ETag digest
+    written: bool
+
+
+@dataclass(frozen=True)
+class Page(Generic[S]):
+    """One page of :func:`list_page`."""
+
+    items: list[S]
+    next_cursor: str | None  # pass back to get the following page; None on the last one
+
+
+def data_dir() -> Path:
+    """Return the configured data directory (reads DATA_DIR env var at call time)."""
+    return Path(os.getenv("DATA_DIR", "/data"))
+
+
+def sqlite_path() -> Path:
+    """Return the configured SQLite database path (``SQLITE_PATH``, default under :func:`data_dir`)."""
+    return Path(os.getenv("SQLITE_PATH", str(data_dir() / "exam-builder.db")))
+
+
+def get_backend() -> StorageBackend:
+    """Return the storage engine selected by ``STORAGE_BACKEND``.
+
+    Raises:
+        ValueError: ``STORAGE_BACKEND`` names an unknown engine.
+    """
+    kind = os.getenv("STORAGE_BACKEND", "files")
+    if kind == "files":
+        key = (kind, data_dir())
+    elif kind == "sqlite":
+        key = (kind, sqlite_path())
+    else:
+        raise ValueError(f"Unknown STORAGE_BACKEND {kind!r}; expected one of {BACKENDS}.")
+    backend = _backends.get(key)
+    if backend is None:
+        backend = FileBackend(key[1]) if kind == "files" else SQLiteBackend(key[1])
+        window_ms = int(os.getenv("STORAGE_WRITE_BEHIND_MS") or 0)
+        if window_ms > 0:
+            backend = WriteBehindBackend(backend, window_ms / 1000)
+        _backends[key] = backend
+    return backend
+
+
+def get_model_cache() -> ModelCache:
+    """Return the process-wide cache of validated models used by :func:`load_item`."""
+    global _model_cache
+    if _model_cache is None:
+        _model_cache = ModelCache(int(float(os.getenv("STORAGE_CACHE_MB", "32")) * _MB))
+    return _model_cache
+
+
+def get_bank(backend: StorageBackend) -> QuestionBank:
+    """Return the question bank stored in *backend*."""
+    with _banks_lock:
+        bank = _banks.get(backend)
+        if bank is None:
+            bank = _banks[backend] = QuestionBank(backend)
+        return bank
+
+
+def cache_stats() -> dict[str, int]:
+    """Return the model cache's counters: entries, bytes, hits, misses and evictions."""
+    return get_model_cache().stats()
+
+
+def bank_stats() -> dict[str, int]:
+    """Return the question bank's counters: cached entries, entries written and reused."""
+    return get_bank(get_backend()).stats()
+
+
+def flush() -> None:
+    """Write out every buffered write-behind save (called on app shutdown)."""
+    for backend in list(_backends.values()):
+        if isinstance(backend, WriteBehindBackend):
+            backend.flush()
+
+
+@_timed("write")
+def save_item(
+    directory: str,
+    item_id: str,
+    data: BaseModel,
+    *,
+    precondition: Callable[[str | None], bool] | None = None,
+    skip_unchanged: bool = False,
+) -> SaveResult:
+    """Serialise a Pydantic model to JSON and store it.
+
+    The directory's listing index is updated in the same call.
+
+    Args:
+        directory: Subdirectory name ("papers", "templates").
+        item_id: Unique identifier of the item.
+        data: Pydantic model instance to persist.
+        precondition: Called with the stored item's content hash (``None``
+            if it does not exist); the save is refused unless it returns True.
+        skip_unchanged: Do not write when the stored item already has the
+            same content hash (timestamps and id are not part of the hash).
+
+    Raises:
+        PreconditionFailed: *precondition* returned False.
+    """
+    new_hash = content_hash(data)
+    with _item_lock(directory, item_id):
+        backend = get_backend()
+        if precondition is not None or skip_unchanged:
+            stored = backend.summary(directory, item_id, summariser(backend, type(data)))
+            current = None if stored is None else _stored_hash(backend, directory, item_id, stored)
+            if precondition is not None and not precondition(current):
+                raise PreconditionFailed(current)
+            if skip_unchanged and current == new_hash:
+                return SaveResult(False, new_hash, stored)
+        summary = _summarise(data, new_hash)
+        payload = _payload(backend, directory, data)
+        backend.write(directory, item_id, payload, summary)
+        STORAGE_BYTES_WRITTEN.inc(directory, amount=len(payload.encode()))
+        get_model_cache().invalidate((directory, item_id))
+    return SaveResult(True, new_hash, summary)
+
+
+@_timed("read")
+def load_item(directory: str, item_id: str, model: Type[T]) -> T | None:
+    """Load and deserialise a single item.
+
+    Args:
+        directory: Subdirectory name.
+        item_id: Identifier to look up.
+        model: Pydantic model class to validate against.
+
+    Returns:
+        Validated model instance, or ``None`` if the item does not exist.
+        Safe to modify: cached instances are never handed out directly.
+    """
+    backend = get_backend()
+    cache = get_model_cache()
+    key = (directory, item_id)
+    # Stamp before reading, so a concurrent rewrite can only cause a later miss
+    stamp = backend.stamp(directory, item_id)
+    if stamp is None:
+        return None
+    cached = cache.get(key, stamp, model)
+    if cached is not None:
+        return cached
+    payload = backend.read(directory, item_id)
+    if payload is None:
+        return None
+    item, size = _validate(backend, model, payload)
+    cache.put(key, stamp, item, size)
+    return item
+
+
+def item_hash(directory: str, item_id: str, model: Type[BaseModel]) -> str | None:
+    """Return the content hash of a stored item, or ``None`` if it does not exist.
+
+    Served from the listing index when it is current, without reading the item.
+    """
+    backend = get_backend()
+    stored = backend.summary(directory, item_id, summariser(backend, model))
+    return None if stored is None else _stored_hash(backend, directory, item_id, stored)
+
+
+def list_hashes(directory: str, model: Type[BaseModel]) -> dict[str, str]:
+    """Return the content hash of every stored item, by id, from the listing index."""
+    backend = get_backend()
+    hashes = {}
+    for summary in backend.summaries(directory, summariser(backend, model)):
+        digest = _stored_hash(backend, directory, summary["id"], summary)
+        if digest is not None:
+            hashes[summary["id"]] = digest
+    return hashes
+
+
+@_timed("read")
+def load_document(directory: str, item_id: str) -> dict[str, Any] | None:
+    """Load one item as plain JSON, without model validation.
+
+    Returns:
+        The item's JSON object, or ``None`` if the item does not exist.
+    """
+    backend = get_backend()
+    payload = backend.read(directory, item_id)
+    return None if payload is None else _document(backend, payload)
+
+
+@_timed("write")
+def update_document(
+    directory: str,
+    item_id: str,
+    mutate: Callable[[dict[str, Any]], bool],
+    summarise: Callable[[dict[str, Any]], BaseModel],
+    *,
+    precondition: Callable[[str], bool] | None = None,
+    skip_unchanged: bool = False,
+) -> DocumentUpdate | None:
+    """Read-modify-write one item as plain JSON, without validating the whole model.
+
+    Used for edits that touch a small part of a large item (one question of
+    a paper): the caller validates just the part it changes. The item is
+    still read, hashed and written whole. The cycle holds the item's lock,
+    so concurrent updates of the same item in this process do not
+    overwrite each other.
+
+    Args:
+        directory: Subdirectory name.
+        item_id: Identifier of the item.
+        mutate: Edits the item's JSON in place and returns whether it changed;
+            the item is only written if it did. Exceptions propagate and
+            nothing is written.
+        summarise: Builds the listing summary from the updated JSON.
+        precondition: Called with the stored item's content hash before
+            *mutate*; the update is refused unless it returns True.
+        skip_unchanged: Do not write when *mutate* left the content hash
+            as it was (it only touched the id or timestamps).
+
+    Returns:
+        The update, or ``None`` if the item does not exist.
+
+    Raises:
+        PreconditionFailed: *precondition* returned False.
+    """
+    with _item_lock(directory, item_id):
+        backend = get_backend()
+        payload = backend.read(directory, item_id)
+        if payload is None:
+            return None
+        data = _document(backend, payload)
+        current = None
+        if precondition is not None or skip_unchanged:
+            current = json_content_hash(data)
+            if precondition is not None and not precondition(current):
+                raise PreconditionFailed(current)
+        if not mutate(data):
+            return DocumentUpdate(data, json_content_hash(data) if current is None else current, False)
+        new_hash = json_content_hash(data)
+        if skip_unchanged and new_hash == current:
+            return DocumentUpdate(data, new_hash, False)
+        stored = get_bank(backend).collapse(data) if _collapses(directory) else data
+        summary = {**summarise(data).model_dump(), "content_hash": new_hash}
+        payload = _dumps(stored)
+        backend.write(directory, item_id, payload, summary)
+        STORAGE_BYTES_WRITTEN.inc(directory, amount=len(payload.encode()))
+        get_model_cache().invalidate((directory, item_id))
+        return DocumentUpdate(data, new_hash, True)
+
+
+@_timed("list")
+def list_items(directory: str, model: Type[T]) -> list[T]:
+    """Return all valid items from a storage directory, newest first.
+
+    Silently skips items that fail validation (e.g. corrupt JSON). This reads
+    every item in full; prefer :func:`list_summaries` for listings.
+
+    Args:
+        directory: Subdirectory name.
+        model: Pydantic model class to validate against.
+
+    Returns:
+        List of validated model instances, most recently written first.
+    """
+    items: list[T] = []
+    backend = get_backend()
+    for payload in backend.read_all(directory):
+        try:
+            items.append(_validate(backend, model, payload)[0])
+        except Exception:  # noqa: BLE001 — skip corrupt files gracefully
+            pass
+    return items
+
+
+@_timed("list")
+def list_summaries(
+    directory: str,
+    model: Type[T],
+    summary_model: Type[S],
+    *,
+    limit: int | None = None,
+    offset: int = 0,
+) -> list[S]:
+    """Return the summary of every item in a storage directory, newest first.
+
+    Served from the engine's listing index, so the cost is one small record
+    per item regardless of how large the items themselves are.
+
+    Args:
+        directory: Subdirectory name.
+        model: Full model class, used only if the index has to be rebuilt.
+        summary_model: Model class returned by ``model.summary()``.
+        limit: Maximum number of summaries to return (all when ``None``).
+        offset: Number of summaries to skip from the start.
+
+    Returns:
+        List of summaries, most recently written first.
+    """
+    backend = get_backend()
+    entries = backend.summaries(directory, summariser(backend, model), limit=limit, offset=offset)
+    return [summary_model.model_validate(entry) for entry in entries]
+
+
+@_timed("list")
+def list_page(
+    directory: str,
+    model: Type[T],
+    summary_model: Type[S],
+    query: ListQuery,
+    cursor: str | None = None,
+) -> Page[S]:
+    """Return one page of a sorted, filtered listing.
+
+    Args:
+        directory: Subdirectory name.
+        model: Full model class, used only if the index has to be rebuilt.
+        summary_model: Model class returned by ``model.summary()``.
+        query: Sort order, filters and page size (its ``after`` is ignored).
+        cursor: ``next_cursor`` of the previous page, or ``None`` for the first.
+
+    Raises:
+        InvalidCursor: *cursor* is malformed or was issued for a different
+            sort order or filter.
+    """
+    query = replace(query, after=None if cursor is None else _decode_cursor(cursor, query))
+    backend = get_backend()
+    rows = backend.query(directory, summariser(backend, model), replace(query, limit=query.limit + 1))
+    page = rows[: query.limit]
+    next_cursor = _encode_cursor(query.key(page[-1]), query) if len(rows) > query.limit else None
+    return Page([summary_model.model_validate(row) for row in page], next_cursor)
+
+
+@_timed("delete")
+def delete_item(directory: str, item_id: str) -> bool:
+    """Delete a stored item.
+
+    Args:
+        directory: Subdirectory name.
+        item_id: Identifier to delete.
+
+    Returns:
+        ``True`` if the item was deleted, ``False`` if it did not exist.
+    """
+    with _item_lock(directory, item_id):
+        get_model_cache().invalidate((directory, item_id))
+        return get_backend().delete(directory, item_id)
+
+
+def rebuild_index(directory: str, model: Type[BaseModel]) -> None:
+    """Bring the listing index of a storage directory up to date.
+
+    For the file engine this reconciles the summary index with the files on
+    disk (new, changed and deleted files); called at startup.
+
+    Args:
+        directory: Subdirectory name.
+        model: Model class the directory's items are validated against.
+    """
+    backend = get_backend()
+    backend.reindex(directory, summariser(backend, model))
+
+
+# ── Async variants (run on the storage I/O pool) ─────────────────────────────
+
+
+async def asave_item(
+    directory: str,
+    item_id: str,
+    data: BaseModel,
+    *,
+    precondition: Callable[[str | None], bool] | None = None,
+    skip_unchanged: bool = False,
+) -> SaveResult:
+    """Coroutine form of :func:`save_item`."""
+    return await run_io(
+        save_item, directory, item_id, data, precondition=precondition, skip_unchanged=skip_unchanged
+    )
+
+
+async def aitem_hash(directory: str, item_id: str, model: Type[BaseModel]) -> str | None:
+    """Coroutine form of :func:`item_hash`."""
+    return await run_io(item_hash, directory, item_id, model)
+
+
+async def aload_item(directory: str, item_id: str, model: Type[T]) -> T | None:
+    """Coroutine form of :func:`load_item`."""
+    return await run_io(load_item, directory, item_id, model)
+
+
+async def aload_document(directory: str, item_id: str) -> dict[str, Any] | None:
+    """Coroutine form of :func:`load_document`."""
+    return await run_io(load_document, directory, item_id)
+
+
+async def aupdate_document(
+    directory: str,
+    item_id: str,
+    mutate: Callable[[dict[str, Any]], bool],
+    summarise: Callable[[dict[str, Any]], BaseModel],
+    *,
+    precondition: Callable[[str], bool] | None = None,
+    skip_unchanged: bool = False,
+) -> DocumentUpdate | None:
+    """Coroutine form of :func:`update_document`."""
+    return await run_io(
+        update_document, directory, item_id, mutate, summarise,
+        precondition=precondition, skip_unchanged=skip_unchanged,
+    )
+
+
+async def alist_summaries(
+    directory: str,
+    model: Type[T],
+    summary_model: Type[S],
+    *,
+    limit: int | None = None,
+    offset: int = 0,
+) -> list[S]:
+    """Coroutine form of :func:`list_summaries`."""
+    return await run_io(
+        list_summaries, directory, model, summary_model, limit=limit, offset=offset
+    )
+
+
+async def alist_page(
+    directory: str,
+    model: Type[T],
+    summary_model: Type[S],
+    query: ListQuery,
+    cursor: str | None = None,
+) -> Page[S]:
+    """Coroutine form of :func:`list_page`."""
+    return await run_io(list_page, directory, model, summary_model, query, cursor)
+
+
+async def adelete_item(directory: str, item_id: str) -> bool:
+    """Coroutine form of :func:`delete_item`."""
+    return await run_io(delete_item, directory, item_id)
+
+
+def _query_fingerprint(query: ListQuery) -> str:
+    """Identify everything about *query* but its position and page size."""
+    shape = [query.sort, query.descending, query.subject, query.since, query.until]
+    return hashlib.sha256(json.dumps(shape).encode()).hexdigest()[:12]
+
+
+def _encode_cursor(after: tuple[str, str], query: ListQuery) -> str:
+    raw = json.dumps([*after, _query_fingerprint(query)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, query: ListQuery) -> tuple[str, str]:
+    try:
+        value, item_id, fingerprint = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError) as exc:  # also binascii.Error and UnicodeDecodeError
+        raise InvalidCursor("Malformed cursor.") from exc
+    if fingerprint != _query_fingerprint(query) or not isinstance(value, str) or not isinstance(item_id, str):
+        raise InvalidCursor("Cursor does not belong to this query.")
+    return value, item_id
+
+
+def _summarise(data: BaseModel, digest: str | None = None) -> dict[str, Any]:
+    """Return the index summary of a model: its ``summary()`` (if any) plus its content hash."""
+    summary = getattr(data, "summary", None)
+    result = summary().model_dump() if callable(summary) else {}
+    result["content_hash"] = digest or content_hash(data)
+    return result
+
+
+def summariser(backend: StorageBackend, model: Type[BaseModel]) -> Summariser:
+    """Return the engine summariser for *model*: a stored payload to its index summary."""
+    return lambda payload: _summarise(_validate(backend, model, payload)[0])
+
+
+def _stored_hash(backend: StorageBackend, directory: str, item_id: str, summary: dict[str, Any]) -> str | None:
+    """Return the content hash recorded in *summary*, computing it for older entries."""
+    digest = summary.get("content_hash")
+    if digest is None:
+        payload = backend.read(directory, item_id)
+        digest = None if payload is None else json_content_hash(_document(backend, payload))
+    return digest
+
+
+# ── Question bank plumbing ───────────────────────────────────────────────────
+
+
+def _collapses(directory: str) -> bool:
+    """Return whether items of *directory* are written with their questions in the bank."""
+    return directory in COLLAPSED and os.getenv("QUESTION_BANK", "1") != "0"
+
+
+def _dumps(data: dict[str, Any]) -> str:
+    # Same compact form as model_dump_json()
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def _payload(backend: StorageBackend, directory: str, data: BaseModel) -> str:
+    """Serialise a model for storage, moving its questions into the bank if enabled."""
+    if not _collapses(directory):
+        return data.model_dump_json()
+    return _dumps(get_bank(backend).collapse(data.model_dump(mode="json")))
+
+
+def _document(backend: StorageBackend, payload: str) -> dict[str, Any]:
+    """Parse a stored payload into the item's full JSON."""
+    data = json.loads(payload)
+    return get_bank(backend).expand(data) if has_refs(payload) else data
+
+
+def _validate(backend: StorageBackend, model: Type[T], payload: str) -> tuple[T, int]:
+    """Validate a stored payload; return the model and the size of the JSON it was built from.
+
+    Questions stored in the bank come from its cache of validated models, so
+    only the item's own fields are validated here.
+    """
+    if not has_refs(payload):
+        return model.model_validate_json(payload), len(payload)
+    data = json.loads(payload)
+    questions = data.pop("questions", None)
+    if questions is None:  # "$ref" was only quoted in some text
+        return model.model_validate(data), len(payload)
+    item = model.model_validate(data)
+    item.questions, size = get_bank(backend).models(questions)
+    return item, len(payload) + size
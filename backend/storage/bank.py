@@ -0,0 +1,301 @@
+"""Content-addressed question bank shared by all papers and templates.
+
+A stored paper or template keeps each question as a reference
+``{"$ref": "<key>", "id": "<question id>"}``. The question itself is stored
+once, in the ``questions`` storage directory under *key*: the SHA-256 of its
+canonical JSON without ``id`` (see :func:`question_key`). A question copied
+into dozens of papers is therefore written, read and validated once, and
+because the export fragment cache is keyed by the same content, it is also
+rendered once.
+
+The facade collapses questions into references on every write and expands
+them on every read, so callers only ever see full questions. Items written
+before the bank existed keep their inline questions and load unchanged.
+
+Bank entries are immutable; edits create new entries and leave the old ones
+unreferenced. While the server runs, writes start a background
+:meth:`~QuestionBank.sweep` at most once per ``BANK_SWEEP_INTERVAL`` seconds
+(default 3600; ``0`` disables it). It only deletes orphans last written
+more than ``BANK_SWEEP_GRACE`` seconds (default 3600). A save that reuses an
+entry older than half the grace period rewrites it first, so an entry a save
+is about to reference is never old enough to go. ``python -m
+backend.storage.bank`` sweeps immediately, with no grace period; run it only
+while the server is stopped.
+"""
+
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Iterable
+
+from pydantic import TypeAdapter
+
+from ..hashing import json_content_hash
+from ..metrics import STORAGE_BYTES_WRITTEN
+from ..models import Question
+from .base import StorageBackend
+from .cache import detach, detach_json
+
+BANK = "questions"  # storage directory holding the bank entries
+REF = "$ref"
+# Directories whose items hold questions that are collapsed into the bank.
+COLLAPSED = ("papers", "templates")
+
+_question = TypeAdapter(Question)
+
+logger = logging.getLogger(__name__)
+
+
+def _sweep_interval() -> float:
+    return float(os.getenv("BANK_SWEEP_INTERVAL", "3600"))
+
+
+def _sweep_grace() -> float:
+    return float(os.getenv("BANK_SWEEP_GRACE", "3600"))
+
+
+class MissingQuestion(LookupError):
+    """Raised when an item references a bank entry that does not exist."""
+
+
+def question_key(question: dict[str, Any]) -> str:
+    """Return the bank key of a question's JSON: its content hash without ``id``."""
+    return json_content_hash(question, exclude=frozenset({"id"}))
+
+
+def has_refs(payload: str) -> bool:
+    """Cheap test for whether a stored payload contains any bank reference."""
+    return f'"{REF}"' in payload
+
+
+class QuestionBank:
+    """Reads and writes the bank entries of one storage engine, with LRU caches.
+
+    Two caches are kept, both safe to share because entries never change: the
+    raw JSON of recently used entries, and their validated ``Question``
+    models (handed out as detached copies, see :func:`.cache.detach`).
+    """
+
+    def __init__(self, backend: StorageBackend, max_entries: int = 4096) -> None:
+        self.backend = backend
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._raw: OrderedDict[str, tuple[dict[str, Any], int]] = OrderedDict()
+        self._models: OrderedDict[str, tuple[Any, int]] = OrderedDict()
+        self._fresh: dict[str, float] = {}  # key → monotonic time its write was last known recent
+        self._writes = 0
+        self._reuses = 0
+        self._last_sweep = time.monotonic()
+        self._sweeping = False
+
+    # ── Collapse (write path) ─────────────────────────────────────────────────
+
+    def collapse(self, data: dict[str, Any]) -> dict[str, Any]:
+        """Return a copy of an item's JSON with its questions replaced by references.
+
+        Bank entries that do not exist yet are written first, so a stored
+        reference never points at a missing entry.
+        """
+        questions = data.get("questions")
+        if not isinstance(questions, list):
+            return data
+        refs = []
+        for question in questions:
+            if REF in question:
+                refs.append(question)
+                continue
+            key = question_key(question)
+            self._ensure(key, question)
+            refs.append({REF: key, "id": question.get("id", "")})
+        self.schedule_sweep()
+        return {**data, "questions": refs}
+
+    def _ensure(self, key: str, question: dict[str, Any]) -> None:
+        """Make sure entry *key* exists and is too recent for a sweep to delete."""
+        refresh = _sweep_grace() / 2
+        now = time.monotonic()
+        with self._lock:
+            fresh = now - self._fresh.get(key, float("-inf")) < refresh
+        if not fresh:
+            modified = self.backend.modified_ns(BANK, key)
+            if modified is not None:
+                age = (time.time_ns() - modified) / 1e9
+                fresh = age < refresh
+                if fresh:
+                    with self._lock:
+                        self._fresh[key] = now - max(age, 0.0)
+        if fresh:
+            with self._lock:
+                self._reuses += 1
+            return
+        # Missing, or old enough that a sweep may soon delete it: (re)write it
+        entry = {k: v for k, v in question.items() if k != "id"}
+        payload = json.dumps(entry, ensure_ascii=False, separators=(",", ":"))
+        self.backend.write(BANK, key, payload, {})
+        STORAGE_BYTES_WRITTEN.inc(BANK, amount=len(payload.encode()))
+        with self._lock:
+            self._writes += 1
+            self._fresh[key] = now
+        self._remember(self._raw, key, (entry, len(payload)))
+
+    # ── Expand (read path) ────────────────────────────────────────────────────
+
+    def expand(self, data: dict[str, Any]) -> dict[str, Any]:
+        """Replace the references in an item's JSON, in place, by full questions.
+
+        Raises:
+            MissingQuestion: A referenced entry is not in the bank.
+        """
+        questions = data.get("questions")
+        if isinstance(questions, list):
+            data["questions"] = [
+                {**detach_json(self._entry(q[REF])[0]), "id": q.get("id", "")} if REF in q else q
+                for q in questions
+            ]
+        return data
+
+    def models(self, questions: Iterable[dict[str, Any]]) -> tuple[list[Any], int]:
+        """Return validated ``Question`` models for stored questions (references or inline).
+
+        Each bank entry is validated once and then served from cache.
+
+        Returns:
+            The models, and the size of their stored JSON (for cache accounting).
+
+        Raises:
+            MissingQuestion: A referenced entry is not in the bank.
+            pydantic.ValidationError: An inline question is invalid.
+        """
+        result, size = [], 0
+        for question in questions:
+            if REF not in question:
+                result.append(_question.validate_python(question))
+                continue
+            key = question[REF]
+            with self._lock:
+                cached = self._models.get(key)
+                if cached is not None:
+                    self._models.move_to_end(key)
+            if cached is None:
+                entry, length = self._entry(key)
+                cached = (_question.validate_python({**entry, "id": ""}), length)
+                self._remember(self._models, key, cached)
+            model = detach(cached[0])
+            model.id = question.get("id", "")
+            result.append(model)
+            size += cached[1]
+        return result, size
+
+    def _entry(self, key: str) -> tuple[dict[str, Any], int]:
+        with self._lock:
+            cached = self._raw.get(key)
+            if cached is not None:
+                self._raw.move_to_end(key)
+                return cached
+        payload = self.backend.read(BANK, key)
+        if payload is None:
+            raise MissingQuestion(f"Question {key} is missing from the bank.")
+        cached = (json.loads(payload), len(payload))
+        self._remember(self._raw, key, cached)
+        return cached
+
+    def _remember(self, cache: OrderedDict, key: str, value: Any) -> None:
+        with self._lock:
+            cache[key] = value
+            cache.move_to_end(key)
+            while len(cache) > self.max_entries:
+                cache.popitem(last=False)
+
+    # ── Maintenance ───────────────────────────────────────────────────────────
+
+    def referenced_keys(self) -> set[str]:
+        """Return every bank key referenced by a stored paper or template."""
+        keys: set[str] = set()
+        for directory in COLLAPSED:
+            for payload in self.backend.read_all(directory):
+                if not has_refs(payload):
+                    continue
+                try:
+                    questions = json.loads(payload).get("questions", [])
+                except ValueError:
+                    continue
+                keys.update(q[REF] for q in questions if isinstance(q, dict) and REF in q)
+        return keys
+
+    def sweep(self, grace: float = 0.0) -> int:
+        """Delete the bank entries no stored item references.
+
+        Args:
+            grace: Keep orphans written less than this many seconds ago.
+                With a grace period the sweep is safe while saves run: a save
+                refreshes any entry it reuses that is older than ``grace / 2``
+                (see :meth:`_ensure`), and the sweep stops once ``grace / 2``
+                has passed since it listed the references, so it never
+                deletes an entry that a save it did not see has just reused.
+
+        Returns:
+            Number of entries deleted.
+        """
+        started = time.monotonic()
+        referenced = self.referenced_keys()
+        deleted = 0
+        for key in self.backend.ids(BANK):
+            if key in referenced:
+                continue
+            if grace:
+                if time.monotonic() - started >= grace / 2:
+                    break
+                modified = self.backend.modified_ns(BANK, key)
+                if modified is None or time.time_ns() - modified < grace * 1e9:
+                    continue
+            if self.backend.delete(BANK, key):
+                deleted += 1
+        with self._lock:
+            self._raw.clear()
+            self._models.clear()
+            self._fresh.clear()
+        return deleted
+
+    def schedule_sweep(self) -> None:
+        """Start a background :meth:`sweep` if ``BANK_SWEEP_INTERVAL`` has passed since the last."""
+        interval = _sweep_interval()
+        if interval <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if self._sweeping or now - self._last_sweep < interval:
+                return
+            self._sweeping = True
+            self._last_sweep = now
+        threading.Thread(target=self._sweep_in_background, name="question-bank-sweep", daemon=True).start()
+
+    def _sweep_in_background(self) -> None:
+        try:
+            deleted = self.sweep(_sweep_grace())
+            logger.info("question bank sweep deleted %d unreferenced entries", deleted)
+        except Exception:  # noqa: BLE001 — the next interval retries
+            logger.exception("question bank sweep failed")
+        finally:
+            with self._lock:
+                self._sweeping = False
+
+    def stats(self) -> dict[str, int]:
+        """Return counters: ``cached`` entries, entries ``written`` and ``reused``."""
+        with self._lock:
+            return {"cached": len(self._raw) + len(self._models), "written": self._writes, "reused": self._reuses}
+
+
+def main(argv: list[str] | None = None) -> None:
+    from . import get_backend, get_bank
+
+    parser = argparse.ArgumentParser(description="Delete unreferenced question-bank entries.")
+    parser.parse_args(argv)
+    print(f"{get_bank(get_backend()).sweep()} unreferenced questions deleted")
+
+
+if __name__ == "__main__":
+    main()
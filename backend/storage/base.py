@@ -0,0 +1,142 @@
+"""Interface shared by the storage engines.
+
+Engines deal only in serialised JSON payloads and plain summary dicts; model
+validation stays in the :mod:`backend.storage` facade so every engine behaves
+identically towards the routers.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable, Iterator, Protocol
+
+# Turns a stored JSON payload into its summary dict (raises if the payload is invalid).
+Summariser = Callable[[str], dict[str, Any]]
+
+
+class PreconditionFailed(Exception):
+    """Raised by ``save_item`` when its precondition rejects the stored version.
+
+    Defined here rather than in the facade so it survives reloads of
+    :mod:`backend.storage`.
+    """
+
+    def __init__(self, current_hash: str | None) -> None:
+        super().__init__("The stored item does not match the precondition.")
+        self.current_hash = current_hash
+
+
+class InvalidCursor(ValueError):
+    """Raised for a listing cursor that is malformed or belongs to another query."""
+
+
+# Summary fields listings can be sorted on, by their engine-level name.
+SORT_FIELDS = ("sort_ts", "title", "subject")
+
+
+def summary_columns(summary: dict[str, Any]) -> tuple[str, str, str]:
+    """Return the indexed ``(title, subject, sort_ts)`` columns for a summary.
+
+    Papers expose ``title``/``updated_at``; templates expose ``name``/``created_at``.
+    """
+    title = summary.get("title", summary.get("name", ""))
+    sort_ts = summary.get("updated_at", summary.get("created_at", ""))
+    return title, summary.get("subject", ""), sort_ts
+
+
+@dataclass(frozen=True)
+class ListQuery:
+    """One page of a sorted, filtered listing.
+
+    Pages are addressed by keyset: *after* is the ``(sort value, id)`` of the
+    last item of the previous page, and ``id`` breaks ties, so a page never
+    skips or repeats items when others are inserted before it.
+    """
+
+    sort: str = "sort_ts"  # one of SORT_FIELDS
+    descending: bool = True
+    limit: int = 50
+    after: tuple[str, str] | None = None
+    subject: str | None = None
+    since: str | None = None  # inclusive lower bound on sort_ts
+    until: str | None = None  # exclusive upper bound on sort_ts
+
+    def key(self, summary: dict[str, Any]) -> tuple[str, str]:
+        """Return the keyset position ``(sort value, id)`` of a summary."""
+        title, subject, sort_ts = summary_columns(summary)
+        value = {"sort_ts": sort_ts, "title": title, "subject": subject}[self.sort]
+        return value, summary.get("id", "")
+
+    def matches(self, summary: dict[str, Any]) -> bool:
+        """Return whether a summary passes the filters and lies past *after*."""
+        _, subject, sort_ts = summary_columns(summary)
+        if self.subject is not None and subject != self.subject:
+            return False
+        if self.since is not None and sort_ts < self.since:
+            return False
+        if self.until is not None and sort_ts >= self.until:
+            return False
+        if self.after is not None:
+            key = self.key(summary)
+            return key < self.after if self.descending else key > self.after
+        return True
+
+
+class StorageBackend(Protocol):
+    """A place to keep papers and templates, one namespace per directory name."""
+
+    def write(self, directory: str, item_id: str, payload: str, summary: dict[str, Any]) -> None:
+        """Store *payload* under *item_id*, replacing any previous version."""
+        ...
+
+    def read(self, directory: str, item_id: str) -> str | None:
+        """Return the stored payload, or ``None`` if the item does not exist."""
+        ...
+
+    def stamp(self, directory: str, item_id: str) -> Hashable | None:
+        """Return a cheap version marker that changes whenever the item is rewritten.
+
+        ``None`` if the item does not exist. Used to validate cached reads.
+        The marker is opaque: compare it for equality, nothing else.
+        """
+        ...
+
+    def modified_ns(self, directory: str, item_id: str) -> int | None:
+        """Return when the item was last written, in ``time.time_ns()`` units.
+
+        ``None`` if the item does not exist.
+        """
+        ...
+
+    def read_all(self, directory: str) -> Iterator[str]:
+        """Yield every stored payload, most recently written first."""
+        ...
+
+    def ids(self, directory: str) -> list[str]:
+        """Return the ids of every stored item, in no particular order."""
+        ...
+
+    def summaries(
+        self,
+        directory: str,
+        summarise: Summariser,
+        *,
+        limit: int | None = None,
+        offset: int = 0,
+    ) -> list[dict[str, Any]]:
+        """Return stored summaries, most recently written first, optionally paged."""
+        ...
+
+    def query(self, directory: str, summarise: Summariser, query: ListQuery) -> list[dict[str, Any]]:
+        """Return up to ``query.limit`` summaries matching *query*, in its order."""
+        ...
+
+    def summary(self, directory: str, item_id: str, summarise: Summariser) -> dict[str, Any] | None:
+        """Return the current summary of one item, or ``None`` if it does not exist."""
+        ...
+
+    def delete(self, directory: str, item_id: str) -> bool:
+        """Remove an item; return ``False`` if it did not exist."""
+        ...
+
+    def reindex(self, directory: str, summarise: Summariser) -> None:
+        """Bring the listing index of *directory* up to date with the stored items."""
+        ...
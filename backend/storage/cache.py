@@ -0,0 +1,119 @@
+"""Bounded LRU of validated models for :func:`backend.storage.load_item`.
+
+Entries are keyed by ``(directory, item_id)`` and remember the engine's
+:meth:`~backend.storage.base.StorageBackend.stamp` of the item they were read
+from, so a hit is only served while the stored item is unchanged — also when
+another process rewrote it. The budget is counted in bytes of stored JSON,
+which tracks, but understates, the memory the validated objects take.
+
+Callers get a detached copy of the cached model: every sub-model, list and
+dict in it, down to a question's TipTap content, is a fresh object, so
+neither assignments such as ``paper.questions[0].marks = 2`` nor in-place
+edits of ``content["content"]`` reach the cache. The copy walks only models,
+lists and dicts (JSON data has nothing else mutable), at about a third of
+the cost of ``copy.deepcopy``; a hit still saves reading the item and
+resolving its question-bank references.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, NamedTuple, TypeVar
+
+from pydantic import BaseModel
+
+T = TypeVar("T", bound=BaseModel)
+
+CacheKey = tuple[str, str]  # (directory, item_id)
+
+_IMMUTABLE = frozenset({str, int, float, bool, type(None)})
+
+
+class _Entry(NamedTuple):
+    stamp: Hashable
+    model: BaseModel
+    size: int
+
+
+class ModelCache:
+    """Byte-bounded LRU of validated models, checked against a version stamp."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[CacheKey, _Entry] = OrderedDict()
+        self._used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: CacheKey, stamp: Hashable, model: type[T]) -> T | None:
+        """Return a detached copy of the cached model if it is still current."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.stamp != stamp or type(entry.model) is not model:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return detach(entry.model)
+
+    def put(self, key: CacheKey, stamp: Hashable, model: BaseModel, size: int) -> None:
+        """Cache a detached copy of *model*, read from a payload of *size* bytes."""
+        if size > self.max_bytes:
+            return
+        entry = _Entry(stamp, detach(model), size)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._used -= previous.size
+            self._entries[key] = entry
+            self._used += size
+            while self._used > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._used -= evicted.size
+                self.evictions += 1
+
+    def invalidate(self, key: CacheKey) -> None:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._used -= entry.size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._used = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._used,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+def detach(model: T) -> T:
+    """Return a copy of *model* that shares no mutable object with it."""
+    return model.model_copy(update={name: _detach_value(value) for name, value in model.__dict__.items()})
+
+
+def detach_json(value: dict[str, Any]) -> dict[str, Any]:
+    """Return a copy of a JSON object that shares no list or dict with it."""
+    return _detach_value(value)
+
+
+def _detach_value(value: Any) -> Any:
+    """Copy the models, lists and dicts inside a field value; other values are immutable."""
+    kind = type(value)
+    if kind is dict:
+        return {k: v if type(v) in _IMMUTABLE else _detach_value(v) for k, v in value.items()}
+    if kind is list:
+        return [v if type(v) in _IMMUTABLE else _detach_value(v) for v in value]
+    if isinstance(value, BaseModel):
+        return detach(value)
+    return value
@@ -0,0 +1,450 @@
+"""JSON-file storage engine: one ``<root>/<directory>/<id>.json`` file per item.
+
+Listings are served from a per-directory summary index
+(``<root>/.index/<directory>.json``) that records each item's summary together
+with the mtime and size of its file, so a listing never opens the items.
+Sorted listings page through in-memory sorted views of that index, one per
+sort field and subject filter, which are kept up to date on every write. A
+page therefore costs a binary search plus the page itself; a ``since``/
+``until`` range on the timestamp sort narrows the search the same way.
+
+Every read-modify-write of an index holds an exclusive ``flock`` on
+``<root>/.index/<directory>.lock``. This stops workers sharing the data
+directory from overwriting each other's index updates. When the directory's
+mtime shows files were added or removed since the index was last checked, a
+listing also compares the number of item files with the index and reconciles
+the index when they differ, so files changed behind the index's back still
+show up; otherwise the check costs a single ``stat``.
+
+Items are written crash-safely (see :func:`atomic_write`): a reader, or the
+next start after a crash, sees either the old file or the new one, never a
+truncated one.
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows: no inter-process index lock
+    fcntl = None  # type: ignore[assignment]
+
+from .base import SORT_FIELDS, ListQuery, Summariser, summary_columns
+
+IndexEntries = dict[str, dict[str, Any]]
+
+_INDEX_DIR = ".index"
+# A directory mtime this recent may yet be shared by a change made after it was
+# read (filesystems stamp directories as coarsely as every 2 s), so it is not trusted.
+_MTIME_SLACK_NS = 2_000_000_000
+
+
+def atomic_write(path: Path, text: str, *, durable: bool = True) -> None:
+    """Replace *path* with *text* via a temporary file and an atomic rename.
+
+    The temporary file lives next to *path* (so the rename stays on one
+    filesystem) under a dot-name that ``*.json`` globs do not match.
+
+    Args:
+        path: File to write.
+        text: New contents.
+        durable: fsync the file before, and its directory after, the rename
+            so the new contents survive a power loss too.
+    """
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp, "w") as fh:
+            fh.write(text)
+            if durable:
+                fh.flush()
+                os.fsync(fh.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    if durable:
+        _fsync_dir(path.parent)
+
+
+def _fsync_dir(directory: Path) -> None:
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:  # e.g. Windows, where directories cannot be opened
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class FileBackend:
+    """Storage engine keeping each item as a JSON file under *root*."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        # Serialises index read-modify-write cycles between request threads.
+        self._index_lock = threading.RLock()
+        # File descriptors of the inter-process index locks this process holds, per directory.
+        self._lock_fds: dict[str, int] = {}
+        # In-process copy of each index keyed by directory: (index file (inode, mtime_ns), entries).
+        self._indexes: dict[str, tuple[tuple[int, int], IndexEntries]] = {}
+        # Directories whose index this process has already reconciled with the disk.
+        self._reconciled: set[str] = set()
+        # Item files the last reconcile could not summarise, per directory (see _checked_index).
+        self._unindexed: dict[str, int] = {}
+        # Directory mtime_ns at which each index last matched its item files (see _checked_index).
+        self._checked: dict[str, int | None] = {}
+        # Ascending (sort value, id) keys of each index, per directory and (sort field, subject
+        # or None for every item); built lazily.
+        self._views: dict[str, dict[tuple[str, str | None], list[tuple[str, str]]]] = {}
+
+    # ── Items ─────────────────────────────────────────────────────────────────
+
+    def write(self, directory: str, item_id: str, payload: str, summary: dict[str, Any]) -> None:
+        path = self._item_path(directory, item_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        before = _dir_mtime(path.parent)
+        atomic_write(path, payload)
+        self._advance_checked(directory, before)
+        stat = path.stat()
+        entry = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "summary": summary}
+        self._update_index(directory, lambda entries: self._set_entry(directory, entries, item_id, entry))
+
+    def read(self, directory: str, item_id: str) -> str | None:
+        path = self._item_path(directory, item_id)
+        if not path.exists():
+            return None
+        return path.read_text()
+
+    def stamp(self, directory: str, item_id: str) -> tuple[int, int] | None:
+        try:
+            stat = self._item_path(directory, item_id).stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def modified_ns(self, directory: str, item_id: str) -> int | None:
+        try:
+            return self._item_path(directory, item_id).stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def read_all(self, directory: str) -> Iterator[str]:
+        files = (self.root / directory).glob("*.json")
+        for file in sorted(files, key=lambda f: f.stat().st_mtime, reverse=True):
+            try:
+                yield file.read_text()
+            except FileNotFoundError:  # deleted while we were iterating
+                continue
+
+    def ids(self, directory: str) -> list[str]:
+        return [file.stem for file in (self.root / directory).glob("*.json")]
+
+    def delete(self, directory: str, item_id: str) -> bool:
+        path = self._item_path(directory, item_id)
+        if path.exists():
+            before = _dir_mtime(path.parent)
+            path.unlink()
+            self._advance_checked(directory, before)
+            self._update_index(directory, lambda entries: self._set_entry(directory, entries, item_id, None))
+            return True
+        return False
+
+    def _item_path(self, directory: str, item_id: str) -> Path:
+        return self.root / directory / f"{item_id}.json"
+
+    # ── Summary index ─────────────────────────────────────────────────────────
+
+    def summaries(
+        self,
+        directory: str,
+        summarise: Summariser,
+        *,
+        limit: int | None = None,
+        offset: int = 0,
+    ) -> list[dict[str, Any]]:
+        with self._index_lock:
+            entries = self._checked_index(directory, summarise)
+            ordered = sorted(entries.values(), key=lambda e: e["mtime_ns"], reverse=True)
+        end = None if limit is None else offset + limit
+        return [entry["summary"] for entry in ordered[offset:end]]
+
+    def summary(self, directory: str, item_id: str, summarise: Summariser) -> dict[str, Any] | None:
+        path = self._item_path(directory, item_id)
+        with self._index_lock:
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                return None
+            entries = self._current_index(directory, summarise)
+            known = entries.get(item_id)
+            if known and known["mtime_ns"] == stat.st_mtime_ns and known["size"] == stat.st_size:
+                return known["summary"]
+        # Written behind the index's back: summarise the file and record it
+        try:
+            summary = summarise(path.read_text())
+        except FileNotFoundError:  # deleted meanwhile
+            return None
+        entry = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "summary": summary}
+        self._update_index(directory, lambda entries: self._set_entry(directory, entries, item_id, entry))
+        return summary
+
+    def query(self, directory: str, summarise: Summariser, query: ListQuery) -> list[dict[str, Any]]:
+        if query.sort not in SORT_FIELDS:
+            raise ValueError(f"Cannot sort on {query.sort!r}.")
+        with self._index_lock:
+            entries = self._checked_index(directory, summarise)
+            view = self._view(directory, query.sort, query.subject, entries)
+            start, stop = 0, len(view)
+            if query.sort == "sort_ts":  # the view is ordered by the filtered field
+                if query.since is not None:
+                    start = bisect.bisect_left(view, (query.since, ""))
+                if query.until is not None:
+                    stop = bisect.bisect_left(view, (query.until, ""))
+            if query.descending:
+                if query.after is not None:
+                    stop = min(stop, bisect.bisect_left(view, query.after))
+                positions = range(stop - 1, start - 1, -1)
+            else:
+                if query.after is not None:
+                    start = max(start, bisect.bisect_right(view, query.after))
+                positions = range(start, stop)
+            page: list[dict[str, Any]] = []
+            for position in positions:
+                if len(page) >= query.limit:
+                    break
+                summary = entries[view[position][1]]["summary"]
+                if query.matches(summary):
+                    page.append(summary)
+            return page
+
+    def _view(
+        self, directory: str, field: str, subject: str | None, entries: IndexEntries
+    ) -> list[tuple[str, str]]:
+        views = self._views.setdefault(directory, {})
+        view = views.get((field, subject))
+        if view is None:
+            keyer = ListQuery(sort=field)
+            view = sorted(
+                keyer.key({**entry["summary"], "id": item_id})
+                for item_id, entry in entries.items()
+                if subject is None or summary_columns(entry["summary"])[1] == subject
+            )
+            views[(field, subject)] = view
+        return view
+
+    def _set_entry(
+        self, directory: str, entries: IndexEntries, item_id: str, entry: dict[str, Any] | None
+    ) -> None:
+        """Replace (or, with ``None``, remove) one index entry, keeping the sorted views in step."""
+        old = entries.pop(item_id, None)
+        if entry is not None:
+            entries[item_id] = entry
+        for (field, subject), view in self._views.get(directory, {}).items():
+            keyer = ListQuery(sort=field)
+            if old is not None and subject in (None, summary_columns(old["summary"])[1]):
+                key = keyer.key({**old["summary"], "id": item_id})
+                position = bisect.bisect_left(view, key)
+                if position < len(view) and view[position] == key:
+                    del view[position]
+            if entry is not None and subject in (None, summary_columns(entry["summary"])[1]):
+                bisect.insort(view, keyer.key({**entry["summary"], "id": item_id}))
+
+    def _drop_views(self, directory: str) -> None:
+        self._views.pop(directory, None)
+
+    def reindex(self, directory: str, summarise: Summariser) -> None:
+        self._reconcile(directory, summarise)
+
+    def _reconcile(self, directory: str, summarise: Summariser) -> IndexEntries:
+        """Reconcile the summary index of *directory* with the files on disk.
+
+        Entries whose file still has the recorded mtime and size are kept
+        as-is, new or modified files are parsed, and entries for deleted files
+        are dropped. A missing or unreadable index is rebuilt from scratch.
+        Files that fail to parse are left out, as ``list_items`` skips them.
+        """
+        with self._locked(directory):
+            index_path = self._index_path(directory)
+            try:
+                old: IndexEntries = json.loads(index_path.read_text())
+            except (OSError, ValueError):
+                old = {}
+
+            entries: IndexEntries = {}
+            seen = 0
+            checked = _dir_mtime(self.root / directory)
+            for file in (self.root / directory).glob("*.json"):
+                seen += 1
+                try:
+                    stat = file.stat()
+                    known = old.get(file.stem)
+                    if known and known["mtime_ns"] == stat.st_mtime_ns and known["size"] == stat.st_size:
+                        entries[file.stem] = known
+                        continue
+                    summary = summarise(file.read_text())
+                except Exception:  # noqa: BLE001 — skip corrupt or vanished files
+                    continue
+                entries[file.stem] = {
+                    "mtime_ns": stat.st_mtime_ns,
+                    "size": stat.st_size,
+                    "summary": summary,
+                }
+
+            self._drop_views(directory)
+            if entries != old or not index_path.exists():
+                self._write_index(directory, entries)
+            else:
+                self._indexes[directory] = (_file_version(index_path), entries)
+            self._reconciled.add(directory)
+            self._unindexed[directory] = seen - len(entries)
+            self._checked[directory] = checked
+            return entries
+
+    def _index_path(self, directory: str) -> Path:
+        return self.root / _INDEX_DIR / f"{directory}.json"
+
+    @contextmanager
+    def _locked(self, directory: str) -> Iterator[None]:
+        """Hold the directory's index lock, in this process and (via ``flock``) across processes.
+
+        Re-entrant: the thread holding the process lock takes the file lock once.
+        """
+        with self._index_lock:
+            if fcntl is None or directory in self._lock_fds:
+                yield
+                return
+            lock_path = self.root / _INDEX_DIR / f"{directory}.lock"
+            lock_path.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                self._lock_fds[directory] = fd
+                try:
+                    yield
+                finally:
+                    del self._lock_fds[directory]
+            finally:
+                os.close(fd)  # also releases the flock
+
+    def _checked_index(self, directory: str, summarise: Summariser) -> IndexEntries:
+        """Return :meth:`_current_index`, reconciled first if its size disagrees with the directory.
+
+        Catches index updates lost to a crash or made by a writer outside this
+        engine, which would otherwise only be repaired by the next restart.
+        The files are only counted when the directory's mtime has moved since
+        the last check (or is too recent to trust), so an idle directory costs
+        one ``stat`` per listing.
+        """
+        entries = self._current_index(directory, summarise)
+        mtime = _dir_mtime(self.root / directory)
+        if (
+            directory in self._checked
+            and mtime == self._checked[directory]
+            and (mtime is None or time.time_ns() - mtime >= _MTIME_SLACK_NS)
+        ):
+            return entries
+        expected = len(entries) + self._unindexed.get(directory, 0)
+        if _count_items(self.root / directory) != expected:
+            entries = self._reconcile(directory, summarise)
+        else:
+            self._checked[directory] = mtime
+        return entries
+
+    def _advance_checked(self, directory: str, before: int | None) -> None:
+        """Move the checked directory mtime past this process's own file change.
+
+        Only when nothing else had changed the directory since the last check
+        (its mtime was still *before*), so other writers' changes are still seen.
+        """
+        with self._index_lock:
+            if directory in self._checked and self._checked[directory] == before:
+                self._checked[directory] = _dir_mtime(self.root / directory)
+
+    def _current_index(self, directory: str, summarise: Summariser | None) -> IndexEntries | None:
+        """Return the up-to-date index entries for *directory*.
+
+        The in-process copy is reused while the index file is unchanged,
+        reloaded when another worker has rewritten it, and reconciled against
+        the directory the first time this process sees it (when *summarise*
+        is available). Returns ``None`` only when no index exists yet and it
+        cannot be rebuilt here.
+        """
+        index_path = self._index_path(directory)
+        if directory not in self._reconciled and summarise is not None:
+            return self._reconcile(directory, summarise)
+        cached = self._indexes.get(directory)
+        try:
+            version = _file_version(index_path)
+        except FileNotFoundError:
+            return self._reconcile(directory, summarise) if summarise is not None else None
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        try:
+            entries: IndexEntries = json.loads(index_path.read_text())
+        except ValueError:
+            return self._reconcile(directory, summarise) if summarise is not None else None
+        self._indexes[directory] = (version, entries)
+        self._drop_views(directory)  # another worker rewrote the index
+        return entries
+
+    def _update_index(self, directory: str, mutate: Callable[[IndexEntries], Any]) -> None:
+        """Apply *mutate* to the directory's index entries and persist the result.
+
+        When there is no index yet the update is skipped; the next listing
+        builds a complete index from the directory instead.
+        """
+        with self._locked(directory):
+            entries = self._current_index(directory, None)
+            if entries is None:
+                return
+            mutate(entries)
+            self._write_index(directory, entries)
+
+    def _write_index(self, directory: str, entries: IndexEntries) -> None:
+        """Persist index entries via write-and-rename so readers never see a torn file.
+
+        Called with the directory's index lock held. Not fsynced: an update
+        lost to a crash changes the index's size relative to the directory
+        (see :meth:`_checked_index`) or its entry's stamp (see :meth:`summary`),
+        and is repaired by a reconcile.
+        """
+        index_path = self._index_path(directory)
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write(index_path, json.dumps(entries, separators=(",", ":")), durable=False)
+        self._indexes[directory] = (_file_version(index_path), entries)
+
+
+def _file_version(path: Path) -> tuple[int, int]:
+    """Return ``(inode, mtime_ns)`` of *path*.
+
+    Every index write is a rename of a new file, so the inode changes even
+    when two writes land within the filesystem's timestamp granularity.
+    """
+    stat = path.stat()
+    return stat.st_ino, stat.st_mtime_ns
+
+
+def _dir_mtime(directory: Path) -> int | None:
+    """Return the mtime_ns of *directory*, which moves whenever an entry is added, removed or renamed."""
+    try:
+        return directory.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _count_items(directory: Path) -> int:
+    """Return the number of item files in *directory*, as ``glob("*.json")`` counts them."""
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return 0
+    return sum(1 for name in names if name.endswith(".json"))
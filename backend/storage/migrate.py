@@ -0,0 +1,81 @@
+"""One-shot import of the JSON-file store into the SQLite engine.
+
+Usage::
+
+    DATA_DIR=/data python -m backend.storage.migrate [--sqlite-path PATH]
+
+Every ``papers/*.json`` and ``templates/*.json`` file is validated and upserted
+into the database, keeping the file's mtime as its modification time so the
+newest-first ordering survives the move. Files that fail validation are
+reported and skipped. Question-bank entries (``questions/*.json``, see
+:mod:`.bank`) are copied first, so the papers' references to them still
+resolve. Running it twice is harmless.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Type
+
+from pydantic import BaseModel
+
+from ..models import Paper, Template
+from . import data_dir, sqlite_path, summariser
+from .bank import BANK
+from .files import FileBackend
+from .sqlite import SQLiteBackend
+
+MIGRATED: dict[str, Type[BaseModel]] = {"papers": Paper, "templates": Template}
+
+_BATCH = 500
+
+
+def migrate(data_dir: Path, db_path: Path) -> dict[str, int]:
+    """Copy all papers, templates and bank questions under *data_dir* into the database at *db_path*.
+
+    Args:
+        data_dir: Root of the JSON-file store.
+        db_path: SQLite database to create or update.
+
+    Returns:
+        Number of items imported per directory.
+    """
+    backend = SQLiteBackend(db_path)
+    source = FileBackend(data_dir)
+    counts: dict[str, int] = {}
+    # Bank entries first, so the references in papers and templates resolve.
+    for directory in (BANK, *MIGRATED):
+        model = MIGRATED.get(directory)
+        summarise = None if model is None else summariser(source, model)
+        rows = []
+        counts[directory] = 0
+        for file in sorted((data_dir / directory).glob("*.json")):
+            payload = file.read_text()
+            try:
+                summary = {} if summarise is None else summarise(payload)
+            except Exception as exc:  # noqa: BLE001 — report and carry on
+                print(f"skipping {file}: {exc}", file=sys.stderr)
+                continue
+            rows.append((file.stem, payload, summary, file.stat().st_mtime_ns))
+            if len(rows) >= _BATCH:
+                backend.write_many(directory, rows)
+                counts[directory] += len(rows)
+                rows = []
+        if rows:
+            backend.write_many(directory, rows)
+            counts[directory] += len(rows)
+    return counts
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data-dir", type=Path, default=None, help="defaults to $DATA_DIR")
+    parser.add_argument("--sqlite-path", type=Path, default=None, help="defaults to $SQLITE_PATH")
+    args = parser.parse_args(argv)
+    counts = migrate(args.data_dir or data_dir(), args.sqlite_path or sqlite_path())
+    for directory, count in counts.items():
+        print(f"{directory}: {count} imported")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""Embedded SQLite storage engine.
+
+All items live in a single ``items`` table running in WAL mode, so readers
+never block the writer and listings are answered from indexed summary
+columns instead of directory scans. Each thread gets its own connection.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Iterator
+
+from .base import SORT_FIELDS, ListQuery, Summariser, summary_columns
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    directory   TEXT    NOT NULL,
+    id          TEXT    NOT NULL,
+    payload     TEXT    NOT NULL,
+    summary     TEXT,
+    title       TEXT    NOT NULL DEFAULT '',
+    subject     TEXT    NOT NULL DEFAULT '',
+    sort_ts     TEXT    NOT NULL DEFAULT '',
+    modified_ns INTEGER NOT NULL,
+    PRIMARY KEY (directory, id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS items_by_modified ON items (directory, modified_ns DESC);
+CREATE INDEX IF NOT EXISTS items_by_title ON items (directory, title, id);
+CREATE INDEX IF NOT EXISTS items_by_subject ON items (directory, subject, sort_ts);
+CREATE INDEX IF NOT EXISTS items_by_subject_id ON items (directory, subject, id);
+CREATE INDEX IF NOT EXISTS items_by_sort_ts ON items (directory, sort_ts, id);
+"""
+
+
+class SQLiteBackend:
+    """Storage engine keeping every item as a row in one SQLite database."""
+
+    def __init__(self, db_path: Path) -> None:
+        self.db_path = db_path
+        self._local = threading.local()
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        conn: sqlite3.Connection | None = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def write(self, directory: str, item_id: str, payload: str, summary: dict[str, Any]) -> None:
+        self.write_many(directory, [(item_id, payload, summary, time.time_ns())])
+
+    def write_many(
+        self, directory: str, rows: list[tuple[str, str, dict[str, Any] | None, int]]
+    ) -> None:
+        """Upsert ``(item_id, payload, summary, modified_ns)`` rows in one transaction."""
+        params = []
+        for item_id, payload, summary, modified_ns in rows:
+            title, subject, sort_ts = summary_columns(summary or {})
+            encoded = None if summary is None else json.dumps(summary, separators=(",", ":"))
+            params.append((directory, item_id, payload, encoded, title, subject, sort_ts, modified_ns))
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO items"
+                " (directory, id, payload, summary, title, subject, sort_ts, modified_ns)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                params,
+            )
+
+    def read(self, directory: str, item_id: str) -> str | None:
+        row = self._connect().execute(
+            "SELECT payload FROM items WHERE directory = ? AND id = ?", (directory, item_id)
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def stamp(self, directory: str, item_id: str) -> tuple[int, int] | None:
+        row = self._connect().execute(
+            "SELECT modified_ns, length(payload) FROM items WHERE directory = ? AND id = ?",
+            (directory, item_id),
+        ).fetchone()
+        return None if row is None else (row[0], row[1])
+
+    def modified_ns(self, directory: str, item_id: str) -> int | None:
+        row = self._connect().execute(
+            "SELECT modified_ns FROM items WHERE directory = ? AND id = ?", (directory, item_id)
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def read_all(self, directory: str) -> Iterator[str]:
+        cursor = self._connect().execute(
+            "SELECT payload FROM items WHERE directory = ? ORDER BY modified_ns DESC", (directory,)
+        )
+        for (payload,) in cursor:
+            yield payload
+
+    def ids(self, directory: str) -> list[str]:
+        rows = self._connect().execute("SELECT id FROM items WHERE directory = ?", (directory,))
+        return [item_id for (item_id,) in rows]
+
+    def summaries(
+        self,
+        directory: str,
+        summarise: Summariser,
+        *,
+        limit: int | None = None,
+        offset: int = 0,
+    ) -> list[dict[str, Any]]:
+        rows = self._connect().execute(
+            "SELECT summary FROM items WHERE directory = ? AND summary IS NOT NULL"
+            " ORDER BY modified_ns DESC LIMIT ? OFFSET ?",
+            (directory, -1 if limit is None else limit, offset),
+        )
+        return [json.loads(summary) for (summary,) in rows]
+
+    def query(self, directory: str, summarise: Summariser, query: ListQuery) -> list[dict[str, Any]]:
+        """Answer a listing page from the ``items_by_*`` indexes.
+
+        Keyset pagination turns every page into an index range scan, so a
+        page costs the same however deep into the listing it is.
+        """
+        if query.sort not in SORT_FIELDS:
+            raise ValueError(f"Cannot sort on {query.sort!r}.")
+        column = query.sort
+        direction = "DESC" if query.descending else "ASC"
+        where = ["directory = ?", "summary IS NOT NULL"]
+        params: list[Any] = [directory]
+        if query.subject is not None:
+            where.append("subject = ?")
+            params.append(query.subject)
+        if query.since is not None:
+            where.append("sort_ts >= ?")
+            params.append(query.since)
+        if query.until is not None:
+            where.append("sort_ts < ?")
+            params.append(query.until)
+        if query.after is not None:
+            where.append(f"({column}, id) {'<' if query.descending else '>'} (?, ?)")
+            params.extend(query.after)
+        rows = self._connect().execute(
+            f"SELECT summary FROM items WHERE {' AND '.join(where)}"
+            f" ORDER BY {column} {direction}, id {direction} LIMIT ?",
+            (*params, query.limit),
+        )
+        return [json.loads(summary) for (summary,) in rows]
+
+    def summary(self, directory: str, item_id: str, summarise: Summariser) -> dict[str, Any] | None:
+        row = self._connect().execute(
+            "SELECT summary, payload FROM items WHERE directory = ? AND id = ?", (directory, item_id)
+        ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]) if row[0] is not None else summarise(row[1])
+
+    def delete(self, directory: str, item_id: str) -> bool:
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "DELETE FROM items WHERE directory = ? AND id = ?", (directory, item_id)
+            )
+        return cursor.rowcount > 0
+
+    def reindex(self, directory: str, summarise: Summariser) -> None:
+        """Fill in summaries for rows stored without one (e.g. after a raw import).
+
+        Rows whose payload cannot be summarised keep a ``NULL`` summary and are
+        left out of listings, mirroring how the file engine skips corrupt files.
+        """
+        conn = self._connect()
+        pending = conn.execute(
+            "SELECT id, payload, modified_ns FROM items WHERE directory = ? AND summary IS NULL",
+            (directory,),
+        ).fetchall()
+        rows = []
+        for item_id, payload, modified_ns in pending:
+            try:
+                rows.append((item_id, payload, summarise(payload), modified_ns))
+            except Exception:  # noqa: BLE001 — leave unreadable rows out of listings
+                continue
+        if rows:
+            self.write_many(directory, rows)
@@ -0,0 +1,231 @@
+"""Write-behind buffer that coalesces rapid saves of the same item.
+
+Enabled by setting ``STORAGE_WRITE_BEHIND_MS`` to a window in milliseconds
+(default ``0``, off). A write is held in memory for that long; further writes
+of the same item in the meantime replace it, so an autosave burst reaches
+the engine as a single write of the latest version. Reads, summaries and
+listings see buffered writes immediately.
+
+Buffered writes are lost if the process dies before they are flushed, so
+:func:`backend.storage.flush` is called from the app's shutdown handler.
+Writes reach the engine in the order they were made (flushing one item also
+flushes everything buffered before it), so a crash never keeps a paper but
+loses the question-bank entry it references (see :mod:`.bank`).
+"""
+
+import logging
+import threading
+import time
+from dataclasses import replace
+from typing import Any, Hashable, Iterator
+
+from .base import ListQuery, StorageBackend, Summariser
+
+logger = logging.getLogger(__name__)
+
+Key = tuple[str, str]  # (directory, item_id)
+
+
+class _Pending:
+    __slots__ = ("payload", "summary", "due", "seq")
+
+    def __init__(self, payload: str, summary: dict[str, Any], due: float, seq: int) -> None:
+        self.payload = payload
+        self.summary = summary
+        self.due = due
+        self.seq = seq
+
+
+class WriteBehindBackend:
+    """Wraps a storage engine, delaying and coalescing its writes.
+
+    Args:
+        inner: Engine that receives the writes.
+        window: Seconds a write is held before it is flushed.
+    """
+
+    def __init__(self, inner: StorageBackend, window: float) -> None:
+        self.inner = inner
+        self.window = window
+        self._pending: dict[Key, _Pending] = {}
+        self._seq = 0
+        self._cond = threading.Condition()
+        # Serialises engine writes so an older version never lands after a newer one.
+        self._flush_lock = threading.Lock()
+        self._coalesced = 0
+        self._flushed = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="storage-write-behind", daemon=True)
+        self._thread.start()
+
+    # ── Writes ────────────────────────────────────────────────────────────────
+
+    def write(self, directory: str, item_id: str, payload: str, summary: dict[str, Any]) -> None:
+        with self._cond:
+            if self._closed:
+                self.inner.write(directory, item_id, payload, summary)
+                return
+            self._seq += 1
+            previous = self._pending.get((directory, item_id))
+            if previous is not None:
+                self._coalesced += 1
+            # The first write of a burst sets the deadline; later ones ride along.
+            due = previous.due if previous is not None else time.monotonic() + self.window
+            self._pending[(directory, item_id)] = _Pending(payload, summary, due, self._seq)
+            self._cond.notify()
+
+    def delete(self, directory: str, item_id: str) -> bool:
+        with self._flush_lock:
+            with self._cond:
+                buffered = self._pending.pop((directory, item_id), None) is not None
+            return self.inner.delete(directory, item_id) or buffered
+
+    # ── Reads ─────────────────────────────────────────────────────────────────
+
+    def read(self, directory: str, item_id: str) -> str | None:
+        with self._cond:
+            pending = self._pending.get((directory, item_id))
+        return pending.payload if pending is not None else self.inner.read(directory, item_id)
+
+    def stamp(self, directory: str, item_id: str) -> Hashable | None:
+        with self._cond:
+            pending = self._pending.get((directory, item_id))
+        if pending is not None:
+            return ("buffered", pending.seq)
+        return self.inner.stamp(directory, item_id)
+
+    def modified_ns(self, directory: str, item_id: str) -> int | None:
+        with self._cond:
+            pending = (directory, item_id) in self._pending
+        if pending:  # written to disk no later than the next flush: treat it as new
+            return time.time_ns()
+        return self.inner.modified_ns(directory, item_id)
+
+    def read_all(self, directory: str) -> Iterator[str]:
+        self.flush(directory)
+        return self.inner.read_all(directory)
+
+    def ids(self, directory: str) -> list[str]:
+        self.flush(directory)
+        return self.inner.ids(directory)
+
+    def summary(self, directory: str, item_id: str, summarise: Summariser) -> dict[str, Any] | None:
+        with self._cond:
+            pending = self._pending.get((directory, item_id))
+        if pending is not None:
+            return pending.summary
+        return self.inner.summary(directory, item_id, summarise)
+
+    def summaries(
+        self,
+        directory: str,
+        summarise: Summariser,
+        *,
+        limit: int | None = None,
+        offset: int = 0,
+    ) -> list[dict[str, Any]]:
+        with self._cond:
+            buffered = sorted(
+                ((key[1], p) for key, p in self._pending.items() if key[0] == directory),
+                key=lambda item: item[1].seq,
+                reverse=True,
+            )
+        if not buffered:
+            return self.inner.summaries(directory, summarise, limit=limit, offset=offset)
+        # Buffered items are the most recently written; the rest keep the engine's order.
+        ids = {item_id for item_id, _ in buffered}
+        stored = self.inner.summaries(directory, summarise)
+        merged = [p.summary for _, p in buffered] + [s for s in stored if s.get("id") not in ids]
+        end = None if limit is None else offset + limit
+        return merged[offset:end]
+
+    def query(self, directory: str, summarise: Summariser, query: ListQuery) -> list[dict[str, Any]]:
+        with self._cond:
+            buffered = {key[1]: p.summary for key, p in self._pending.items() if key[0] == directory}
+        if not buffered:
+            return self.inner.query(directory, summarise, query)
+        # Over-fetch by the number of buffered items, whose stored versions are dropped.
+        stored = self.inner.query(directory, summarise, replace(query, limit=query.limit + len(buffered)))
+        merged = [s for s in stored if s.get("id") not in buffered]
+        merged += [s for s in buffered.values() if query.matches(s)]
+        merged.sort(key=query.key, reverse=query.descending)
+        return merged[: query.limit]
+
+    def reindex(self, directory: str, summarise: Summariser) -> None:
+        self.flush(directory)
+        self.inner.reindex(directory, summarise)
+
+    # ── Flushing ──────────────────────────────────────────────────────────────
+
+    def flush(self, directory: str | None = None) -> int:
+        """Write out every buffered item (of *directory*, if given) now.
+
+        Returns:
+            Number of items written.
+        """
+        with self._cond:
+            last = max(
+                (p.seq for key, p in self._pending.items() if directory is None or key[0] == directory),
+                default=0,
+            )
+            keys = self._written_through(last)
+        return self._write_out(keys)
+
+    def close(self) -> None:
+        """Flush everything and stop buffering; later writes go straight through."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        self.flush()
+
+    def stats(self) -> dict[str, int]:
+        """Return counters: ``pending`` items, ``coalesced`` writes and ``flushed`` writes."""
+        with self._cond:
+            return {"pending": len(self._pending), "coalesced": self._coalesced, "flushed": self._flushed}
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if self._closed:
+                    return
+                now = time.monotonic()
+                last = max((p.seq for p in self._pending.values() if p.due <= now), default=0)
+                if not last:
+                    next_due = min((p.due for p in self._pending.values()), default=None)
+                    self._cond.wait(None if next_due is None else next_due - now)
+                    continue
+                due = self._written_through(last)
+            self._write_out(due)
+
+    def _written_through(self, seq: int) -> list[Key]:
+        """Return the keys of buffered writes up to sequence number *seq*, oldest first.
+
+        The caller holds ``_cond``.
+        """
+        buffered = sorted((p.seq, key) for key, p in self._pending.items() if p.seq <= seq)
+        return [key for _, key in buffered]
+
+    def _write_out(self, keys: list[Key]) -> int:
+        written = 0
+        with self._flush_lock:
+            for key in keys:
+                with self._cond:
+                    pending = self._pending.get(key)
+                if pending is None:
+                    continue
+                try:
+                    self.inner.write(key[0], key[1], pending.payload, pending.summary)
+                except Exception:  # noqa: BLE001 — keep it buffered and retry later
+                    logger.exception("Write-behind flush of %s/%s failed", *key)
+                    with self._cond:
+                        if self._pending.get(key) is pending:
+                            pending.due = time.monotonic() + self.window
+                    continue
+                written += 1
+                with self._cond:
+                    self._flushed += 1
+                    # Only drop the entry if no newer write replaced it meanwhile.
+                    if self._pending.get(key) is pending:
+                        del self._pending[key]
+        return written
@@ -0,0 +1,270 @@
+"""Helpers for reading TipTap JSON documents.
+
+:func:`compile_doc` turns TipTap JSON into a small tree of slotted node
+objects in one pass. Marks are resolved to flags, image sources to upload
+filenames, and table spans to integers. Consumers (the docx builder and the
+search indexer) dispatch on node classes instead of re-reading type strings
+and attrs. Compiled documents are immutable and memoized by a hash of their
+JSON, so the same content is compiled once per process.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any
+
+from .hashing import canonical_dumps
+
+# Nodes whose children are inline content (text runs), not further blocks.
+TEXTBLOCKS = frozenset({"paragraph", "heading", "codeBlock"})
+
+# Compiled documents kept in memory.
+CACHE_ENTRIES = 2048
+
+
+# ── Compiled nodes ────────────────────────────────────────────────────────────
+
+
+class Node:
+    """A compiled TipTap node."""
+
+    __slots__ = ()
+
+    def text(self, separator: str = "") -> str:
+        """Return the node's plain text, sibling blocks joined by *separator*."""
+        raise NotImplementedError
+
+
+class Text(Node):
+    """A text run with its supported marks resolved."""
+
+    __slots__ = ("value", "bold", "italic", "underline")
+
+    def __init__(self, value: str, bold: bool, italic: bool, underline: bool) -> None:
+        self.value = value
+        self.bold = bold
+        self.italic = italic
+        self.underline = underline
+
+    def text(self, separator: str = "") -> str:
+        return self.value
+
+
+class Image(Node):
+    """An image; ``upload`` is its upload filename when it is one of ours."""
+
+    __slots__ = ("src", "upload")
+
+    def __init__(self, src: str, upload: str | None) -> None:
+        self.src = src
+        self.upload = upload
+
+    def text(self, separator: str = "") -> str:
+        return ""
+
+
+class Paragraph(Node):
+    __slots__ = ("inlines",)
+
+    def __init__(self, inlines: tuple[Node, ...]) -> None:
+        self.inlines = inlines
+
+    def text(self, separator: str = "") -> str:
+        return "".join(inline.text() for inline in self.inlines)
+
+
+class Heading(Node):
+    __slots__ = ("level", "inlines")
+
+    def __init__(self, level: int, inlines: tuple[Node, ...]) -> None:
+        self.level = level
+        self.inlines = inlines
+
+    def text(self, separator: str = "") -> str:
+        return "".join(inline.text() for inline in self.inlines)
+
+
+class List(Node):
+    """A bullet or ordered list; each item is the compiled ``listItem``."""
+
+    __slots__ = ("ordered", "items")
+
+    def __init__(self, ordered: bool, items: tuple[Node, ...]) -> None:
+        self.ordered = ordered
+        self.items = items
+
+    def text(self, separator: str = "") -> str:
+        return separator.join(item.text(separator) for item in self.items)
+
+
+class Cell(Node):
+    """A table cell; ``header`` for ``tableHeader`` cells, spans are at least 1."""
+
+    __slots__ = ("header", "colspan", "rowspan", "blocks")
+
+    def __init__(self, header: bool, colspan: int, rowspan: int, blocks: tuple[Node, ...]) -> None:
+        self.header = header
+        self.colspan = colspan
+        self.rowspan = rowspan
+        self.blocks = blocks
+
+    def text(self, separator: str = "") -> str:
+        return separator.join(block.text(separator) for block in self.blocks)
+
+
+class Row(Node):
+    __slots__ = ("cells",)
+
+    def __init__(self, cells: tuple[Cell, ...]) -> None:
+        self.cells = cells
+
+    def text(self, separator: str = "") -> str:
+        return separator.join(cell.text(separator) for cell in self.cells)
+
+
+class Table(Node):
+    __slots__ = ("rows",)
+
+    def __init__(self, rows: tuple[Row, ...]) -> None:
+        self.rows = rows
+
+    def text(self, separator: str = "") -> str:
+        return separator.join(row.text(separator) for row in self.rows)
+
+
+class Other(Node):
+    """Any other node (``listItem``, ``blockquote``, ``hardBreak``...), kept for its text."""
+
+    __slots__ = ("type", "children")
+
+    def __init__(self, type: str, children: tuple[Node, ...]) -> None:
+        self.type = type
+        self.children = children
+
+    def text(self, separator: str = "") -> str:
+        joiner = "" if self.type in TEXTBLOCKS else separator
+        return joiner.join(child.text(separator) for child in self.children)
+
+
+class Document(Node):
+    """A compiled TipTap document: its blocks and the uploads its images use."""
+
+    __slots__ = ("blocks", "uploads", "_texts")
+
+    def __init__(self, blocks: tuple[Node, ...], uploads: tuple[str, ...]) -> None:
+        self.blocks = blocks
+        self.uploads = uploads
+        self._texts: dict[str, str] = {}
+
+    def text(self, separator: str = "") -> str:
+        text = self._texts.get(separator)
+        if text is None:
+            text = self._texts[separator] = separator.join(block.text(separator) for block in self.blocks)
+        return text
+
+
+# ── Compiler ──────────────────────────────────────────────────────────────────
+
+
+def upload_filename(src: str) -> str | None:
+    """Return the upload filename an image ``src`` points at, if it is one of ours."""
+    if "/api/uploads/" in src:
+        return src.rsplit("/", 1)[-1]
+    return None
+
+
+def _span(value: Any) -> int:
+    try:
+        return max(int(value), 1)
+    except (TypeError, ValueError):
+        return 1
+
+
+class _Compiler:
+    """One pass over TipTap JSON, collecting upload references on the way."""
+
+    def __init__(self) -> None:
+        self.uploads: dict[str, None] = {}
+
+    def blocks(self, nodes: list[dict]) -> tuple[Node, ...]:
+        compiled: list[Node] = []
+        for node in nodes:
+            if node.get("type") == "doc":  # a nested doc contributes its blocks
+                compiled.extend(self.blocks(node.get("content", [])))
+            else:
+                compiled.append(self.node(node))
+        return tuple(compiled)
+
+    def node(self, node: dict) -> Node:
+        kind = node.get("type", "")
+        children = node.get("content", [])
+        attrs = node.get("attrs") or {}
+        if kind == "text":
+            marks = {mark.get("type") for mark in node.get("marks", [])}
+            return Text(node.get("text", ""), "bold" in marks, "italic" in marks, "underline" in marks)
+        if kind == "image":
+            src = attrs.get("src", "")
+            upload = upload_filename(src)
+            if upload:
+                self.uploads[upload] = None
+            return Image(src, upload)
+        if kind == "paragraph":
+            return Paragraph(self.nodes(children))
+        if kind == "heading":
+            return Heading(attrs.get("level", 1), self.nodes(children))
+        if kind in ("bulletList", "orderedList"):
+            return List(kind == "orderedList", self.nodes(children))
+        if kind == "table":
+            return Table(tuple(Row(tuple(self.cell(cell) for cell in row.get("content", []))) for row in children))
+        return Other(kind, self.blocks(children))
+
+    def nodes(self, nodes: list[dict]) -> tuple[Node, ...]:
+        return tuple(self.node(node) for node in nodes)
+
+    def cell(self, node: dict) -> Cell:
+        attrs = node.get("attrs") or {}
+        return Cell(
+            node.get("type") == "tableHeader",
+            _span(attrs.get("colspan")),
+            _span(attrs.get("rowspan")),
+            self.blocks(node.get("content", [])),
+        )
+
+
+_cache: OrderedDict[str, Document] = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def compile_doc(node: dict[str, Any]) -> Document:
+    """Compile TipTap JSON (usually a ``doc``) into a :class:`Document`.
+
+    The result is shared between callers with the same content and must not
+    be modified.
+    """
+    key = hashlib.sha256(canonical_dumps(node)).hexdigest()
+    with _cache_lock:
+        document = _cache.get(key)
+        if document is not None:
+            _cache.move_to_end(key)
+            return document
+    compiler = _Compiler()
+    blocks = compiler.blocks([node])
+    document = Document(blocks, tuple(compiler.uploads))
+    with _cache_lock:
+        _cache[key] = document
+        while len(_cache) > CACHE_ENTRIES:
+            _cache.popitem(last=False)
+    return document
+
+
+def plain_text(node: dict[str, Any], block_separator: str = "") -> str:
+    """Extract plain text from a TipTap JSON node.
+
+    Args:
+        node: Any TipTap node (usually a ``doc``).
+        block_separator: Joins the text of sibling blocks (paragraphs, list
+            items, table cells). The default keeps the historical behaviour
+            of running blocks together; search indexing passes ``" "`` so
+            words from adjacent blocks do not merge.
+    """
+    return compile_doc(node).text(block_separator)
@@ -0,0 +1,285 @@
+"""Benchmark: export, storage and HTTP performance on a synthetic paper corpus.
+
+For every corpus profile (see :mod:`benchmarks.corpus`) this times
+``build_docx`` (cold caches and warm fragment cache), ``build_answer_key``,
+storage save/load, and the paper and export HTTP endpoints; listings are
+timed once over a store of realistic papers. Each case records throughput,
+latency percentiles and peak Python heap (measured in a separate, traced
+run; lxml's C allocations are not included).
+
+Usage::
+
+    python -m benchmarks.bench_export [--profile realistic ...] [--repeat 5]
+        [--scale 1.0] [--output baseline.json] [--compare baseline.json]
+
+``--output`` writes the results as a JSON baseline. ``--compare`` checks
+the results against a baseline and exits with status 1 when a case's median
+latency or peak memory grew by more than ``--threshold`` (default 25%).
+
+Exports run on the thread executor unless ``EXPORT_EXECUTOR`` is set, so the
+HTTP numbers measure the build rather than process start-up.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+from benchmarks.corpus import PROFILES, generate_paper, write_uploads
+
+# Latency regressions smaller than this are noise, whatever their ratio.
+_MIN_DELTA_MS = 2.0
+_MIN_DELTA_MB = 1.0
+
+
+# ── Measurement ───────────────────────────────────────────────────────────────
+
+
+def measure(run: Callable[[], Any], repeat: int, setup: Callable[[], None] | None = None) -> dict[str, float]:
+    """Time *run* *repeat* times (after one warm-up) and trace one more call for peak memory.
+
+    Args:
+        run: The operation; its return value is ignored unless it is ``bytes``,
+            whose length is recorded as ``output_bytes``.
+        repeat: Number of timed calls.
+        setup: Called, untimed, before every call (e.g. to clear caches).
+
+    Returns:
+        ``ops_per_s``, ``mean_ms``, ``p50_ms``, ``p90_ms``, ``p99_ms``,
+        ``max_ms``, ``peak_mb`` and, for byte outputs, ``output_bytes``.
+    """
+    if setup:
+        setup()
+    output = run()
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+
+    if setup:
+        setup()
+    tracemalloc.start()
+    try:
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    result = {
+        "ops_per_s": round(len(times) / sum(times), 3),
+        "mean_ms": _ms(statistics.fmean(times)),
+        "p50_ms": _ms(percentile(times, 50)),
+        "p90_ms": _ms(percentile(times, 90)),
+        "p99_ms": _ms(percentile(times, 99)),
+        "max_ms": _ms(max(times)),
+        "peak_mb": round(peak / 1e6, 2),
+    }
+    if isinstance(output, bytes):
+        result["output_bytes"] = len(output)
+    return result
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Return the *pct*-th percentile of *values*, interpolating between ranks."""
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+# ── Cases ─────────────────────────────────────────────────────────────────────
+
+
+def _clear_build_caches() -> None:
+    from backend.docx_builder.fragments import get_fragment_cache
+    from backend.docx_builder.pictures import get_image_cache
+
+    get_fragment_cache().clear()
+    get_image_cache().clear()
+
+
+def _clear_storage_cache() -> None:
+    from backend import storage
+
+    storage.get_model_cache().clear()
+
+
+def profile_cases(paper, client) -> dict[str, tuple[Callable[[], Any], Callable[[], None] | None]]:
+    """Return the per-profile cases as ``{name: (run, setup)}``."""
+    from backend import storage
+    from backend.docx_builder.builder import build_answer_key, build_docx
+    from backend.models import Paper
+
+    body = paper.model_dump(mode="json")
+    counter = iter(range(sys.maxsize))
+
+    def fresh_title() -> None:
+        # A new title changes the export's content key, so the export cache misses
+        body["header"]["title"] = f"{paper.header.title} #{next(counter)}"
+        _clear_build_caches()
+
+    storage.save_item("papers", paper.id, paper)
+    client.post("/api/papers", json=body)
+    return {
+        "build_docx_cold": (lambda: build_docx(paper), _clear_build_caches),
+        "build_docx_warm": (lambda: build_docx(paper), None),
+        "build_answer_key": (lambda: build_answer_key(paper), None),
+        "storage_save": (lambda: storage.save_item("papers", paper.id, paper), None),
+        "storage_load_cold": (lambda: storage.load_item("papers", paper.id, Paper), _clear_storage_cache),
+        "storage_load_warm": (lambda: storage.load_item("papers", paper.id, Paper), None),
+        "http_get_paper": (lambda: _ok(client.get(f"/api/papers/{paper.id}")), None),
+        "http_save_paper": (lambda: _ok(client.post("/api/papers", json=body)), None),
+        "http_export_cold": (lambda: _ok(client.post("/api/papers/export", json=body)), fresh_title),
+        "http_export_warm": (lambda: _ok(client.post("/api/papers/export", json=body)), None),
+    }
+
+
+def listing_cases(client, papers: int, seed: int) -> dict[str, tuple[Callable[[], Any], None]]:
+    """Seed *papers* realistic papers and return the listing cases."""
+    from backend import storage
+    from backend.models import Paper, PaperSummary
+    from backend.storage import ListQuery
+
+    for n in range(papers):
+        paper = generate_paper("realistic", seed=seed + n, scale=0.25)
+        storage.save_item("papers", paper.id, paper)
+    query = ListQuery(sort="title", descending=False, limit=100)
+    return {
+        "storage_list_page": (lambda: storage.list_page("papers", Paper, PaperSummary, query), None),
+        "storage_list_summaries": (lambda: storage.list_summaries("papers", Paper, PaperSummary), None),
+        "http_list_papers": (lambda: _ok(client.get("/api/papers", params={"limit": 100})), None),
+    }
+
+
+def _ok(response) -> bytes:
+    if response.status_code >= 400:
+        raise RuntimeError(f"{response.request.method} {response.request.url}: {response.status_code} {response.text[:200]}")
+    return response.content
+
+
+def run_suite(
+    profiles: list[str],
+    repeat: int,
+    scale: float,
+    seed: int,
+    papers: int,
+    upload_size: tuple[int, int] = (1200, 900),
+    log: Callable[[str], None] = print,
+) -> dict[str, Any]:
+    """Run every case in a throwaway data directory and return the results document."""
+    results: dict[str, dict[str, float]] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATA_DIR"] = tmp
+        os.environ.setdefault("EXPORT_EXECUTOR", "thread")
+        for sub in ("papers", "templates", "uploads"):
+            (Path(tmp) / sub).mkdir()
+        uploads = write_uploads(Path(tmp) / "uploads", 6, seed=seed, size=upload_size)
+
+        from fastapi.testclient import TestClient
+
+        from backend.images import prepare_renditions
+        from backend.main import app
+
+        for name in uploads:
+            prepare_renditions(name)
+        client = TestClient(app)
+
+        for profile in profiles:
+            paper = generate_paper(profile, seed=seed, scale=scale, uploads=uploads)
+            for case, (run, setup) in profile_cases(paper, client).items():
+                results[f"{profile}/{case}"] = measure(run, repeat, setup)
+                log(_row(f"{profile}/{case}", results[f"{profile}/{case}"]))
+        for case, (run, setup) in listing_cases(client, papers, seed).items():
+            results[f"listing/{case}"] = measure(run, repeat, setup)
+            log(_row(f"listing/{case}", results[f"listing/{case}"]))
+
+    return {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "scale": scale,
+            "seed": seed,
+            "papers": papers,
+        },
+        "results": results,
+    }
+
+
+def _row(name: str, result: dict[str, float]) -> str:
+    return (
+        f"{name:40} {result['ops_per_s']:9.1f}/s  p50 {result['p50_ms']:9.2f} ms"
+        f"  p99 {result['p99_ms']:9.2f} ms  peak {result['peak_mb']:7.2f} MB"
+    )
+
+
+# ── Comparison ────────────────────────────────────────────────────────────────
+
+
+def compare(baseline: dict[str, Any], current: dict[str, Any], threshold: float) -> list[str]:
+    """Return a description of every regression of *current* against *baseline*.
+
+    A case regresses when its median latency or peak memory exceeds the
+    baseline's by more than *threshold* (a fraction) and by more than a small
+    absolute margin, so sub-millisecond jitter is not reported. Cases present
+    in only one of the two runs are ignored.
+    """
+    regressions = []
+    for name, now in current["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if before is None:
+            continue
+        for metric, floor in (("p50_ms", _MIN_DELTA_MS), ("peak_mb", _MIN_DELTA_MB)):
+            old, new = before.get(metric), now.get(metric)
+            if old is None or new is None:
+                continue
+            if new > old * (1 + threshold) and new - old > floor:
+                regressions.append(f"{name}: {metric} {old:g} -> {new:g} (+{(new / old - 1) * 100 if old else 100:.0f}%)")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profile", action="append", choices=sorted(PROFILES), help="repeatable; default all")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scale", type=float, default=1.0, help="shrink or grow every profile")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--papers", type=int, default=200, help="papers in the listing store")
+    parser.add_argument("--output", type=Path, help="write the results as a JSON baseline")
+    parser.add_argument("--compare", type=Path, help="baseline to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    report = run_suite(args.profile or list(PROFILES), args.repeat, args.scale, args.seed, args.papers)
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"baseline written to {args.output}")
+    if args.compare:
+        regressions = compare(json.loads(args.compare.read_text()), report, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print(f"no regressions against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""Benchmark: .docx size and build time with original uploads vs renditions.
+
+Generates phone-photo sized JPEGs, builds a paper that uses them as logo,
+image questions and inline images, once embedding the originals (the old
+behaviour) and once embedding renditions.
+
+Usage::
+
+    python -m benchmarks.bench_images [--photos 4] [--repeat 3]
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image
+
+
+def _photo(path: Path, seed: int) -> None:
+    """Write a ~4000×3000 noisy JPEG, which compresses about as badly as a photo."""
+    noise = Image.effect_noise((4000, 3000), 40 + seed)
+    Image.merge("RGB", (noise, noise.rotate(180), noise.transpose(Image.Transpose.FLIP_LEFT_RIGHT))).save(
+        path, format="JPEG", quality=92
+    )
+
+
+def _paper(names: list[str]):
+    from backend.models import ImageQuestion, Paper, PaperStyle, TextQuestion
+
+    questions = []
+    for name in names:
+        questions.append(ImageQuestion(filename=name, caption=name))
+        inline = {"type": "doc", "content": [{"type": "paragraph", "content": [
+            {"type": "text", "text": "Refer to the figure "},
+            {"type": "image", "attrs": {"src": f"/api/uploads/{name}"}}]}]}
+        questions.append(TextQuestion(content=inline))
+    return Paper(questions=questions, style=PaperStyle(logo_filename=names[0]))
+
+
+def _measure(paper, repeat: int) -> tuple[int, float]:
+    from backend.docx_builder.builder import build_docx
+    from backend.docx_builder.fragments import get_fragment_cache
+    from backend.docx_builder.pictures import get_image_cache
+
+    times = []
+    size = 0
+    for _ in range(repeat):
+        get_fragment_cache().clear()
+        get_image_cache().clear()
+        start = time.perf_counter()
+        size = len(build_docx(paper))
+        times.append(time.perf_counter() - start)
+    return size, statistics.median(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--photos", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATA_DIR"] = tmp
+        uploads = Path(tmp) / "uploads"
+        uploads.mkdir()
+        names = [f"photo{i}.jpg" for i in range(args.photos)]
+        for i, name in enumerate(names):
+            _photo(uploads / name, i)
+        upload_mb = sum((uploads / n).stat().st_size for n in names) / 1e6
+        print(f"{args.photos} uploads, {upload_mb:.1f} MB total")
+
+        from backend import images
+        from backend.docx_builder import pictures
+
+        paper = _paper(names)
+        rendition_for = pictures.rendition_for
+        pictures.rendition_for = lambda name, kind: uploads / name
+        before = _measure(paper, args.repeat)
+        pictures.rendition_for = rendition_for
+
+        start = time.perf_counter()
+        for name in names:
+            images.prepare_renditions(name)
+        prepare = time.perf_counter() - start
+        after = _measure(paper, args.repeat)
+
+    print(f"{'':12} {'docx MB':>10} {'build s':>10}")
+    print(f"{'originals':12} {before[0] / 1e6:10.2f} {before[1]:10.3f}")
+    print(f"{'renditions':12} {after[0] / 1e6:10.2f} {after[1]:10.3f}")
+    print(f"one-off rendition generation: {prepare:.3f} s (background, after upload)")
+
+
+if __name__ == "__main__":
+    main()
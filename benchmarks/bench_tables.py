@@ -0,0 +1,102 @@
+"""Benchmark: table rendering time against table size.
+
+Renders TipTap tables of growing height (20 columns by default) with
+:func:`backend.docx_builder.tables.add_table` and, for comparison, by
+filling a python-docx table through ``Table.cell(row, col)``, the way the
+builder used to. The renderer's time per cell should stay flat as tables
+grow; filling through ``cell()`` grows with the table, since every call
+rebuilds the cell grid. That comparison takes about a minute for a 50x20
+table, so it only runs up to ``--legacy-max-rows`` rows.
+
+Usage::
+
+    python -m benchmarks.bench_tables [--rows 25 50 100 200] [--cols 20] [--repeat 3]
+        [--legacy-max-rows 25]
+"""
+
+import argparse
+import time
+from typing import Any, Callable
+
+from docx import Document
+
+
+def table_node(rows: int, cols: int) -> dict:
+    """Return a TipTap table: a header row, then ``rows - 1`` rows of formatted cells."""
+
+    def cell(text: str, kind: str = "tableCell") -> dict:
+        return {"type": kind, "attrs": {"colspan": 1, "rowspan": 1}, "content": [{"type": "paragraph", "content": [
+            {"type": "text", "text": text, "marks": [{"type": "bold"}] if text.endswith("0") else []},
+        ]}]}
+
+    header = {"type": "tableRow", "content": [cell(f"Column {j}", "tableHeader") for j in range(cols)]}
+    body = [{"type": "tableRow", "content": [cell(f"r{i}c{j}") for j in range(cols)]} for i in range(1, rows)]
+    return {"type": "table", "content": [header, *body]}
+
+
+def render(node: dict) -> None:
+    """Render *node* into a new document with the table renderer."""
+    from backend.docx_builder.builder import _tiptap_to_doc
+
+    _tiptap_to_doc(Document(), node)
+
+
+def render_legacy(node: dict) -> None:
+    """Render *node* into a new document through ``Table.cell()`` (plain text only)."""
+    from backend.tiptap import plain_text
+
+    rows = node["content"]
+    table = Document().add_table(rows=len(rows), cols=len(rows[0]["content"]))
+    for i, row in enumerate(rows):
+        for j, cell in enumerate(row["content"]):
+            table.cell(i, j).text = plain_text(cell)
+
+
+def best_of(fn: Callable[[], Any], repeat: int) -> float:
+    """Return the fastest of *repeat* timed calls, in seconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def run(rows: list[int], cols: int, repeat: int, legacy_max_rows: int = 0) -> list[dict[str, float]]:
+    """Time the renderer, and ``Table.cell()`` for small tables, for each table height.
+
+    Returns:
+        One result per height: ``rows``, ``cells``, ``ms`` and ``us_per_cell``,
+        plus ``legacy_ms`` and ``legacy_us_per_cell`` for heights up to
+        *legacy_max_rows*.
+    """
+    render(table_node(2, 2))  # imports and style lookups, outside the timings
+    results = []
+    for n in rows:
+        node = table_node(n, cols)
+        seconds = best_of(lambda: render(node), repeat)
+        result = {"rows": n, "cells": n * cols, "ms": seconds * 1000, "us_per_cell": seconds * 1e6 / (n * cols)}
+        if n <= legacy_max_rows:
+            seconds = best_of(lambda: render_legacy(node), repeat)
+            result["legacy_ms"] = seconds * 1000
+            result["legacy_us_per_cell"] = seconds * 1e6 / (n * cols)
+        results.append(result)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[25, 50, 100, 200])
+    parser.add_argument("--cols", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--legacy-max-rows", type=int, default=25, help="tallest table timed with Table.cell()")
+    args = parser.parse_args()
+
+    print(f"{'table':>10} {'cells':>7} {'render ms':>10} {'us/cell':>8} {'cell() ms':>10} {'us/cell':>8}")
+    for r in run(args.rows, args.cols, args.repeat, args.legacy_max_rows):
+        legacy = f"{r['legacy_ms']:10.1f} {r['legacy_us_per_cell']:8.1f}" if "legacy_ms" in r else ""
+        print(f"{r['rows']:>6}x{args.cols:<3} {r['cells']:7} {r['ms']:10.1f} {r['us_per_cell']:8.1f} {legacy}")
+
+
+if __name__ == "__main__":
+    main()
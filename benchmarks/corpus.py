@@ -0,0 +1,195 @@
+"""Seeded generator of synthetic exam papers for benchmarks.
+
+Each profile describes one shape of paper: ``realistic`` mixes every question
+type the way a typical school paper does, and the others push one dimension
+to the extreme (hundreds of questions, deeply nested lists, 50×50 tables,
+many images, very long MCQ option lists). The same profile, seed and scale
+always produce the same paper, so timings from different runs compare.
+
+Usage from code::
+
+    from benchmarks.corpus import generate_paper, write_uploads
+
+    names = write_uploads(Path(data_dir) / "uploads", 8, seed=1)
+    paper = generate_paper("big-tables", seed=1, uploads=names)
+"""
+
+import random
+from dataclasses import dataclass
+from pathlib import Path
+
+from PIL import Image
+
+_WORDS = (
+    "explain describe calculate compare energy force cell membrane reaction "
+    "equation velocity acid base enzyme photosynthesis gravity circuit voltage "
+    "current resistance molecule atom element compound population ecosystem "
+    "graph function derivative integral probability triangle angle theorem "
+    "the a of and in to with for which how why what when show that given"
+).split()
+
+_SECTIONS = ("Section A", "Section B", "Section C")
+
+
+@dataclass(frozen=True)
+class Profile:
+    """Shape of a generated paper."""
+
+    questions: int
+    # Relative weights of text, mcq, table and image questions
+    mix: tuple[int, int, int, int] = (5, 3, 1, 1)
+    list_depth: int = 2  # nesting depth of bullet lists in text questions
+    table: tuple[int, int] = (4, 4)  # rows, columns of table questions
+    options: int = 4  # options per MCQ
+    inline_images: float = 0.1  # share of text questions with an inline image
+
+
+PROFILES: dict[str, Profile] = {
+    "realistic": Profile(questions=40),
+    "many-questions": Profile(questions=500),
+    "deep-nesting": Profile(questions=20, mix=(1, 0, 0, 0), list_depth=30),
+    "big-tables": Profile(questions=8, mix=(0, 0, 1, 0), table=(50, 50)),
+    "many-images": Profile(questions=60, mix=(1, 0, 0, 2), inline_images=1.0),
+    "long-mcq": Profile(questions=40, mix=(0, 1, 0, 0), options=40),
+}
+
+
+def write_uploads(directory: Path, count: int, seed: int = 0, size: tuple[int, int] = (1200, 900)) -> list[str]:
+    """Write *count* noisy PNG uploads into *directory* and return their filenames."""
+    directory.mkdir(parents=True, exist_ok=True)
+    names = []
+    for n in range(count):
+        name = f"bench-{seed}-{n}.png"
+        noise = Image.effect_noise(size, 20 + (seed + n) % 60)
+        Image.merge("RGB", (noise, noise.rotate(180), noise.transpose(Image.Transpose.FLIP_LEFT_RIGHT))).save(
+            directory / name
+        )
+        names.append(name)
+    return names
+
+
+def generate_paper(profile: str, seed: int = 0, scale: float = 1.0, uploads: list[str] | None = None):
+    """Return a deterministic synthetic ``Paper`` of the given profile.
+
+    Args:
+        profile: Key of :data:`PROFILES`.
+        seed: Random seed; the same seed gives the same paper.
+        scale: Multiplies the question count and table size (``0.1`` for a
+            quick smoke run).
+        uploads: Upload filenames image questions and inline images use;
+            without them, image questions become text questions.
+
+    Raises:
+        KeyError: Unknown profile.
+    """
+    from backend.models import Paper, PaperHeader, PaperStyle
+
+    shape = PROFILES[profile]
+    rng = random.Random(f"{profile}:{seed}")
+    make = _Generator(rng, shape, scale, uploads or [])
+    count = max(1, round(shape.questions * scale))
+    questions = [make.question(n, count) for n in range(count)]
+    header = PaperHeader(
+        institution="Benchmark High School",
+        title=f"{profile.replace('-', ' ').title()} {seed}",
+        subject=rng.choice(("Physics", "Biology", "Maths")),
+        date="2026-06-01",
+        duration="2 hours",
+        total_marks=sum(q["marks"] for q in questions),
+    )
+    style = PaperStyle(header_text="Benchmark", footer_text="Page", logo_filename=(uploads or [None])[0])
+    return Paper(header=header, questions=questions, style=style)
+
+
+class _Generator:
+    def __init__(self, rng: random.Random, shape: Profile, scale: float, uploads: list[str]) -> None:
+        self.rng = rng
+        self.shape = shape
+        self.uploads = uploads
+        rows, cols = shape.table
+        self.table_size = (max(1, round(rows * min(scale, 1) ** 0.5)), max(1, round(cols * min(scale, 1) ** 0.5)))
+
+    def question(self, n: int, count: int) -> dict:
+        kinds = ("text", "mcq", "table", "image")
+        kind = self.rng.choices(kinds, weights=self.shape.mix)[0]
+        if kind == "image" and not self.uploads:
+            kind = "text"
+        question = {
+            "type": kind,
+            "id": f"q{n}",
+            "section": _SECTIONS[n * len(_SECTIONS) // count],
+            "marks": self.rng.choice((1, 2, 3, 5, 10)),
+        }
+        if kind == "text":
+            question["content"] = self.text_doc()
+        elif kind == "mcq":
+            question["stem"] = self.doc(self.paragraph())
+            correct = self.rng.randrange(self.shape.options)
+            question["options"] = [
+                {"label": _label(i), "text": self.words(2, 8), "is_correct": i == correct}
+                for i in range(self.shape.options)
+            ]
+        elif kind == "table":
+            question["content"] = self.doc(self.paragraph(), self.table(*self.table_size))
+        else:
+            question["filename"] = self.rng.choice(self.uploads)
+            question["caption"] = self.words(3, 10)
+        return question
+
+    # ── TipTap nodes ──────────────────────────────────────────────────────────
+
+    def words(self, low: int, high: int) -> str:
+        return " ".join(self.rng.choices(_WORDS, k=self.rng.randint(low, high)))
+
+    def text(self) -> dict:
+        node = {"type": "text", "text": self.words(3, 15) + " "}
+        marks = [{"type": m} for m in ("bold", "italic", "underline") if self.rng.random() < 0.15]
+        if marks:
+            node["marks"] = marks
+        return node
+
+    def paragraph(self, image: bool = False) -> dict:
+        content = [self.text() for _ in range(self.rng.randint(1, 4))]
+        if image:
+            content.append({"type": "image", "attrs": {"src": f"/api/uploads/{self.rng.choice(self.uploads)}"}})
+        return {"type": "paragraph", "content": content}
+
+    def bullet_list(self, depth: int) -> dict:
+        items = [{"type": "listItem", "content": [self.paragraph()]} for _ in range(self.rng.randint(2, 3))]
+        if depth > 1:  # one nested branch per level keeps deep profiles linear in depth
+            items[0]["content"].append(self.bullet_list(depth - 1))
+        return {"type": "bulletList", "content": items}
+
+    def table(self, rows: int, cols: int) -> dict:
+        def row(cell_type: str) -> dict:
+            return {
+                "type": "tableRow",
+                "content": [
+                    {"type": cell_type, "content": [{"type": "paragraph", "content": [self.text()]}]}
+                    for _ in range(cols)
+                ],
+            }
+
+        return {"type": "table", "content": [row("tableHeader")] + [row("tableCell") for _ in range(rows - 1)]}
+
+    def text_doc(self) -> dict:
+        blocks = [self.paragraph(image=bool(self.uploads) and self.rng.random() < self.shape.inline_images)]
+        if self.rng.random() < 0.2:
+            blocks.insert(0, {"type": "heading", "attrs": {"level": 3}, "content": [self.text()]})
+        if self.shape.list_depth and self.rng.random() < 0.5:
+            blocks.append(self.bullet_list(self.shape.list_depth))
+        return self.doc(*blocks)
+
+    @staticmethod
+    def doc(*blocks: dict) -> dict:
+        return {"type": "doc", "content": list(blocks)}
+
+
+def _label(index: int) -> str:
+    """Return MCQ labels A, B, …, Z, AA, AB, …"""
+    label = ""
+    index += 1
+    while index:
+        index, rest = divmod(index - 1, 26)
+        label = chr(ord("A") + rest) + label
+    return label
@@ -1,31 +1,51 @@
-import { useState, useEffect, useCallback } from 'react'
+import { useState, useEffect, useCallback, useRef } from 'react'
 import { toast } from 'sonner'
 import Layout from './components/Layout'
 import PaperEditor from './components/PaperEditor'
-import { createEmptyPaper, listPapers, getPaper, savePaper, deletePaper } from './api'
+import { ConflictError, createEmptyPaper, listPapers, getPaper, savePaper, patchPaper, diffPaper, deletePaper } from './api'
 import type { Paper, PaperSummary } from './types'
 
 export default function App() {
   const [paper, setPaper] = useState<Paper>(createEmptyPaper)
   const [summaries, setSummaries] = useState<PaperSummary[]>([])
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
   const [loading, setLoading] = useState(false)
+  // Last version known to be stored on the server; autosave sends only the diff
+  const lastSaved = useRef<Paper | null>(null)
 
   const refreshList = useCallback(async () => {
     try {
-      setSummaries(await listPapers())
+      const page = await listPapers()
+      setSummaries(page.items)
+      setNextCursor(page.nextCursor)
     } catch {
       // first load may fail in dev before backend is up
     }
   }, [])
 
+  const loadMore = async () => {
+    try {
+      const page = await listPapers(nextCursor)
+      setSummaries((current) => [...current, ...page.items])
+      setNextCursor(page.nextCursor)
+    } catch (e) {
+      toast.error(`Failed to load papers: ${e}`)
+    }
+  }
+
   useEffect(() => { refreshList() }, [refreshList])
 
-  const handleNew = () => setPaper(createEmptyPaper())
+  const handleNew = () => {
+    lastSaved.current = null
+    setPaper(createEmptyPaper())
+  }
 
   const handleLoad = async (id: string) => {
     setLoading(true)
     try {
-      setPaper(await getPaper(id))
+      const loaded = await getPaper(id)
+      lastSaved.current = loaded
+      setPaper(loaded)
     } catch (e) {
       toast.error(`Failed to load paper: ${e}`)
     } finally {
@@ -36,6 +56,7 @@ export default function App() {
   const handleSave = useCallback(async (p: Paper) => {
     try {
       const saved = await savePaper(p)
+      lastSaved.current = saved
       setPaper(saved)
       await refreshList()
       toast.success('Paper saved')
@@ -44,10 +65,32 @@ export default function App() {
     }
   }, [refreshList])
 
-  // Auto-save every 30 seconds
+  // Auto-save every 30 seconds: a JSON Patch of what changed, else a full save
   useEffect(() => {
     const interval = setInterval(() => {
-      savePaper(paper).then(() => refreshList()).catch(() => {})
+      const patch = lastSaved.current && diffPaper(lastSaved.current, paper)
+      if (patch && patch.length === 0) return
+      const save = patch ? patchPaper(paper.id, patch) : savePaper(paper)
+      save
+        .then(() => {
+          lastSaved.current = paper
+          return refreshList()
+        })
+        .catch(async (e) => {
+          if (!(e instanceof ConflictError)) {
+            toast.error(`Auto-save failed: ${e}`)
+            return
+          }
+          // Someone else saved first: take their version rather than retrying over it
+          toast.error('This paper was changed elsewhere; reloaded the latest version.')
+          try {
+            const latest = await getPaper(paper.id)
+            lastSaved.current = latest
+            setPaper(latest)
+          } catch (reload) {
+            toast.error(`Failed to load paper: ${reload}`)
+          }
+        })
     }, 30_000)
     return () => clearInterval(interval)
   }, [paper, refreshList])
@@ -66,6 +109,7 @@ export default function App() {
   return (
     <Layout
       summaries={summaries}
+      onLoadMore={nextCursor ? loadMore : undefined}
       currentPaperId={paper.id}
       onNew={handleNew}
       onLoad={handleLoad}
@@ -1,5 +1,5 @@
 import { v4 as uuidv4 } from 'uuid'
-import type { Paper, PaperSummary, Template, TemplateSummary, Question, MCQQuestion } from './types'
+import type { Paper, PaperSummary, Template, TemplateSummary, Question, MCQQuestion, SearchHit } from './types'
 
 // ── Factories ────────────────────────────────────────────────────────────────
 
@@ -59,28 +59,139 @@ async function request<T>(path: string, init?: RequestInit): Promise<T> {
   return res.json() as Promise<T>
 }
 
+/** One page of a listing; pass `nextCursor` back to fetch the following page. */
+export interface Page<T> {
+  items: T[]
+  nextCursor: string | null
+}
+
+async function requestPage<T>(path: string): Promise<Page<T>> {
+  const res = await fetch(path)
+  if (!res.ok) {
+    const body = await res.json().catch(() => ({})) as Record<string, unknown>
+    throw new Error(String(body['detail'] ?? `HTTP ${res.status}`))
+  }
+  return { items: await res.json() as T[], nextCursor: res.headers.get('X-Next-Cursor') }
+}
+
 // ── Papers ───────────────────────────────────────────────────────────────────
 
-export const listPapers = (): Promise<PaperSummary[]> =>
-  request('/api/papers')
+/** Last ETag seen per paper id, sent back as If-Match so a stale save gets 412. */
+const paperEtags = new Map<string, string>()
+
+/** A paper write rejected because the stored paper moved on (409 or 412). */
+export class ConflictError extends Error {
+  readonly status: number
+
+  constructor(message: string, status: number) {
+    super(message)
+    this.name = 'ConflictError'
+    this.status = status
+  }
+}
+
+async function paperRequest<T = Paper>(id: string, path: string, init: RequestInit = {}): Promise<T> {
+  const headers = new Headers(init.headers)
+  const etag = paperEtags.get(id)
+  if (etag && init.method) headers.set('If-Match', etag)
+  const res = await fetch(path, { ...init, headers })
+  if (!res.ok) {
+    const body = await res.json().catch(() => ({})) as Record<string, unknown>
+    if (res.status === 409 || res.status === 412) {
+      throw new ConflictError(String(body['detail'] ?? 'This paper was changed elsewhere; reload it.'), res.status)
+    }
+    throw new Error(String(body['detail'] ?? `HTTP ${res.status}`))
+  }
+  const newEtag = res.headers.get('ETag')
+  if (newEtag) paperEtags.set(id, newEtag)
+  return res.json() as Promise<T>
+}
+
+export const listPapers = (cursor?: string | null): Promise<Page<PaperSummary>> =>
+  requestPage(`/api/papers${cursor ? `?cursor=${encodeURIComponent(cursor)}` : ''}`)
 
 export const getPaper = (id: string): Promise<Paper> =>
-  request(`/api/papers/${id}`)
+  paperRequest(id, `/api/papers/${id}`)
 
 export const savePaper = (paper: Paper): Promise<Paper> =>
-  request('/api/papers', {
+  paperRequest(paper.id, '/api/papers', {
     method: 'POST',
     headers: { 'Content-Type': 'application/json' },
     body: JSON.stringify(paper),
   })
 
-export const deletePaper = (id: string): Promise<void> =>
-  request(`/api/papers/${id}`, { method: 'DELETE' })
+export type JsonPatchOp = { op: 'replace'; path: string; value: unknown }
+
+/**
+ * JSON Patch turning `saved` into `paper`: one `replace` per changed header,
+ * style or question. Returns null when questions were added, removed or
+ * reordered, which needs a full save.
+ */
+export function diffPaper(saved: Paper, paper: Paper): JsonPatchOp[] | null {
+  if (saved.id !== paper.id) return null
+  if (saved.questions.map((q) => q.id).join() !== paper.questions.map((q) => q.id).join()) return null
+  const changed = (a: unknown, b: unknown) => JSON.stringify(a) !== JSON.stringify(b)
+  const patch: JsonPatchOp[] = []
+  if (changed(saved.header, paper.header)) patch.push({ op: 'replace', path: '/header', value: paper.header })
+  if (changed(saved.style, paper.style)) patch.push({ op: 'replace', path: '/style', value: paper.style })
+  paper.questions.forEach((q, i) => {
+    if (changed(saved.questions[i], q)) patch.push({ op: 'replace', path: `/questions/${i}`, value: q })
+  })
+  return patch
+}
+
+export const patchPaper = (id: string, patch: JsonPatchOp[]): Promise<Paper> =>
+  paperRequest(id, `/api/papers/${id}`, {
+    method: 'PATCH',
+    headers: { 'Content-Type': 'application/json-patch+json' },
+    body: JSON.stringify(patch),
+  })
+
+export const deletePaper = (id: string): Promise<void> => {
+  paperEtags.delete(id)
+  return request(`/api/papers/${id}`, { method: 'DELETE' })
+}
+
+// ── Questions ────────────────────────────────────────────────────────────────
+
+export const putQuestion = (paperId: string, question: Question, index?: number): Promise<Question> =>
+  paperRequest<Question>(paperId, `/api/papers/${paperId}/questions/${question.id}${index === undefined ? '' : `?index=${index}`}`, {
+    method: 'PUT',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(question),
+  })
+
+export const deleteQuestion = async (paperId: string, questionId: string): Promise<void> => {
+  await paperRequest(paperId, `/api/papers/${paperId}/questions/${questionId}`, { method: 'DELETE' })
+}
+
+export const reorderQuestions = (paperId: string, order: string[]): Promise<{ order: string[] }> =>
+  paperRequest<{ order: string[] }>(paperId, `/api/papers/${paperId}/question-order`, {
+    method: 'PUT',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ order }),
+  })
+
+// ── Search ───────────────────────────────────────────────────────────────────
+
+export const searchQuestions = (q: string, limit = 20): Promise<SearchHit[]> =>
+  request(`/api/search?q=${encodeURIComponent(q)}&limit=${limit}`)
 
 // ── Templates ────────────────────────────────────────────────────────────────
 
-export const listTemplates = (): Promise<TemplateSummary[]> =>
-  request('/api/templates')
+/** Every template summary, following the listing's cursor to the last page. */
+export async function listTemplates(): Promise<TemplateSummary[]> {
+  const summaries: TemplateSummary[] = []
+  let cursor: string | null = null
+  do {
+    const page: Page<TemplateSummary> = await requestPage(
+      `/api/templates?limit=500${cursor ? `&cursor=${encodeURIComponent(cursor)}` : ''}`,
+    )
+    summaries.push(...page.items)
+    cursor = page.nextCursor
+  } while (cursor)
+  return summaries
+}
 
 export const getTemplate = (id: string): Promise<Template> =>
   request(`/api/templates/${id}`)
@@ -97,44 +208,46 @@ export const deleteTemplate = (id: string): Promise<void> =>
 
 // ── Export ───────────────────────────────────────────────────────────────────
 
-export async function exportPaper(paper: Paper): Promise<void> {
-  const res = await fetch('/api/papers/export', {
-    method: 'POST',
-    headers: { 'Content-Type': 'application/json' },
-    body: JSON.stringify(paper),
-  })
-  if (!res.ok) {
-    const body = await res.json().catch(() => ({})) as Record<string, unknown>
-    throw new Error(String(body['detail'] ?? 'Export failed'))
-  }
-  const blob = await res.blob()
-  const url = URL.createObjectURL(blob)
-  const a = document.createElement('a')
-  a.href = url
-  a.download = `${paper.header.title || 'exam'}.docx`
-  a.click()
-  URL.revokeObjectURL(url)
-}
+// Last download per endpoint and paper. The server tags exports with a content
+// ETag, so re-exporting an unchanged paper comes back as an empty 304.
+const exportDownloads = new Map<string, { etag: string; blob: Blob }>()
 
-export async function exportAnswerKey(paper: Paper): Promise<void> {
-  const res = await fetch('/api/papers/export-answer-key', {
-    method: 'POST',
-    headers: { 'Content-Type': 'application/json' },
-    body: JSON.stringify(paper),
-  })
-  if (!res.ok) {
-    const body = await res.json().catch(() => ({})) as Record<string, unknown>
-    throw new Error(String(body['detail'] ?? 'Export failed'))
+async function downloadExport(path: string, paper: Paper, filename: string): Promise<void> {
+  const key = `${path}:${paper.id}`
+  const previous = exportDownloads.get(key)
+  const headers: Record<string, string> = { 'Content-Type': 'application/json' }
+  if (previous) headers['If-None-Match'] = previous.etag
+  const res = await fetch(path, { method: 'POST', headers, body: JSON.stringify(paper) })
+  let blob: Blob
+  if (res.status === 304 && previous) {
+    blob = previous.blob
+  } else {
+    if (!res.ok) {
+      const body = await res.json().catch(() => ({})) as Record<string, unknown>
+      throw new Error(String(body['detail'] ?? 'Export failed'))
+    }
+    blob = await res.blob()
+    const etag = res.headers.get('ETag')
+    if (etag) exportDownloads.set(key, { etag, blob })
   }
-  const blob = await res.blob()
   const url = URL.createObjectURL(blob)
   const a = document.createElement('a')
   a.href = url
-  a.download = `${paper.header.title || 'exam'}_answer_key.docx`
+  a.download = filename
   a.click()
   URL.revokeObjectURL(url)
 }
 
+export const exportPaper = (paper: Paper): Promise<void> =>
+  downloadExport('/api/papers/export', paper, `${paper.header.title || 'exam'}.docx`)
+
+export const exportAnswerKey = (paper: Paper): Promise<void> =>
+  downloadExport(
+    '/api/papers/export-answer-key',
+    paper,
+    `${paper.header.title || 'exam'}_answer_key.docx`,
+  )
+
 // ── Image upload ─────────────────────────────────────────────────────────────
 
 export async function uploadImage(file: File): Promise<string> {
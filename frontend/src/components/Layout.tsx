@@ -4,6 +4,7 @@ import type { PaperSummary } from '../types'
 
 interface Props {
   summaries: PaperSummary[]
+  onLoadMore?: () => void
   currentPaperId: string
   onNew: () => void
   onLoad: (id: string) => void
@@ -11,11 +12,12 @@ interface Props {
   children: ReactNode
 }
 
-export default function Layout({ summaries, currentPaperId, onNew, onLoad, onDelete, children }: Props) {
+export default function Layout({ summaries, onLoadMore, currentPaperId, onNew, onLoad, onDelete, children }: Props) {
   return (
     <div className="flex h-screen bg-gray-50 font-sans">
       <Sidebar
         summaries={summaries}
+        onLoadMore={onLoadMore}
         currentPaperId={currentPaperId}
         onNew={onNew}
         onLoad={onLoad}
@@ -1,15 +1,32 @@
-import { FilePlus, FileText, Trash2 } from 'lucide-react'
-import type { PaperSummary } from '../types'
+import { useEffect, useState } from 'react'
+import { FilePlus, FileText, Search, Trash2 } from 'lucide-react'
+import { searchQuestions } from '../api'
+import type { PaperSummary, SearchHit } from '../types'
 
 interface Props {
   summaries: PaperSummary[]
+  /** Fetches the next page of summaries; absent when all are loaded. */
+  onLoadMore?: () => void
   currentPaperId: string
   onNew: () => void
   onLoad: (id: string) => void
   onDelete: (id: string) => void
 }
 
-export default function Sidebar({ summaries, currentPaperId, onNew, onLoad, onDelete }: Props) {
+export default function Sidebar({ summaries, onLoadMore, currentPaperId, onNew, onLoad, onDelete }: Props) {
+  const [query, setQuery] = useState('')
+  const [hits, setHits] = useState<SearchHit[] | null>(null)
+
+  // Search questions across all papers, debounced while typing
+  useEffect(() => {
+    const q = query.trim()
+    if (!q) { setHits(null); return }
+    const timer = setTimeout(() => {
+      searchQuestions(q).then(setHits).catch(() => setHits([]))
+    }, 250)
+    return () => clearTimeout(timer)
+  }, [query])
+
   return (
     <aside className="w-64 shrink-0 border-r border-gray-200 bg-white flex flex-col">
       <div className="p-4 border-b border-gray-200">
@@ -26,32 +43,70 @@ export default function Sidebar({ summaries, currentPaperId, onNew, onLoad, onDe
         </button>
       </div>
 
-      <div className="flex-1 overflow-y-auto p-3 space-y-1">
-        {summaries.length === 0 && (
-          <p className="text-xs text-gray-400 text-center py-4">No saved papers yet</p>
-        )}
-        {summaries.map((s) => (
-          <div
-            key={s.id}
-            className={`group flex items-start gap-2 px-3 py-2 rounded-lg cursor-pointer transition-colors ${
-              s.id === currentPaperId ? 'bg-blue-50 text-blue-700' : 'hover:bg-gray-50 text-gray-700'
-            }`}
-            onClick={() => onLoad(s.id)}
-          >
-            <FileText size={16} className="mt-0.5 shrink-0" />
-            <div className="flex-1 min-w-0">
-              <div className="text-sm font-medium truncate">{s.title || 'Untitled'}</div>
-              <div className="text-xs text-gray-400 truncate">{s.subject}</div>
+      <div className="px-3">
+        <label className="flex items-center gap-2 px-3 py-2 rounded-lg border border-gray-200 text-sm text-gray-500">
+          <Search size={14} />
+          <input
+            value={query}
+            onChange={(e) => setQuery(e.target.value)}
+            placeholder="Search questions"
+            className="w-full bg-transparent outline-none text-gray-700"
+          />
+        </label>
+      </div>
+
+      {hits !== null ? (
+        <div className="flex-1 overflow-y-auto p-3 space-y-1">
+          {hits.length === 0 && (
+            <p className="text-xs text-gray-400 text-center py-4">No matching questions</p>
+          )}
+          {hits.map((h) => (
+            <div
+              key={`${h.paper_id}/${h.question_id}`}
+              className="px-3 py-2 rounded-lg cursor-pointer hover:bg-gray-50 text-gray-700"
+              onClick={() => onLoad(h.paper_id)}
+            >
+              <div className="text-sm font-medium truncate">{h.paper_title} · Q{h.position + 1}</div>
+              <div className="text-xs text-gray-400 line-clamp-2">{h.snippet}</div>
+            </div>
+          ))}
+        </div>
+      ) : (
+        <div className="flex-1 overflow-y-auto p-3 space-y-1">
+          {summaries.length === 0 && (
+            <p className="text-xs text-gray-400 text-center py-4">No saved papers yet</p>
+          )}
+          {summaries.map((s) => (
+            <div
+              key={s.id}
+              className={`group flex items-start gap-2 px-3 py-2 rounded-lg cursor-pointer transition-colors ${
+                s.id === currentPaperId ? 'bg-blue-50 text-blue-700' : 'hover:bg-gray-50 text-gray-700'
+              }`}
+              onClick={() => onLoad(s.id)}
+            >
+              <FileText size={16} className="mt-0.5 shrink-0" />
+              <div className="flex-1 min-w-0">
+                <div className="text-sm font-medium truncate">{s.title || 'Untitled'}</div>
+                <div className="text-xs text-gray-400 truncate">{s.subject}</div>
+              </div>
+              <button
+                onClick={(e) => { e.stopPropagation(); onDelete(s.id) }}
+                className="shrink-0 opacity-0 group-hover:opacity-100 text-gray-400 hover:text-red-500 transition-all"
+              >
+                <Trash2 size={14} />
+              </button>
             </div>
+          ))}
+          {onLoadMore && (
             <button
-              onClick={(e) => { e.stopPropagation(); onDelete(s.id) }}
-              className="shrink-0 opacity-0 group-hover:opacity-100 text-gray-400 hover:text-red-500 transition-all"
+              onClick={onLoadMore}
+              className="w-full px-3 py-2 text-xs text-gray-500 hover:text-gray-700 transition-colors"
             >
-              <Trash2 size={14} />
+              Load more
             </button>
-          </div>
-        ))}
-      </div>
+          )}
+        </div>
+      )}
     </aside>
   )
 }
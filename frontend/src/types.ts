@@ -92,3 +92,13 @@ export interface TemplateSummary {
   name: string
   created_at: string
 }
+
+export interface SearchHit {
+  paper_id: string
+  paper_title: string
+  question_id: string
+  question_type: Question['type']
+  position: number
+  snippet: string
+  score: number
+}
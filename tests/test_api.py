@@ -4,6 +4,7 @@ import io
 import struct
 import zlib
 
+import pytest
 from fastapi.testclient import TestClient
 
 from backend.main import app
@@ -88,6 +89,49 @@ def test_upload_rejects_oversized_file() -> None:
     assert "large" in response.json()["detail"].lower()
 
 
+def test_upload_streamed_in_chunks_round_trips(monkeypatch) -> None:
+    import backend.routers.uploads as uploads
+
+    monkeypatch.setattr(uploads, "CHUNK_BYTES", 7)
+    png = _make_png()
+    filename = client.post(
+        "/api/uploads/image", files={"file": ("p.png", io.BytesIO(png), "image/png")}
+    ).json()["filename"]
+    assert client.get(f"/api/uploads/{filename}").content == png
+
+
+def test_rejected_upload_leaves_no_files(temp_data_dir) -> None:
+    client.post(
+        "/api/uploads/image",
+        files={"file": ("evil.png", io.BytesIO(b"not a png"), "image/png")},
+    )
+    assert list((temp_data_dir / "uploads").iterdir()) == []
+
+
+async def test_stream_aborts_once_size_cap_exceeded(temp_data_dir, monkeypatch) -> None:
+    from fastapi import HTTPException, UploadFile
+
+    import backend.routers.uploads as uploads
+
+    monkeypatch.setattr(uploads, "MAX_UPLOAD_BYTES", 64)
+    monkeypatch.setattr(uploads, "CHUNK_BYTES", 16)
+    reads: list[int] = []
+    body = io.BytesIO(b"\x89PNG\r\n\x1a\n" + b"X" * 10_000)
+    original_read = body.read
+    body.read = lambda n=-1: reads.append(n) or original_read(n)  # type: ignore[method-assign]
+
+    dest = temp_data_dir / "uploads" / ".partial.part"
+    with pytest.raises(HTTPException) as exc_info:
+        await uploads._stream_to_disk(UploadFile(body), "image/png", dest)
+    assert "large" in exc_info.value.detail.lower()
+    assert len(reads) <= 64 // 16 + 1  # stopped early, not after 10 KB
+    assert not dest.exists()
+
+
+def test_get_partial_upload_refused() -> None:
+    assert client.get("/api/uploads/.abc.png.part").status_code == 400
+
+
 def test_get_uploaded_image() -> None:
     upload = client.post(
         "/api/uploads/image",
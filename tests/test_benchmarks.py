@@ -0,0 +1,94 @@
+"""Tests for the benchmark corpus generator and the export and table benchmark harnesses."""
+
+import pytest
+from docx.table import Table
+
+from backend.docx_builder import tables
+from backend.docx_builder.builder import build_docx
+from benchmarks.bench_export import compare, percentile, run_suite
+from benchmarks.bench_tables import render as render_table
+from benchmarks.bench_tables import run as run_tables
+from benchmarks.bench_tables import table_node
+from benchmarks.corpus import PROFILES, generate_paper, write_uploads
+
+
+def _content(paper) -> dict:
+    return paper.model_dump(exclude={"id", "created_at", "updated_at"})
+
+
+@pytest.mark.parametrize("profile", sorted(PROFILES))
+def test_profiles_are_deterministic_and_build(profile, temp_data_dir) -> None:
+    uploads = write_uploads(temp_data_dir / "uploads", 2, size=(40, 30))
+    paper = generate_paper(profile, seed=3, scale=0.1, uploads=uploads)
+    assert _content(paper) == _content(generate_paper(profile, seed=3, scale=0.1, uploads=uploads))
+    assert _content(paper) != _content(generate_paper(profile, seed=4, scale=0.1, uploads=uploads))
+    assert build_docx(paper)[:2] == b"PK"
+
+
+def test_pathological_profiles_stress_their_dimension() -> None:
+    tables = generate_paper("big-tables").questions[0].content["content"][1]
+    assert len(tables["content"]) == 50 and len(tables["content"][0]["content"]) == 50
+    assert {len(q.options) for q in generate_paper("long-mcq").questions} == {40}
+    assert len(generate_paper("many-questions").questions) == 500
+
+
+def test_percentile_interpolates() -> None:
+    assert percentile([4.0, 1.0, 3.0, 2.0], 50) == 2.5
+    assert percentile([1.0, 2.0], 99) == pytest.approx(1.99)
+    assert percentile([7.0], 90) == 7.0
+
+
+def test_compare_flags_only_real_regressions() -> None:
+    baseline = {"results": {
+        "a/build": {"p50_ms": 100.0, "peak_mb": 10.0},
+        "a/tiny": {"p50_ms": 0.1, "peak_mb": 0.01},
+        "a/gone": {"p50_ms": 1.0, "peak_mb": 1.0},
+    }}
+    current = {"results": {
+        "a/build": {"p50_ms": 140.0, "peak_mb": 10.5},
+        "a/tiny": {"p50_ms": 0.3, "peak_mb": 0.02},  # 3x, but below the noise floor
+        "a/new": {"p50_ms": 5.0, "peak_mb": 1.0},
+    }}
+    assert compare(baseline, current, 0.25) == ["a/build: p50_ms 100 -> 140 (+40%)"]
+    assert compare(baseline, current, 0.5) == []
+
+
+def test_suite_runs_every_case(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("EXPORT_EXECUTOR", "thread")
+    report = run_suite(
+        ["realistic"], repeat=1, scale=0.05, seed=1, papers=3, upload_size=(40, 30), log=lambda line: None
+    )
+    assert report["meta"]["scale"] == 0.05
+    assert {"realistic/build_docx_cold", "realistic/http_export_warm", "listing/http_list_papers"} <= set(report["results"])
+    result = report["results"]["realistic/build_docx_cold"]
+    assert result["output_bytes"] > 0 and result["ops_per_s"] > 0
+    assert result["p50_ms"] <= result["p99_ms"] <= result["max_ms"]
+
+
+def test_table_rendering_does_linear_work_per_cell(monkeypatch: pytest.MonkeyPatch) -> None:
+    # Wall-clock ratios are left to the benchmark; count the work instead.
+    calls = {"grid": 0, "cells": 0}
+    grid = Table._cells
+
+    def counting_grid(table):
+        calls["grid"] += 1
+        return grid.fget(table)
+
+    deepcopy = tables.copy.deepcopy
+
+    def counting_copy(tc):
+        calls["cells"] += 1
+        return deepcopy(tc)
+
+    monkeypatch.setattr(Table, "_cells", property(counting_grid))
+    monkeypatch.setattr(tables.copy, "deepcopy", counting_copy)
+    for rows in (25, 100):
+        calls.update(grid=0, cells=0)
+        render_table(table_node(rows, 20))
+        assert calls == {"grid": 0, "cells": rows * 20}  # one copied w:tc per cell, no grid rebuilds
+
+
+def test_table_benchmark_reports_legacy_timings_for_small_tables() -> None:
+    small, large = run_tables([2, 4], cols=3, repeat=1, legacy_max_rows=2)
+    assert (small["cells"], large["cells"]) == (6, 12)
+    assert "legacy_ms" in small and "legacy_ms" not in large
@@ -0,0 +1,82 @@
+"""Load test: the event loop keeps serving while exports and storage I/O run."""
+
+import asyncio
+import statistics
+import threading
+import time
+
+import httpx
+import pytest
+
+from backend import export_cache, export_engine
+from backend.main import app
+
+_PAPER = {"header": {"title": "Load"}, "questions": [], "style": {}}
+_EXPORT_SECONDS = 0.4
+
+
+def _p99(samples: list[float]) -> float:
+    return statistics.quantiles(samples, n=100)[98]
+
+
+async def _health_latencies(client: httpx.AsyncClient, count: int) -> list[float]:
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        response = await client.get("/api/health")
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code == 200
+        await asyncio.sleep(0.005)
+    return latencies
+
+
+@pytest.fixture
+def slow_build(monkeypatch: pytest.MonkeyPatch):
+    """Replace the builder with one that blocks its thread like a large export."""
+
+    def build(paper) -> bytes:
+        time.sleep(_EXPORT_SECONDS)
+        return b"docx"
+
+    monkeypatch.setitem(export_cache.BUILDERS, "paper", build)
+    monkeypatch.setenv("EXPORT_EXECUTOR", "thread")
+    monkeypatch.setenv("EXPORT_WORKERS", "4")
+    export_engine.shutdown_engine()
+    yield
+    export_engine.shutdown_engine()
+
+
+async def test_health_p99_flat_while_exports_run(slow_build) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        idle = await _health_latencies(client, 40)
+
+        exports = [
+            asyncio.create_task(client.post("/api/papers/export", json=_PAPER)) for _ in range(8)
+        ]
+        await asyncio.sleep(0.02)  # let the exports start
+        loaded = await _health_latencies(client, 40)
+        responses = await asyncio.gather(*exports)
+
+    assert all(r.status_code == 200 for r in responses)
+    # A blocked loop would push health checks towards the export duration.
+    assert _p99(loaded) < _p99(idle) + 0.1
+    assert _p99(loaded) < _EXPORT_SECONDS / 4
+
+
+async def test_storage_calls_run_on_io_pool(monkeypatch: pytest.MonkeyPatch) -> None:
+    import backend.storage as storage
+
+    seen: list[str] = []
+    original = storage.get_backend
+
+    def spy():
+        seen.append(threading.current_thread().name)
+        return original()
+
+    monkeypatch.setattr(storage, "get_backend", spy)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        assert (await client.get("/api/papers")).status_code == 200
+    assert seen and all(name.startswith("storage-io") for name in seen)
+
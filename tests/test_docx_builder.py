@@ -5,12 +5,16 @@ Tests drive the builder to handle all question types,
 styling, and edge cases.
 """
 
+import os
 import struct
 import zlib
 from io import BytesIO
 
 import pytest
 from docx import Document as DocxDocument
+from docx.image.image import Image as DocxImage
+from docx.oxml.ns import qn
+from docx.shared import Inches
 
 from backend.models import (
     ImageQuestion,
@@ -23,6 +27,7 @@ from backend.models import (
     TextQuestion,
 )
 from backend.docx_builder.builder import build_docx, build_answer_key
+from backend.docx_builder.pictures import add_picture, relate_image
 
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
@@ -125,6 +130,16 @@ def test_text_question_shows_section_heading() -> None:
     assert "Section A" in _full_text(_open(build_docx(paper)))
 
 
+def test_tiptap_heading_levels_map_to_builtin_styles() -> None:
+    content = {"type": "doc", "content": [
+        {"type": "heading", "attrs": {"level": level}, "content": [{"type": "text", "text": f"h{level}"}]}
+        for level in (0, 2, 12)
+    ]}
+    doc = _open(build_docx(Paper(questions=[TextQuestion(content=content)])))
+    styles = {p.text: p.style.name for p in doc.paragraphs}
+    assert (styles["h0"], styles["h2"], styles["h12"]) == ("Title", "Heading 2", "Heading 9")
+
+
 def test_multiple_text_questions_numbered() -> None:
     paper = Paper(
         questions=[
@@ -221,6 +236,68 @@ def test_table_question_produces_table_in_docx() -> None:
     assert doc.tables[0].cell(1, 1).text == "Cell B"
 
 
+def _cell(text: str, kind: str = "tableCell", **attrs) -> dict:
+    return {"type": kind, "attrs": attrs, "content": [_tiptap_para(text)["content"][0]]}
+
+
+def _table_doc(*rows: list[dict]) -> dict:
+    return {"type": "doc", "content": [
+        {"type": "table", "content": [{"type": "tableRow", "content": list(row)} for row in rows]},
+    ]}
+
+
+def _build_table(content: dict):
+    return _open(build_docx(Paper(questions=[TableQuestion(content=content)]))).tables[0]
+
+
+def test_table_spans_become_grid_spans_and_vertical_merges() -> None:
+    table = _build_table(_table_doc(
+        [_cell("A", rowspan=2), _cell("B", colspan=2)],
+        [_cell("C"), _cell("D")],
+        [_cell("E"), _cell("F"), _cell("G")],
+    ))
+    assert [[c.text for c in row.cells] for row in table.rows] == [
+        ["A", "B", "B"],
+        ["A", "C", "D"],
+        ["E", "F", "G"],
+    ]
+    assert table.cell(0, 0)._tc is table.cell(1, 0)._tc  # one merged cell
+    assert table.cell(0, 1)._tc is table.cell(0, 2)._tc
+
+
+def test_table_header_rows_repeat_and_are_bold() -> None:
+    table = _build_table(_table_doc(
+        [_cell("Name", "tableHeader"), _cell("Score", "tableHeader")],
+        [_cell("Ada"), _cell("10")],
+    ))
+    header, body = table.rows
+    assert header._tr.trPr is not None and header._tr.trPr.find(qn("w:tblHeader")) is not None
+    assert body._tr.trPr is None
+    assert header.cells[0].paragraphs[0].runs[0].bold
+    assert not body.cells[0].paragraphs[0].runs[0].bold
+
+
+def test_table_cells_keep_rich_content() -> None:
+    rich = {"type": "tableCell", "content": [
+        {"type": "paragraph", "content": [{"type": "text", "text": "slanted", "marks": [{"type": "italic"}]}]},
+        {"type": "bulletList", "content": [{"type": "listItem", "content": [_tiptap_para("point")["content"][0]]}]},
+        _table_doc([_cell("inner")])["content"][0],
+    ]}
+    cell = _build_table(_table_doc([rich, _cell("plain")])).cell(0, 0)
+    assert cell.paragraphs[0].runs[0].italic
+    assert cell.paragraphs[1].text == "point" and cell.paragraphs[1].style.name == "List Bullet"
+    assert cell.tables[0].cell(0, 0).text == "inner"
+    assert cell._tc[-1].tag == qn("w:p")  # Word requires a cell to end with a paragraph
+
+
+def test_table_ragged_rows_and_bad_spans_are_padded() -> None:
+    table = _build_table(_table_doc(
+        [_cell("A"), _cell("B"), _cell("C", colspan="x")],
+        [_cell("D", rowspan=0)],
+    ))
+    assert [[c.text for c in row.cells] for row in table.rows] == [["A", "B", "C"], ["D", "", ""]]
+
+
 # ── Image question ────────────────────────────────────────────────────────────
 
 
@@ -332,7 +409,6 @@ def test_answer_key_returns_bytes() -> None:
 
 
 def test_page_margins_applied() -> None:
-    from docx.shared import Inches
     style = PaperStyle(margin_top=1.5, margin_bottom=1.5, margin_left=2.0, margin_right=2.0)
     paper = Paper(style=style)
     doc = _open(build_docx(paper))
@@ -355,3 +431,144 @@ def test_footer_text_applied() -> None:
     doc = _open(build_docx(paper))
     footer_text = " ".join(p.text for p in doc.sections[0].footer.paragraphs)
     assert "Page 1" in footer_text
+
+
+# ── Fragment cache ────────────────────────────────────────────────────────────
+
+
+def _png_bytes() -> bytes:
+    def chunk(name: bytes, data: bytes) -> bytes:
+        return (struct.pack(">I", len(data)) + name + data
+                + struct.pack(">I", zlib.crc32(name + data) & 0xFFFFFFFF))
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", 1, 1, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(b"\x00\xff\xff\xff"))
+            + chunk(b"IEND", b""))
+
+
+@pytest.fixture
+def fragment_cache():
+    from backend.docx_builder.fragments import get_fragment_cache
+
+    cache = get_fragment_cache()
+    cache.clear()
+    yield cache
+    cache.clear()
+
+
+def test_rebuild_splices_every_question_from_cache(fragment_cache) -> None:
+    paper = Paper(questions=[
+        TextQuestion(section="A", marks=2, content=_tiptap_para("First")),
+        MCQQuestion(section="A", stem=_tiptap_para("Pick"), options=[MCQOption(label="A", text="x")]),
+        TextQuestion(section="B", content=_tiptap_para("Third")),
+    ])
+    cold = _open(build_docx(paper))
+    assert fragment_cache.stats()["misses"] == 3
+
+    warm = _open(build_docx(paper))
+    assert fragment_cache.stats()["hits"] == 3
+    assert _para_text(warm) == _para_text(cold)
+    assert [p.style.name for p in warm.paragraphs] == [p.style.name for p in cold.paragraphs]
+
+
+def test_only_edited_question_is_rendered_again(fragment_cache) -> None:
+    questions = [TextQuestion(content=_tiptap_para(f"Question {n}")) for n in range(5)]
+    build_docx(Paper(questions=questions))
+    questions[2] = TextQuestion(id=questions[2].id, content=_tiptap_para("Edited"))
+    doc = _open(build_docx(Paper(questions=questions)))
+    stats = fragment_cache.stats()
+    assert stats["misses"] == 5 + 1
+    assert stats["hits"] == 4
+    assert "Edited" in _full_text(doc)
+    assert "Question 2" not in _full_text(doc)
+
+
+def test_renumbering_changes_the_fragment(fragment_cache) -> None:
+    q = TextQuestion(content=_tiptap_para("Moves"))
+    build_docx(Paper(questions=[q]))
+    doc = _open(build_docx(Paper(questions=[TextQuestion(content=_tiptap_para("New")), q])))
+    assert "Q2." in _full_text(doc)
+    assert fragment_cache.stats()["hits"] == 0
+
+
+def test_spliced_images_are_remapped(fragment_cache, temp_data_dir) -> None:
+    (temp_data_dir / "uploads" / "fig.png").write_bytes(_png_bytes())
+    inline = {"type": "doc", "content": [{"type": "paragraph", "content": [
+        {"type": "image", "attrs": {"src": "/api/uploads/fig.png"}}]}]}
+    image_q = ImageQuestion(filename="fig.png", caption="Figure")
+    text_q = TextQuestion(content=inline)
+    build_docx(Paper(questions=[image_q, text_q]))
+
+    # A different paper reusing both questions at the same positions
+    other = Paper(header=PaperHeader(title="Other"), questions=[image_q, text_q])
+    doc = _open(build_docx(other))
+    assert fragment_cache.stats()["hits"] == 2
+
+    body = doc.element.body
+    embeds = body.xpath(".//a:blip/@r:embed")
+    assert len(embeds) == 2
+    for r_id in embeds:
+        assert doc.part.related_parts[r_id].content_type == "image/png"
+    ids = body.xpath(".//wp:docPr/@id")
+    assert len(ids) == len(set(ids))
+
+
+# ── Image cache ───────────────────────────────────────────────────────────────
+
+
+@pytest.fixture
+def image_cache():
+    from backend.docx_builder.pictures import get_image_cache
+
+    cache = get_image_cache()
+    cache.clear()
+    yield cache
+    cache.clear()
+
+
+def _inline_image(name: str) -> dict:
+    return {"type": "image", "attrs": {"src": f"/api/uploads/{name}"}}
+
+
+def test_logo_parsed_once_across_exports(image_cache, fragment_cache, temp_data_dir) -> None:
+    (temp_data_dir / "uploads" / "logo.png").write_bytes(_png_bytes())
+    style = PaperStyle(logo_filename="logo.png")
+    build_docx(Paper(header=PaperHeader(title="One"), style=style))
+    doc = _open(build_docx(Paper(header=PaperHeader(title="Two"), style=style)))
+    assert image_cache.stats() == {"entries": 1, "bytes": len(_png_bytes()), "hits": 1, "misses": 1}
+    assert len(doc.inline_shapes) == 1
+
+
+def test_repeated_inline_image_shares_one_part(image_cache, fragment_cache, temp_data_dir) -> None:
+    (temp_data_dir / "uploads" / "fig.png").write_bytes(_png_bytes())
+    content = {"type": "doc", "content": [{"type": "paragraph", "content": [
+        _inline_image("fig.png"), _inline_image("fig.png")]}]}
+    doc = _open(build_docx(Paper(questions=[TextQuestion(content=content)])))
+    assert len(doc.inline_shapes) == 2
+    assert len({shape._inline.graphic.graphicData.pic.blipFill.blip.embed for shape in doc.inline_shapes}) == 1
+    media = [p for p in doc.part.package.parts if p.partname.startswith("/word/media/")]
+    assert len(media) == 1
+    assert image_cache.stats()["hits"] == 1
+    ids = doc.element.body.xpath(".//wp:docPr/@id")
+    assert len(ids) == len(set(ids))
+
+
+def test_changed_upload_is_parsed_again(image_cache, fragment_cache, temp_data_dir) -> None:
+    path = temp_data_dir / "uploads" / "fig.png"
+    path.write_bytes(_png_bytes())
+    paper = Paper(questions=[ImageQuestion(filename="fig.png")])
+    build_docx(paper)
+    os.utime(path, ns=(1, 1))
+    build_docx(paper)
+    assert image_cache.stats()["misses"] == 2
+
+
+def test_python_docx_image_part_internals() -> None:
+    """relate_image/add_picture use python-docx internals; fail loudly if an upgrade changes them."""
+    doc = DocxDocument()
+    image = DocxImage.from_blob(_png_bytes())
+    first = relate_image(doc.part, image)
+    assert relate_image(doc.part, image) == first
+    assert len(doc.part.package.image_parts) == 1
+    add_picture(doc.add_paragraph().add_run(), image, Inches(1))
+    assert len(doc.inline_shapes) == 1
@@ -0,0 +1,109 @@
+"""Tests for the streamed ZIP batch export."""
+
+import io
+import json
+import zipfile
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import export_cache, export_engine
+from backend.main import app
+from backend.routers.export_batch import BatchProgress, _stream_batch
+
+client = TestClient(app)
+
+
+def _save(title: str, answered: bool = False) -> str:
+    questions = []
+    if answered:
+        questions.append({
+            "type": "mcq",
+            "stem": {"type": "doc", "content": []},
+            "options": [{"label": "A", "text": "yes", "is_correct": True}],
+        })
+    response = client.post("/api/papers", json={"header": {"title": title}, "questions": questions})
+    return response.json()["id"]
+
+
+@pytest.fixture
+def thread_engine(monkeypatch: pytest.MonkeyPatch):
+    """Build in threads so monkeypatched builders are used."""
+    monkeypatch.setenv("EXPORT_EXECUTOR", "thread")
+    monkeypatch.setenv("EXPORT_WORKERS", "2")
+    export_engine.shutdown_engine()
+    yield
+    export_engine.shutdown_engine()
+
+
+def test_batch_zip_contains_papers_keys_and_manifest() -> None:
+    plain = _save("Algebra")
+    answered = _save("Biology", answered=True)
+    response = client.post("/api/papers/export-batch", json={"paper_ids": [plain, answered, plain]})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+
+    archive = zipfile.ZipFile(io.BytesIO(response.content))
+    assert sorted(archive.namelist()) == sorted([
+        f"Algebra_{plain[:8]}.docx",
+        f"Biology_{answered[:8]}.docx",
+        f"Biology_{answered[:8]}_answer_key.docx",
+        "manifest.json",
+    ])
+    assert archive.read(f"Algebra_{plain[:8]}.docx")[:2] == b"PK"
+    manifest = json.loads(archive.read("manifest.json"))
+    assert {p["paper_id"] for p in manifest["papers"]} == {plain, answered}
+
+
+def test_answer_keys_can_be_skipped() -> None:
+    answered = _save("Chemistry", answered=True)
+    response = client.post(
+        "/api/papers/export-batch", json={"paper_ids": [answered], "answer_keys": False}
+    )
+    names = zipfile.ZipFile(io.BytesIO(response.content)).namelist()
+    assert names == [f"Chemistry_{answered[:8]}.docx", "manifest.json"]
+
+
+def test_failing_papers_do_not_abort_batch(thread_engine, monkeypatch) -> None:
+    good = _save("Good")
+    broken = _save("Broken")
+    original = export_cache.BUILDERS["paper"]
+
+    def build(paper):
+        if paper.header.title == "Broken":
+            raise RuntimeError("boom")
+        return original(paper)
+
+    monkeypatch.setitem(export_cache.BUILDERS, "paper", build)
+    response = client.post(
+        "/api/papers/export-batch", json={"paper_ids": [broken, "missing", good]}
+    )
+    archive = zipfile.ZipFile(io.BytesIO(response.content))
+    assert f"Good_{good[:8]}.docx" in archive.namelist()
+    errors = {p["paper_id"]: p["errors"] for p in json.loads(archive.read("manifest.json"))["papers"]}
+    assert errors[good] == []
+    assert errors["missing"] == ["Paper not found."]
+    assert "boom" in errors[broken][0]
+
+    progress = client.get(f"/api/papers/export-batch/{response.headers['x-batch-id']}").json()
+    assert progress["state"] == "finished"
+    assert progress["papers_total"] == progress["papers_done"] == 3
+    assert progress["papers_failed"] == 2
+    assert progress["documents_written"] == 1
+
+
+async def test_archive_streamed_per_document() -> None:
+    ids = [_save(f"Paper {n}") for n in range(3)]
+    progress = BatchProgress(id="b", papers_total=3)
+    chunks = [chunk async for chunk in _stream_batch(progress, ids, answer_keys=False)]
+    assert len(chunks) == 4  # one per document, then manifest + central directory
+    assert all(chunks)
+    assert len(zipfile.ZipFile(io.BytesIO(b"".join(chunks))).namelist()) == 4
+
+
+def test_unknown_batch_returns_404() -> None:
+    assert client.get("/api/papers/export-batch/nope").status_code == 404
+
+
+def test_empty_batch_rejected() -> None:
+    assert client.post("/api/papers/export-batch", json={"paper_ids": []}).status_code == 422
@@ -0,0 +1,123 @@
+"""Tests for the content-addressed export cache and ETag handling."""
+
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import export_cache
+from backend.export_cache import ExportCache, export_key
+from backend.main import app
+from backend.models import ImageQuestion, Paper, PaperHeader
+
+client = TestClient(app)
+
+_PAYLOAD = {"header": {"title": "Cached"}, "questions": [], "style": {}}
+
+
+# ── Keys ──────────────────────────────────────────────────────────────────────
+
+
+def test_key_ignores_identity_and_timestamps() -> None:
+    a = Paper(header=PaperHeader(title="Same"))
+    b = Paper(header=PaperHeader(title="Same"), created_at="2020-01-01", updated_at="2021-01-01")
+    assert a.id != b.id
+    assert export_key(a, "paper") == export_key(b, "paper")
+
+
+def test_key_depends_on_content_kind_and_builder_version(monkeypatch) -> None:
+    paper = Paper(header=PaperHeader(title="One"))
+    key = export_key(paper, "paper")
+    assert export_key(Paper(header=PaperHeader(title="Two")), "paper") != key
+    assert export_key(paper, "answer_key") != key
+    monkeypatch.setattr(export_cache, "BUILDER_VERSION", "next")
+    assert export_key(paper, "paper") != key
+
+
+def test_key_tracks_referenced_uploads(temp_data_dir) -> None:
+    image = temp_data_dir / "uploads" / "fig.png"
+    image.write_bytes(b"v1")
+    paper = Paper(questions=[ImageQuestion(filename="fig.png")])
+    before = export_key(paper, "paper")
+    image.write_bytes(b"version2")
+    os.utime(image, ns=(1, 1))
+    assert export_key(paper, "paper") != before
+
+
+# ── Cache tiers ───────────────────────────────────────────────────────────────
+
+
+def test_memory_tier_evicts_least_recently_used(tmp_path) -> None:
+    cache = ExportCache(tmp_path, memory_bytes=10, disk_bytes=0)
+    cache.put("a", b"aaaa")
+    cache.put("b", b"bbbb")
+    assert cache.get("a") == b"aaaa"  # a is now most recent
+    cache.put("c", b"cccc")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"aaaa"
+    assert cache.get("c") == b"cccc"
+
+
+def test_disk_tier_survives_restart_and_is_bounded(tmp_path) -> None:
+    cache = ExportCache(tmp_path, memory_bytes=0, disk_bytes=25)
+    cache.put("old", b"x" * 10)
+    os.utime(tmp_path / "old.docx", ns=(1, 1))
+    cache.put("new", b"y" * 10)
+
+    restarted = ExportCache(tmp_path, memory_bytes=100, disk_bytes=25)
+    assert restarted.get("new") == b"y" * 10
+    restarted.put("newest", b"z" * 10)
+    assert not (tmp_path / "old.docx").exists()
+    assert restarted.get("newest") == b"z" * 10
+
+
+def test_rewriting_a_key_does_not_inflate_disk_usage(tmp_path) -> None:
+    cache = ExportCache(tmp_path, memory_bytes=0, disk_bytes=45)
+    cache.put("other", b"o" * 10)
+    for _ in range(5):
+        cache.put("same", b"s" * 10)
+    assert cache._disk_used == 20
+    assert cache.get("other") == b"o" * 10
+
+
+# ── Endpoints ─────────────────────────────────────────────────────────────────
+
+
+@pytest.fixture
+def counted_builds(monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    """Count real builds by wrapping the engine's ``run``."""
+    from backend.export_engine import get_engine
+
+    engine = get_engine()
+    calls: list[str] = []
+    original = engine.run
+
+    async def run(fn, *args):
+        calls.append(fn.__name__)
+        return await original(fn, *args)
+
+    monkeypatch.setattr(engine, "run", run)
+    return calls
+
+
+def test_repeat_export_served_from_cache(counted_builds) -> None:
+    first = client.post("/api/papers/export", json=_PAYLOAD)
+    second = client.post("/api/papers/export", json={**_PAYLOAD, "id": "another-id"})
+    assert first.status_code == second.status_code == 200
+    assert first.content == second.content
+    assert first.headers["etag"] == second.headers["etag"]
+    assert counted_builds == ["build_docx"]
+
+
+def test_if_none_match_returns_304(counted_builds) -> None:
+    etag = client.post("/api/papers/export", json=_PAYLOAD).headers["etag"]
+    response = client.post("/api/papers/export", json=_PAYLOAD, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+    changed = {**_PAYLOAD, "header": {"title": "Changed"}}
+    response = client.post("/api/papers/export", json=changed, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert len(counted_builds) == 2
+
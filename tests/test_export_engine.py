@@ -0,0 +1,112 @@
+"""Tests for the export engine: bounded queue, timeouts, metrics and the pool."""
+
+import threading
+import time
+from io import BytesIO
+
+import pytest
+from docx import Document as DocxDocument
+from fastapi.testclient import TestClient
+
+from backend import export_engine
+from backend.docx_builder.builder import build_docx
+from backend.export_engine import EngineBusy, ExportEngine, ExportTimeout
+from backend.main import app
+from backend.models import Paper, PaperHeader
+
+client = TestClient(app)
+
+
+def _blocker(release: threading.Event):
+    def build(paper) -> bytes:
+        release.wait(5)
+        return b"done"
+
+    return build
+
+
+@pytest.fixture
+def thread_engine():
+    engine = ExportEngine(kind="thread", workers=1, queue_size=1, timeout=5)
+    yield engine
+    engine.shutdown(wait=False)
+
+
+def test_rejects_submissions_beyond_capacity(thread_engine: ExportEngine) -> None:
+    release = threading.Event()
+    build = _blocker(release)
+    running = thread_engine.submit(build, None)
+    queued = thread_engine.submit(build, None)
+    with pytest.raises(EngineBusy) as exc_info:
+        thread_engine.submit(build, None)
+    assert exc_info.value.retry_after >= 1
+
+    stats = thread_engine.stats()
+    assert stats["in_flight"] == 2
+    assert stats["queue_depth"] == 1
+    assert stats["rejected"] == 1
+
+    release.set()
+    assert running.result(5) == queued.result(5) == b"done"
+    stats = thread_engine.stats()
+    assert stats["in_flight"] == 0
+    assert stats["completed"] == 2
+    assert stats["build_seconds_total"] > 0
+
+
+async def test_run_times_out_and_frees_slot() -> None:
+    engine = ExportEngine(kind="thread", workers=1, queue_size=0, timeout=0.05)
+    try:
+        with pytest.raises(ExportTimeout):
+            await engine.run(time.sleep, 0.3)
+        assert engine.stats()["timed_out"] == 1
+        time.sleep(0.4)
+        assert engine.stats()["in_flight"] == 0
+    finally:
+        engine.shutdown()
+
+
+async def test_failed_build_is_counted() -> None:
+    engine = ExportEngine(kind="thread", workers=1, timeout=5)
+    try:
+        with pytest.raises(ZeroDivisionError):
+            await engine.run(divmod, 1, 0)
+        assert engine.stats()["failed"] == 1
+    finally:
+        engine.shutdown()
+
+
+def test_unknown_executor_rejected() -> None:
+    with pytest.raises(ValueError):
+        ExportEngine(kind="gpu")
+
+
+async def test_process_pool_builds_docx(temp_data_dir) -> None:
+    engine = ExportEngine(kind="process", workers=1, timeout=60)
+    try:
+        content = await engine.run(build_docx, Paper(header=PaperHeader(title="Pooled")))
+    finally:
+        engine.shutdown()
+    doc = DocxDocument(BytesIO(content))
+    assert any(p.text == "Pooled" for p in doc.paragraphs)
+
+
+def test_export_returns_503_with_retry_after_when_full(monkeypatch: pytest.MonkeyPatch) -> None:
+    release = threading.Event()
+    engine = ExportEngine(kind="thread", workers=1, queue_size=0, timeout=5)
+    monkeypatch.setattr(export_engine, "_engine", engine)
+    try:
+        engine.submit(_blocker(release), None)
+        response = client.post("/api/papers/export", json={"header": {"title": "Busy"}})
+        assert response.status_code == 503
+        assert int(response.headers["retry-after"]) >= 1
+    finally:
+        release.set()
+        engine.shutdown()
+
+
+def test_export_stats_endpoint() -> None:
+    client.post("/api/papers/export", json={"header": {"title": "Counted"}})
+    stats = client.get("/api/papers/export/stats").json()
+    assert stats["completed"] >= 1
+    assert {"queue_depth", "in_flight", "build_seconds_avg", "rejected"} <= stats.keys()
@@ -0,0 +1,129 @@
+"""Tests for the asynchronous export job API."""
+
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import export_cache, export_engine, export_jobs
+from backend.main import app
+
+client = TestClient(app)
+
+
+def _save(title: str = "Job") -> str:
+    return client.post("/api/papers", json={"header": {"title": title}}).json()["id"]
+
+
+def _wait(job_id: str, timeout: float = 30) -> dict:
+    deadline = time.monotonic() + timeout
+    while True:
+        job = client.get(f"/api/papers/export-jobs/{job_id}").json()
+        if job["state"] in ("done", "failed") or time.monotonic() > deadline:
+            return job
+        time.sleep(0.02)
+
+
+@pytest.fixture
+def gated_build(monkeypatch: pytest.MonkeyPatch):
+    """Build in threads with a paper builder that waits until the event is set."""
+    monkeypatch.setenv("EXPORT_EXECUTOR", "thread")
+    export_engine.shutdown_engine()
+    gate = threading.Event()
+    calls: list[str] = []
+    original = export_cache.BUILDERS["paper"]
+
+    def build(paper):
+        calls.append(paper.header.title)
+        gate.wait(10)
+        if paper.header.title == "Broken":
+            raise RuntimeError("boom")
+        return original(paper)
+
+    monkeypatch.setitem(export_cache.BUILDERS, "paper", build)
+    yield gate, calls
+    gate.set()
+    export_jobs.shutdown(wait=True)
+    export_engine.shutdown_engine()
+
+
+def test_submit_poll_download() -> None:
+    paper_id = _save("Physics")
+    response = client.post(f"/api/papers/{paper_id}/export-jobs")
+    assert response.status_code == 202
+    job = response.json()
+    assert response.headers["location"] == job["status_url"]
+    assert job["paper_id"] == paper_id
+
+    assert _wait(job["id"])["state"] == "done"
+    download = client.get(f"/api/papers/export-jobs/{job['id']}/download")
+    assert download.status_code == 200
+    assert download.content[:2] == b"PK"
+    assert "Physics.docx" in download.headers["content-disposition"]
+
+
+def test_duplicate_submissions_collapse(gated_build) -> None:
+    gate, calls = gated_build
+    first = client.post(f"/api/papers/{_save()}/export-jobs").json()
+    again = client.post(f"/api/papers/{first['paper_id']}/export-jobs")
+    # A different paper with identical content has the same export key
+    twin = client.post(f"/api/papers/{_save()}/export-jobs")
+    assert again.status_code == twin.status_code == 200
+    assert again.json()["id"] == twin.json()["id"] == first["id"]
+    assert client.get(f"/api/papers/export-jobs/{first['id']}/download").status_code == 409
+
+    gate.set()
+    assert _wait(first["id"])["state"] == "done"
+    assert client.post(f"/api/papers/{first['paper_id']}/export-jobs").json()["id"] == first["id"]
+    assert calls == ["Job"]
+
+
+def test_job_shares_a_build_with_a_direct_export(gated_build) -> None:
+    gate, calls = gated_build
+    paper = client.get(f"/api/papers/{_save()}").json()
+    job = client.post(f"/api/papers/{paper['id']}/export-jobs").json()
+    deadline = time.monotonic() + 10
+    while not calls and time.monotonic() < deadline:
+        time.sleep(0.01)
+    coalesced = export_cache.flights.stats()["coalesced"]
+    responses = []
+    direct = threading.Thread(target=lambda: responses.append(client.post("/api/papers/export", json=paper)))
+    direct.start()
+    while export_cache.flights.stats()["coalesced"] == coalesced and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    gate.set()
+    direct.join()
+    assert _wait(job["id"])["state"] == "done"
+    assert responses[0].status_code == 200
+    assert calls == ["Job"]
+
+
+def test_failed_job_reports_error(gated_build) -> None:
+    gate, _ = gated_build
+    gate.set()
+    job = client.post(f"/api/papers/{_save('Broken')}/export-jobs").json()
+    finished = _wait(job["id"])
+    assert finished["state"] == "failed"
+    assert "boom" in finished["error"]
+    assert finished["download_url"] is None
+    download = client.get(f"/api/papers/export-jobs/{job['id']}/download")
+    assert download.status_code == 409
+
+
+def test_expired_jobs_are_deleted(temp_data_dir, monkeypatch) -> None:
+    monkeypatch.setenv("EXPORT_JOB_TTL", "0")
+    job = client.post(f"/api/papers/{_save()}/export-jobs").json()
+    assert _wait(job["id"])["state"] == "done"
+    assert (temp_data_dir / "export-jobs" / f"{job['id']}.docx").exists()
+
+    export_jobs.get_store().sweep(force=True)
+    assert client.get(f"/api/papers/export-jobs/{job['id']}").status_code == 404
+    assert list((temp_data_dir / "export-jobs").iterdir()) == []
+
+
+def test_submit_errors() -> None:
+    assert client.post("/api/papers/missing/export-jobs").status_code == 404
+    response = client.post(f"/api/papers/{_save()}/export-jobs", params={"kind": "answer_key"})
+    assert response.status_code == 400
@@ -0,0 +1,96 @@
+"""Tests for DOCX-ready image renditions."""
+
+import io
+import os
+import zipfile
+
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from backend.docx_builder.builder import build_docx
+from backend.images import prepare_renditions, rendition_for, target_pixels
+from backend.main import app
+from backend.models import ImageQuestion, Paper
+
+client = TestClient(app)
+
+
+def _image_bytes(size: tuple[int, int], fmt: str, mode: str = "RGB", exif=None) -> bytes:
+    img = Image.effect_noise(size, 64).convert(mode)
+    if mode == "RGBA":
+        img.putalpha(128)
+    buf = io.BytesIO()
+    kwargs = {"exif": exif} if exif is not None else {}
+    img.save(buf, format=fmt, **kwargs)
+    return buf.getvalue()
+
+
+def _write_upload(data_dir, name: str, data: bytes):
+    path = data_dir / "uploads" / name
+    path.write_bytes(data)
+    return path
+
+
+def test_large_photo_downscaled_to_print_width(temp_data_dir) -> None:
+    _write_upload(temp_data_dir, "photo.jpg", _image_bytes((3000, 2000), "JPEG"))
+    path = rendition_for("photo.jpg", "question")
+    assert path.parent == temp_data_dir / "renditions"
+    with Image.open(path) as img:
+        assert img.format == "JPEG"
+        assert img.size == (target_pixels("question"), round(2000 * target_pixels("question") / 3000))
+
+
+def test_small_image_is_linked_not_reencoded(temp_data_dir) -> None:
+    source = _write_upload(temp_data_dir, "small.png", _image_bytes((50, 40), "PNG"))
+    path = rendition_for("small.png", "logo")
+    assert path.read_bytes() == source.read_bytes()
+
+
+def test_webp_converted_to_embeddable_format(temp_data_dir) -> None:
+    _write_upload(temp_data_dir, "pic.webp", _image_bytes((200, 100), "WEBP", mode="RGBA"))
+    path = rendition_for("pic.webp", "inline")
+    with Image.open(path) as img:
+        assert img.format == "PNG"
+
+
+def test_exif_orientation_applied(temp_data_dir) -> None:
+    exif = Image.Exif()
+    exif[0x0112] = 6  # rotate 90° clockwise on display
+    _write_upload(temp_data_dir, "rotated.jpg", _image_bytes((400, 200), "JPEG", exif=exif))
+    with Image.open(rendition_for("rotated.jpg", "question")) as img:
+        assert img.size == (200, 400)
+
+
+def test_stale_rendition_regenerated(temp_data_dir) -> None:
+    source = _write_upload(temp_data_dir, "fig.png", _image_bytes((100, 100), "PNG"))
+    first = rendition_for("fig.png", "inline")
+    os.utime(first, ns=(1, 1))
+    source.write_bytes(_image_bytes((60, 30), "PNG"))
+    with Image.open(rendition_for("fig.png", "inline")) as img:
+        assert img.size == (60, 30)
+
+
+def test_missing_upload_returns_none(temp_data_dir) -> None:
+    assert rendition_for("absent.png", "logo") is None
+
+
+def test_upload_prepares_renditions_in_background(temp_data_dir) -> None:
+    data = _image_bytes((2000, 1000), "PNG")
+    response = client.post("/api/uploads/image", files={"file": ("big.png", data, "image/png")})
+    assert response.status_code == 200
+    stem = response.json()["filename"].rsplit(".", 1)[0]
+    made = sorted(p.name for p in (temp_data_dir / "renditions").iterdir())
+    assert made == [f"{stem}.inline.png", f"{stem}.logo.png", f"{stem}.question.png"]
+
+
+def test_builder_embeds_rendition(temp_data_dir) -> None:
+    source = _write_upload(temp_data_dir, "photo.jpg", _image_bytes((3000, 2000), "JPEG"))
+    prepare_renditions("photo.jpg")
+    content = build_docx(Paper(questions=[ImageQuestion(filename="photo.jpg")]))
+    with zipfile.ZipFile(io.BytesIO(content)) as archive:
+        media = [n for n in archive.namelist() if n.startswith("word/media/")]
+        assert len(media) == 1
+        embedded = archive.read(media[0])
+    assert len(embedded) < source.stat().st_size
+    with Image.open(io.BytesIO(embedded)) as img:
+        assert img.width == target_pixels("question")
@@ -0,0 +1,65 @@
+"""Tests for the RFC 6902 JSON Patch implementation."""
+
+import pytest
+
+from backend.jsonpatch import JsonPatchError, JsonPatchTestFailed, apply_patch, parse_pointer
+
+
+def test_pointer_unescaping() -> None:
+    assert parse_pointer("") == []
+    assert parse_pointer("/a~1b/m~0n/0") == ["a/b", "m~n", "0"]
+    with pytest.raises(JsonPatchError):
+        parse_pointer("a/b")
+
+
+@pytest.mark.parametrize(
+    ("doc", "patch", "expected"),
+    [
+        ({"foo": "bar"}, [{"op": "add", "path": "/baz", "value": "qux"}], {"foo": "bar", "baz": "qux"}),
+        ({"foo": ["bar", "baz"]}, [{"op": "add", "path": "/foo/1", "value": "qux"}], {"foo": ["bar", "qux", "baz"]}),
+        ({"foo": [1]}, [{"op": "add", "path": "/foo/-", "value": 2}], {"foo": [1, 2]}),
+        ({"baz": "qux", "foo": "bar"}, [{"op": "remove", "path": "/baz"}], {"foo": "bar"}),
+        ({"baz": "qux"}, [{"op": "replace", "path": "/baz", "value": "boo"}], {"baz": "boo"}),
+        (
+            {"foo": {"bar": "baz", "waldo": "fred"}, "qux": {"corge": "grault"}},
+            [{"op": "move", "from": "/foo/waldo", "path": "/qux/thud"}],
+            {"foo": {"bar": "baz"}, "qux": {"corge": "grault", "thud": "fred"}},
+        ),
+        ({"foo": ["all", "grass", "cows", "eat"]}, [{"op": "move", "from": "/foo/1", "path": "/foo/3"}],
+         {"foo": ["all", "cows", "eat", "grass"]}),
+        ({"a": [1]}, [{"op": "copy", "from": "/a", "path": "/b"}], {"a": [1], "b": [1]}),
+        ({"a": 1}, [{"op": "test", "path": "/a", "value": 1}], {"a": 1}),
+        ({"a": 1}, [{"op": "replace", "path": "", "value": [1]}], [1]),
+    ],
+)
+def test_rfc_examples(doc, patch, expected) -> None:
+    assert apply_patch(doc, patch) == expected
+
+
+def test_original_untouched_when_later_operation_fails() -> None:
+    doc = {"a": [1, 2]}
+    with pytest.raises(JsonPatchError, match="Operation 1"):
+        apply_patch(doc, [{"op": "remove", "path": "/a/0"}, {"op": "remove", "path": "/missing"}])
+    assert doc == {"a": [1, 2]}
+
+
+@pytest.mark.parametrize(
+    "patch",
+    [
+        [{"op": "add", "path": "/a/5", "value": 0}],
+        [{"op": "add", "path": "/a/01", "value": 0}],
+        [{"op": "remove", "path": "/a/2"}],
+        [{"op": "replace", "path": "/a"}],
+        [{"op": "move", "from": "/a", "path": "/a/0"}],
+        [{"op": "frobnicate", "path": "/a"}],
+        ["not an object"],
+    ],
+)
+def test_invalid_operations(patch) -> None:
+    with pytest.raises(JsonPatchError):
+        apply_patch({"a": [1, 2]}, patch)
+
+
+def test_failed_test_operation() -> None:
+    with pytest.raises(JsonPatchTestFailed):
+        apply_patch({"a": 1}, [{"op": "test", "path": "/a", "value": 2}])
@@ -0,0 +1,144 @@
+"""Tests for paginated, sorted and filtered paper/template listings."""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import storage
+from backend.main import app
+from backend.models import Paper, PaperHeader, PaperSummary
+from backend.storage import InvalidCursor, ListQuery, delete_item, list_page, save_item
+
+client = TestClient(app)
+
+ENGINES = ["files", "sqlite"]
+
+
+@pytest.fixture(params=ENGINES)
+def engine(request, monkeypatch: pytest.MonkeyPatch) -> str:
+    monkeypatch.setenv("STORAGE_BACKEND", request.param)
+    return request.param
+
+
+def _seed(count: int = 7) -> list[Paper]:
+    papers = []
+    for n in range(count):
+        paper = Paper(
+            header=PaperHeader(title=f"Paper {n % 3}", subject="Maths" if n % 2 else "Physics"),
+            updated_at=f"2026-01-{n + 1:02d}T09:00:00",
+        )
+        save_item("papers", paper.id, paper)
+        papers.append(paper)
+    return papers
+
+
+def _walk(query: ListQuery) -> list[PaperSummary]:
+    items, cursor = [], None
+    while True:
+        page = list_page("papers", Paper, PaperSummary, query, cursor)
+        assert len(page.items) <= query.limit
+        items += page.items
+        if page.next_cursor is None:
+            return items
+        cursor = page.next_cursor
+
+
+@pytest.mark.parametrize(
+    ("sort", "descending"),
+    [("sort_ts", True), ("title", False), ("title", True), ("subject", False)],
+)
+def test_pages_cover_listing_in_order(engine, sort, descending) -> None:
+    papers = _seed()
+    query = ListQuery(sort=sort, descending=descending, limit=2)
+    expected = sorted(
+        (query.key(p.summary().model_dump()) for p in papers), reverse=descending
+    )
+    assert [query.key(s.model_dump()) for s in _walk(query)] == expected
+
+
+def test_filters(engine) -> None:
+    _seed()
+    maths = _walk(ListQuery(subject="Maths", limit=2))
+    assert [s.updated_at[:10] for s in maths] == ["2026-01-06", "2026-01-04", "2026-01-02"]
+    window = _walk(ListQuery(since="2026-01-03", until="2026-01-05", limit=1))
+    assert [s.updated_at[:10] for s in window] == ["2026-01-04", "2026-01-03"]
+
+
+def test_sorted_views_follow_writes(engine) -> None:
+    papers = _seed(4)
+    query = ListQuery(sort="title", descending=False, limit=10)
+    list_page("papers", Paper, PaperSummary, query)  # build the view
+    papers[0].header.title = "Zebra"
+    save_item("papers", papers[0].id, papers[0])
+    delete_item("papers", papers[1].id)
+    titles = [s.title for s in list_page("papers", Paper, PaperSummary, query).items]
+    assert titles == ["Paper 0", "Paper 2", "Zebra"]
+
+
+def test_filtered_views_follow_writes(engine) -> None:
+    papers = _seed(4)
+    query = ListQuery(subject="Maths", descending=False, since="2026-01-02", until="2026-02-01", limit=10)
+    list_page("papers", Paper, PaperSummary, query)  # build the subject view
+    papers[0].header.subject = "Maths"
+    papers[0].updated_at = "2026-01-10T09:00:00"
+    save_item("papers", papers[0].id, papers[0])
+    delete_item("papers", papers[1].id)
+    dates = [s.updated_at[:10] for s in _walk(query)]
+    assert dates == ["2026-01-04", "2026-01-10"]
+
+
+def test_file_filters_scan_only_matching_items(monkeypatch: pytest.MonkeyPatch) -> None:
+    _seed(20)
+    scanned = []
+    matches = ListQuery.matches
+    monkeypatch.setattr(ListQuery, "matches", lambda self, summary: scanned.append(summary) or matches(self, summary))
+    page = list_page("papers", Paper, PaperSummary, ListQuery(subject="Maths", limit=50))
+    assert len(page.items) == len(scanned) == 10
+    scanned.clear()
+    page = list_page("papers", Paper, PaperSummary, ListQuery(since="2026-01-03", until="2026-01-05", limit=50))
+    assert len(page.items) == len(scanned) == 2
+
+
+def test_cursor_must_match_query(engine) -> None:
+    _seed(3)
+    page = list_page("papers", Paper, PaperSummary, ListQuery(limit=1))
+    with pytest.raises(InvalidCursor):
+        list_page("papers", Paper, PaperSummary, ListQuery(sort="title", limit=1), page.next_cursor)
+    with pytest.raises(InvalidCursor):
+        list_page("papers", Paper, PaperSummary, ListQuery(limit=1), "not-a-cursor")
+
+
+def test_write_behind_items_are_listed(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("STORAGE_WRITE_BEHIND_MS", "60000")
+    backend = storage.get_backend()
+    papers = _seed(3)
+    papers[0].header.title = "Paper 9"
+    save_item("papers", papers[0].id, papers[0])
+    titles = [s.title for s in _walk(ListQuery(sort="title", descending=False, limit=1))]
+    assert titles == ["Paper 1", "Paper 2", "Paper 9"]
+    backend.close()
+
+
+def test_api_pagination_and_params() -> None:
+    _seed(5)
+    first = client.get("/api/papers", params={"limit": 3, "subject": "Physics"})
+    assert [p["updated_at"][:10] for p in first.json()] == ["2026-01-05", "2026-01-03", "2026-01-01"]
+    assert "X-Next-Cursor" not in first.headers
+
+    first = client.get("/api/papers", params={"limit": 3, "sort": "title"})
+    assert [p["title"] for p in first.json()] == ["Paper 0", "Paper 0", "Paper 1"]
+    cursor = first.headers["X-Next-Cursor"]
+    rest = client.get("/api/papers", params={"limit": 3, "sort": "title", "cursor": cursor})
+    assert [p["title"] for p in rest.json()] == ["Paper 1", "Paper 2"]
+    assert client.get("/api/papers", params={"cursor": cursor}).status_code == 400
+
+    dated = client.get("/api/papers", params={"updated_from": "2026-01-04", "updated_to": "2026-01-05T00:00:00"})
+    assert [p["updated_at"][:10] for p in dated.json()] == ["2026-01-04"]
+
+
+def test_template_listing_pages() -> None:
+    for name in ("B", "A", "C"):
+        client.post("/api/templates", json={"name": name, "header": {}, "style": {}})
+    first = client.get("/api/templates", params={"limit": 2, "sort": "name"})
+    assert [t["name"] for t in first.json()] == ["A", "B"]
+    rest = client.get("/api/templates", params={"sort": "name", "cursor": first.headers["X-Next-Cursor"]})
+    assert [t["name"] for t in rest.json()] == ["C"]
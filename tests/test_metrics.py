@@ -0,0 +1,119 @@
+"""Tests for the in-process metrics and the /api/metrics endpoint."""
+
+import io
+import json
+import os
+
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from backend import export_engine, metrics
+from backend.docx_builder.builder import build_docx
+from backend.main import app
+from backend.models import Paper
+
+client = TestClient(app)
+
+
+def _value(name: str, *labels: str) -> float:
+    """Current count of a histogram series, or value of a counter series, in this process."""
+    for key, value in metrics.snapshot()[name]["series"]:
+        if tuple(key) == labels:
+            return sum(value[:-1]) if isinstance(value, list) else value
+    return 0
+
+
+def _paper() -> dict:
+    doc = {"type": "doc", "content": [{"type": "paragraph", "content": [{"type": "text", "text": "Why?"}]}]}
+    return {"header": {"title": "Metrics"}, "questions": [
+        {"type": "text", "content": doc},
+        {"type": "mcq", "stem": doc, "options": [{"label": "A", "text": "x", "is_correct": True}]},
+    ]}
+
+
+def test_requests_are_timed_by_route_template() -> None:
+    paper = client.post("/api/papers", json=_paper()).json()
+    before = _value("http_request_duration_seconds", "GET", "/api/papers/{paper_id}", "200")
+    client.get(f"/api/papers/{paper['id']}")
+    client.get(f"/api/papers/{paper['id']}")
+    assert _value("http_request_duration_seconds", "GET", "/api/papers/{paper_id}", "200") == before + 2
+    missing = _value("http_request_duration_seconds", "GET", "/api/papers/{paper_id}", "404")
+    client.get("/api/papers/nope")
+    assert _value("http_request_duration_seconds", "GET", "/api/papers/{paper_id}", "404") == missing + 1
+    unmatched = _value("http_request_duration_seconds", "GET", "unmatched", "404")
+    client.get("/api/nothing/here")
+    assert _value("http_request_duration_seconds", "GET", "unmatched", "404") == unmatched + 1
+
+
+def test_build_stages_and_export_sizes_are_recorded() -> None:
+    stages = ("setup", "header", "question_text", "question_mcq", "finalise", "save")
+    before = {stage: _value("docx_build_stage_seconds", "paper", stage) for stage in stages}
+    build_docx(Paper.model_validate(_paper()))
+    assert all(_value("docx_build_stage_seconds", "paper", stage) == before[stage] + 1 for stage in stages)
+
+    sizes = _value("export_output_bytes", "answer_key")
+    assert client.post("/api/papers/export-answer-key", json=_paper()).status_code == 200
+    assert _value("export_output_bytes", "answer_key") == sizes + 1
+    assert _value("docx_build_stage_seconds", "answer_key", "body") >= 1
+
+
+def test_storage_and_upload_metrics() -> None:
+    written = _value("storage_bytes_written_total", "papers")
+    writes = _value("storage_operation_seconds", "write", "papers")
+    lists = _value("storage_operation_seconds", "list", "papers")
+    client.post("/api/papers", json=_paper())
+    client.get("/api/papers")
+    assert _value("storage_bytes_written_total", "papers") > written
+    assert _value("storage_operation_seconds", "write", "papers") == writes + 1
+    assert _value("storage_operation_seconds", "list", "papers") == lists + 1
+
+    buf = io.BytesIO()
+    Image.new("RGB", (8, 8)).save(buf, format="PNG")
+    uploads = _value("upload_size_bytes")
+    client.post("/api/uploads/image", files={"file": ("a.png", buf.getvalue(), "image/png")})
+    assert _value("upload_size_bytes") == uploads + 1
+
+
+def test_pool_process_metrics_are_handed_back() -> None:
+    own = metrics.drain()  # stand in for a fresh pool process
+    try:
+        paper = Paper.model_validate(_paper())
+        _, _, recorded, _ = export_engine._run_job(None, "backend.docx_builder.builder:build_docx", paper)
+        assert _value("docx_build_stage_seconds", "paper", "save") == 0
+        assert export_engine._run_job(None, build_docx, paper)[2] is None  # thread pool: same process
+    finally:
+        metrics.merge(own)
+    before = _value("docx_build_stage_seconds", "paper", "save")
+    metrics.merge(recorded)
+    assert _value("docx_build_stage_seconds", "paper", "save") == before + 1
+
+
+def test_endpoint_merges_every_workers_snapshot(temp_data_dir) -> None:
+    other = {"storage_bytes_written_total": {
+        "type": "counter", "help": "Payload bytes written.", "labels": ["directory"],
+        "series": [[["papers"], 1000000]],
+    }}
+    (temp_data_dir / ".metrics").mkdir(exist_ok=True)
+    (temp_data_dir / ".metrics" / f"{os.getpid() + 100000}.json").write_text(json.dumps(other))
+    response = client.get("/api/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    own = _value("storage_bytes_written_total", "papers")
+    assert f'storage_bytes_written_total{{directory="papers"}} {int(own) + 1000000}' in response.text
+    assert json.loads((temp_data_dir / ".metrics" / f"{os.getpid()}.json").read_text())
+
+
+def test_render_histograms_cumulatively() -> None:
+    counts = metrics.combine([{"h": {
+        "type": "histogram", "help": "Help.", "labels": ["route"], "buckets": [0.1, 1.0],
+        "series": [[['/a"b'], [1, 2, 1, 4.5]]],
+    }}] * 2)
+    assert metrics.render(counts).splitlines() == [
+        "# HELP h Help.",
+        "# TYPE h histogram",
+        'h_bucket{route="/a\\"b",le="0.1"} 2',
+        'h_bucket{route="/a\\"b",le="1"} 6',
+        'h_bucket{route="/a\\"b",le="+Inf"} 8',
+        'h_sum{route="/a\\"b"} 9',
+        'h_count{route="/a\\"b"} 8',
+    ]
@@ -0,0 +1,92 @@
+"""Tests for no-op save detection and ETag preconditions on /api/papers."""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.models import Paper, PaperHeader
+from backend.storage import PreconditionFailed, item_hash, save_item
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def saved() -> tuple[dict, str]:
+    response = client.post("/api/papers", json={"header": {"title": "Quiz"}})
+    return response.json(), response.headers["ETag"]
+
+
+def test_unchanged_save_is_not_written(saved, temp_data_dir) -> None:
+    paper, etag = saved
+    path = temp_data_dir / "papers" / f"{paper['id']}.json"
+    before = path.stat().st_mtime_ns
+    response = client.post("/api/papers", json=paper)
+    assert response.status_code == 200
+    assert response.json()["updated_at"] == paper["updated_at"]
+    assert response.headers["ETag"] == etag
+    assert path.stat().st_mtime_ns == before
+
+
+def test_unchanged_save_keeps_list_order(saved) -> None:
+    paper, _ = saved
+    other = client.post("/api/papers", json={"header": {"title": "Other"}}).json()
+    client.post("/api/papers", json=paper)
+    assert [p["id"] for p in client.get("/api/papers").json()] == [other["id"], paper["id"]]
+
+
+def test_changed_save_gets_new_etag(saved) -> None:
+    paper, etag = saved
+    paper["header"]["title"] = "Renamed"
+    response = client.post("/api/papers", json=paper)
+    assert response.headers["ETag"] != etag
+    assert response.json()["updated_at"] > paper["updated_at"]
+
+
+def test_get_honours_if_none_match(saved) -> None:
+    paper, etag = saved
+    response = client.get(f"/api/papers/{paper['id']}")
+    assert response.headers["ETag"] == etag
+    cached = client.get(f"/api/papers/{paper['id']}", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert client.get(f"/api/papers/{paper['id']}", headers={"If-None-Match": '"stale"'}).status_code == 200
+
+
+def test_stale_if_match_is_rejected(saved) -> None:
+    paper, etag = saved
+    first = dict(paper, header={"title": "Editor one"})
+    second = dict(paper, header={"title": "Editor two"})
+    assert client.post("/api/papers", json=first, headers={"If-Match": etag}).status_code == 200
+    response = client.post("/api/papers", json=second, headers={"If-Match": etag})
+    assert response.status_code == 412
+    assert client.get(f"/api/papers/{paper['id']}").json()["header"]["title"] == "Editor one"
+
+    patch = [{"op": "replace", "path": "/header/title", "value": "Editor two"}]
+    assert client.patch(f"/api/papers/{paper['id']}", json=patch, headers={"If-Match": etag}).status_code == 412
+
+
+def test_if_match_uses_strong_comparison(saved) -> None:
+    paper, etag = saved
+    edited = dict(paper, header={"title": "Edited"})
+    assert client.post("/api/papers", json=edited, headers={"If-Match": f"W/{etag}"}).status_code == 412
+    patch = [{"op": "replace", "path": "/header/title", "value": "Edited"}]
+    assert client.patch(f"/api/papers/{paper['id']}", json=patch, headers={"If-Match": f"W/{etag}"}).status_code == 412
+    assert client.get(f"/api/papers/{paper['id']}", headers={"If-None-Match": f"W/{etag}"}).status_code == 304
+
+
+def test_if_match_on_missing_paper_is_rejected() -> None:
+    paper = {"id": "fresh", "header": {"title": "New"}}
+    assert client.post("/api/papers", json=paper, headers={"If-Match": '"abc"'}).status_code == 412
+    assert client.post("/api/papers", json=paper, headers={"If-Match": "*"}).status_code == 412
+    assert client.post("/api/papers", json=paper).status_code == 200
+
+
+@pytest.mark.parametrize("engine", ["files", "sqlite"])
+def test_item_hash_and_precondition(engine, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("STORAGE_BACKEND", engine)
+    paper = Paper(id="p1", header=PaperHeader(title="Hashed"))
+    assert item_hash("papers", "p1", Paper) is None
+    first = save_item("papers", "p1", paper)
+    assert item_hash("papers", "p1", Paper) == first.content_hash
+    assert not save_item("papers", "p1", paper, skip_unchanged=True).written
+    with pytest.raises(PreconditionFailed):
+        save_item("papers", "p1", paper, precondition=lambda current: current == "other")
@@ -0,0 +1,127 @@
+"""Tests for PATCH /api/papers/{id} (JSON Patch and question operations)."""
+
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.routers import papers
+
+client = TestClient(app)
+
+JSON_PATCH = {"Content-Type": "application/json-patch+json"}
+
+
+def _text(text: str, qid: str) -> dict:
+    content = {"type": "doc", "content": [{"type": "paragraph", "content": [{"type": "text", "text": text}]}]}
+    return {"type": "text", "id": qid, "content": content}
+
+
+@pytest.fixture
+def paper() -> dict:
+    payload = {
+        "header": {"title": "Patch me"},
+        "questions": [_text("one", "q1"), _text("two", "q2"), _text("three", "q3")],
+    }
+    return client.post("/api/papers", json=payload).json()
+
+
+def _ids(paper: dict) -> list[str]:
+    return [q["id"] for q in paper["questions"]]
+
+
+def test_json_patch_applied_and_saved(paper) -> None:
+    patch = [
+        {"op": "replace", "path": "/header/title", "value": "Patched"},
+        {"op": "remove", "path": "/questions/1"},
+    ]
+    response = client.patch(f"/api/papers/{paper['id']}", json=patch, headers=JSON_PATCH)
+    assert response.status_code == 200
+    assert response.json()["updated_at"] > paper["updated_at"]
+    stored = client.get(f"/api/papers/{paper['id']}").json()
+    assert stored["header"]["title"] == "Patched"
+    assert _ids(stored) == ["q1", "q3"]
+
+
+def test_question_operations(paper) -> None:
+    operations = [
+        {"op": "upsert_question", "question": _text("two!", "q2")},
+        {"op": "upsert_question", "question": _text("new", "q4"), "index": 0},
+        {"op": "delete_question", "id": "q1"},
+        {"op": "reorder_questions", "order": ["q3", "q4", "q2"]},
+    ]
+    response = client.patch(f"/api/papers/{paper['id']}", json={"operations": operations})
+    assert response.status_code == 200
+    stored = client.get(f"/api/papers/{paper['id']}").json()
+    assert _ids(stored) == ["q3", "q4", "q2"]
+    assert stored["questions"][2]["content"]["content"][0]["content"][0]["text"] == "two!"
+
+
+def test_noop_patch_does_not_write(paper, temp_data_dir) -> None:
+    path = temp_data_dir / "papers" / f"{paper['id']}.json"
+    before = path.stat().st_mtime_ns
+    for body in (
+        [{"op": "replace", "path": "/header/title", "value": "Patch me"}],
+        {"operations": [{"op": "upsert_question", "question": _text("one", "q1")}]},
+        {"operations": [{"op": "reorder_questions", "order": ["q1", "q2", "q3"]}]},
+    ):
+        response = client.patch(f"/api/papers/{paper['id']}", json=body)
+        assert response.status_code == 200
+        assert response.json()["updated_at"] == paper["updated_at"]
+    assert path.stat().st_mtime_ns == before
+
+
+def test_timestamp_only_patch_reports_stored_updated_at(paper, temp_data_dir) -> None:
+    path = temp_data_dir / "papers" / f"{paper['id']}.json"
+    before = path.stat().st_mtime_ns
+    patch = [{"op": "replace", "path": "/created_at", "value": "2000-01-01T00:00:00"}]
+    response = client.patch(f"/api/papers/{paper['id']}", json=patch, headers=JSON_PATCH)
+    assert response.status_code == 200
+    assert response.json()["updated_at"] == paper["updated_at"]
+    assert path.stat().st_mtime_ns == before
+
+
+def test_patch_does_not_lose_a_concurrent_question_write(paper, monkeypatch: pytest.MonkeyPatch) -> None:
+    writer: list[threading.Thread] = []
+    original = papers.apply_json_patch
+
+    def slow_patch(*args):
+        # A question write arrives while the PATCH is between read and save
+        writer.append(threading.Thread(
+            target=client.put, args=(f"/api/papers/{paper['id']}/questions/q4",), kwargs={"json": _text("new", "q4")}
+        ))
+        writer[0].start()
+        time.sleep(0.2)
+        return original(*args)
+
+    monkeypatch.setattr(papers, "apply_json_patch", slow_patch)
+    patch = [{"op": "replace", "path": "/header/title", "value": "Patched"}]
+    assert client.patch(f"/api/papers/{paper['id']}", json=patch, headers=JSON_PATCH).status_code == 200
+    writer[0].join()
+    stored = client.get(f"/api/papers/{paper['id']}").json()
+    assert stored["header"]["title"] == "Patched"
+    assert _ids(stored) == ["q1", "q2", "q3", "q4"]
+
+
+@pytest.mark.parametrize(
+    ("body", "status"),
+    [
+        ([{"op": "test", "path": "/header/title", "value": "Other"}], 409),
+        ([{"op": "remove", "path": "/nope"}], 400),
+        ([{"op": "replace", "path": "/id", "value": "stolen"}], 400),
+        ([{"op": "replace", "path": "/questions/0/type", "value": "bogus"}], 422),
+        ({"operations": [{"op": "delete_question", "id": "missing"}]}, 404),
+        ({"operations": [{"op": "reorder_questions", "order": ["q1"]}]}, 400),
+        ({"operations": [{"op": "upsert_question", "question": _text("x", "q9"), "index": 7}]}, 400),
+    ],
+)
+def test_patch_errors_leave_paper_unchanged(paper, body, status) -> None:
+    response = client.patch(f"/api/papers/{paper['id']}", json=body)
+    assert response.status_code == status
+    assert client.get(f"/api/papers/{paper['id']}").json() == paper
+
+
+def test_patch_missing_paper_returns_404() -> None:
+    assert client.patch("/api/papers/missing", json=[]).status_code == 404
@@ -0,0 +1,125 @@
+"""Tests for on-demand request profiling and the slowest-export samples."""
+
+import json
+import pstats
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import profiling
+from backend.main import app
+
+client = TestClient(app)
+
+TOKEN = "s3cret"
+
+
+@pytest.fixture
+def token(monkeypatch: pytest.MonkeyPatch) -> dict[str, str]:
+    monkeypatch.setenv("PROFILE_TOKEN", TOKEN)
+    return {"X-Profile-Token": TOKEN}
+
+
+def _paper() -> dict:
+    doc = {"type": "doc", "content": [{"type": "paragraph", "content": [{"type": "text", "text": "Why?"}]}]}
+    return {"header": {"title": "Profiled"}, "questions": [{"type": "text", "content": doc}]}
+
+
+def _functions(path) -> set[str]:
+    return {name for _, _, name in pstats.Stats(str(path)).stats}
+
+
+def test_disabled_without_a_token() -> None:
+    response = client.post("/api/papers/export", json=_paper(), headers={"X-Profile-Token": "anything"})
+    assert response.status_code == 200
+    assert "x-profile-id" not in response.headers
+    assert client.get("/api/profiles").status_code == 404
+
+
+def test_wrong_token_is_rejected(token) -> None:
+    assert client.get("/api/papers", headers={"X-Profile-Token": "guess"}).status_code == 403
+    assert client.get("/api/papers?profile=guess").status_code == 403
+    assert client.get("/api/profiles").status_code == 403
+    assert client.get("/api/papers").status_code == 200  # no token: not profiled, not rejected
+
+
+def test_profiled_export_covers_a_build_every_time(token) -> None:
+    ids = []
+    for _ in range(2):  # the second would be an export cache hit without profiling
+        response = client.post("/api/papers/export", json=_paper(), headers=token)
+        assert response.status_code == 200
+        ids.append(response.headers["x-profile-id"])
+
+    listing = client.get("/api/profiles", headers=token).json()
+    assert {p["id"] for p in listing if p["source"] == "request"} == set(ids)
+    record = next(p for p in listing if p["id"] == ids[1])
+    assert record["path"] == "/api/papers/export" and record["status"] == 200
+    assert record["format"] == "pstats" and record["calls"] >= 2
+
+    download = client.get(record["download_url"], headers=token)
+    assert download.status_code == 200
+    path = profiling.get_store().file_path(profiling.get_store().get(ids[1]))
+    assert {"build_docx", "export_key"} <= _functions(path)
+
+
+def test_query_flag_profiles_storage_calls(token) -> None:
+    paper = client.post("/api/papers", json=_paper()).json()
+    response = client.get(f"/api/papers/{paper['id']}?profile={TOKEN}")
+    assert response.status_code == 200
+    record = profiling.get_store().get(response.headers["x-profile-id"])
+    assert record.method == "GET"
+    assert "load_item" in _functions(profiling.get_store().file_path(record))
+
+
+def test_old_request_profiles_are_rotated(temp_data_dir) -> None:
+    store = profiling.ProfileStore(temp_data_dir / "profiles", keep_requests=2, keep_slowest=1)
+    saved = [store.save_request(profiling.Recording(), "GET", "/x", 200, 0.1) for _ in range(3)]
+    assert [r.id for r in store.records("request")] == [saved[2].id, saved[1].id]
+    assert not store.file_path(saved[0]).exists()
+    assert store.get("../../etc/passwd") is None
+
+
+def _spin(seconds: float) -> None:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_sampler_records_the_calling_threads_stacks(monkeypatch: pytest.MonkeyPatch) -> None:
+    with profiling.sampled() as samples:
+        _spin(0.1)
+    assert sum(samples.stacks.values()) >= 3
+    assert any(frame[0] == "_spin" for stack in samples.stacks for frame in stack)
+
+    monkeypatch.setenv("PROFILE_SLOWEST", "0")
+    with profiling.sampled() as off:
+        assert off is None
+
+
+def test_only_the_slowest_exports_are_kept(temp_data_dir) -> None:
+    store = profiling.ProfileStore(temp_data_dir / "profiles", keep_requests=1, keep_slowest=2)
+    samples = profiling.Samples(0.01)
+    samples.stacks[(("main", "a.py", 1), ("build", "b.py", 5))] = 3
+    kept = {s: store.offer_export("m:build_docx", s, samples) for s in (1.0, 3.0, 2.0, 0.5)}
+    assert kept[0.5] is None
+    assert sorted(r.seconds for r in store.records("slow_export")) == [2.0, 3.0]
+    assert not store.file_path(kept[1.0]).exists()
+
+    document = json.loads(store.file_path(kept[3.0]).read_text())
+    profile = document["profiles"][0]
+    assert profile["type"] == "sampled" and profile["samples"] == [[0, 1]]
+    assert profile["weights"] == [0.03]
+    assert document["shared"]["frames"][1] == {"name": "build", "file": "b.py", "line": 5}
+
+
+def test_builds_are_sampled_for_the_slowest_store() -> None:
+    assert client.post("/api/papers/export-answer-key", json={
+        **_paper(), "questions": [{"type": "mcq", "stem": _paper()["questions"][0]["content"],
+                                   "options": [{"label": "A", "text": "x", "is_correct": True}]}],
+    }).status_code == 200
+    deadline = time.monotonic() + 5  # offered after the caller has its document
+    while not (records := profiling.get_store().records("slow_export")) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert [r.target for r in records] == ["backend.docx_builder.builder:build_answer_key"]
+    assert records[0].title == "Profiled"
@@ -0,0 +1,213 @@
+"""Tests for the content-addressed question bank behind paper and template storage."""
+
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import storage
+from backend.main import app
+from backend.models import Paper, PaperHeader, PaperSummary, Template
+from backend.storage import (
+    delete_item,
+    get_backend,
+    get_bank,
+    load_document,
+    load_item,
+    save_item,
+    update_document,
+)
+from backend.storage.bank import BANK, MissingQuestion, question_key
+
+client = TestClient(app)
+
+
+def _doc(text: str) -> dict:
+    return {"type": "doc", "content": [{"type": "paragraph", "content": [{"type": "text", "text": text}]}]}
+
+
+def _question(text: str, qid: str) -> dict:
+    return {"type": "text", "id": qid, "marks": 2, "content": _doc(text)}
+
+
+def _key(text: str) -> str:
+    """Bank key of ``_question(text, ...)`` as stored (with its defaults filled in)."""
+    return question_key(Paper(questions=[_question(text, "")]).questions[0].model_dump(mode="json"))
+
+
+@pytest.fixture(params=["files", "sqlite"])
+def engine(request, monkeypatch: pytest.MonkeyPatch) -> str:
+    monkeypatch.setenv("STORAGE_BACKEND", request.param)
+    return request.param
+
+
+def test_shared_questions_are_stored_once(engine) -> None:
+    shared = _question("Define osmosis", "a1")
+    first = Paper(questions=[shared, _question("Only here", "a2")])
+    second = Paper(questions=[{**shared, "id": "b1"}])
+    save_item("papers", first.id, first)
+    save_item("papers", second.id, second)
+
+    backend = get_backend()
+    assert sorted(backend.ids(BANK)) == sorted([_key("Define osmosis"), _key("Only here")])
+    stored = json.loads(backend.read("papers", second.id))
+    assert stored["questions"] == [{"$ref": _key("Define osmosis"), "id": "b1"}]
+    assert get_bank(backend).stats()["reused"] == 1
+
+    assert load_item("papers", second.id, Paper) == second
+    assert load_document("papers", first.id)["questions"][0] == first.questions[0].model_dump(mode="json")
+
+
+def test_api_round_trip_is_unchanged() -> None:
+    body = {"header": {"title": "Bank"}, "questions": [_question("Photosynthesis", "q1")]}
+    paper = client.post("/api/papers", json=body).json()
+    assert client.get(f"/api/papers/{paper['id']}").json() == paper
+
+    question = _question("Respiration", "q2")
+    assert client.put(f"/api/papers/{paper['id']}/questions/q2", json=question).status_code == 200
+    questions = client.get(f"/api/papers/{paper['id']}").json()["questions"]
+    assert [(q["id"], q["content"]) for q in questions] == [("q1", _doc("Photosynthesis")), ("q2", _doc("Respiration"))]
+
+    template = client.post("/api/templates", json={"name": "T", "questions": [_question("Photosynthesis", "t1")]})
+    assert client.get(f"/api/templates/{template.json()['id']}").json()["questions"][0]["id"] == "t1"
+    assert len(get_backend().ids(BANK)) == 2
+
+
+def test_bank_models_are_validated_once(monkeypatch: pytest.MonkeyPatch) -> None:
+    papers = [Paper(questions=[_question("Shared stem", f"q{n}")]) for n in range(3)]
+    for paper in papers:
+        save_item("papers", paper.id, paper)
+    monkeypatch.setenv("STORAGE_CACHE_MB", "0")
+    storage._model_cache = None
+
+    calls = []
+    bank = get_bank(get_backend())
+    entry = bank._entry
+    monkeypatch.setattr(bank, "_entry", lambda key: calls.append(key) or entry(key))
+    bank._models.clear()
+    loaded = [load_item("papers", p.id, Paper) for p in papers]
+    assert [p.questions[0].id for p in loaded] == ["q0", "q1", "q2"]
+    assert len(calls) == 1
+    loaded[0].questions[0].content["type"] = "changed"  # copies are independent
+    assert load_item("papers", papers[1].id, Paper).questions[0].content["type"] == "doc"
+
+
+def test_inline_items_still_load(temp_data_dir) -> None:
+    paper = Paper(header=PaperHeader(title="Legacy"), questions=[_question("Inline", "q1")])
+    (temp_data_dir / "papers" / f"{paper.id}.json").write_text(paper.model_dump_json())
+    assert load_item("papers", paper.id, Paper) == paper
+    assert update_document("papers", paper.id, lambda data: data["questions"].pop() is not None, PaperSummary.from_json)
+    assert json.loads(get_backend().read("papers", paper.id))["questions"] == []
+
+
+def test_disabled_bank_stores_questions_inline(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("QUESTION_BANK", "0")
+    paper = Paper(questions=[_question("Inline", "q1")])
+    save_item("papers", paper.id, paper)
+    assert json.loads(get_backend().read("papers", paper.id))["questions"][0]["content"] == _doc("Inline")
+    assert get_backend().ids(BANK) == []
+
+
+def test_sweep_removes_unreferenced_entries(engine) -> None:
+    paper = Paper(questions=[_question("Draft", "q1")])
+    save_item("papers", paper.id, paper)
+    paper.questions[0].content = _doc("Final")
+    save_item("papers", paper.id, paper)
+    template = Template(name="T", questions=[_question("Kept by template", "t1")])
+    save_item("templates", template.id, template)
+
+    bank = get_bank(get_backend())
+    assert bank.sweep() == 1
+    assert sorted(get_backend().ids(BANK)) == sorted([_key("Final"), _key("Kept by template")])
+    assert load_item("papers", paper.id, Paper) == paper
+    save_item("papers", "other", Paper(id="other", questions=[_question("Draft", "x")]))  # rewritten after the sweep
+    assert load_item("papers", "other", Paper).questions[0].content == _doc("Draft")
+
+
+def _age_entries(monkeypatch: pytest.MonkeyPatch) -> float:
+    """Shrink the sweep grace period to 0.2 s and wait until existing entries exceed it."""
+    monkeypatch.setenv("BANK_SWEEP_GRACE", "0.2")
+    time.sleep(0.25)
+    return 0.2
+
+
+def test_sweep_with_grace_keeps_recent_orphans(engine, monkeypatch: pytest.MonkeyPatch) -> None:
+    paper = Paper(questions=[_question("Old draft", "q1")])
+    save_item("papers", paper.id, paper)
+    grace = _age_entries(monkeypatch)
+    for text in ("Newer draft", "Final"):
+        paper.questions[0].content = _doc(text)
+        save_item("papers", paper.id, paper)
+
+    assert get_bank(get_backend()).sweep(grace) == 1  # "Old draft" only; "Newer draft" is still young
+    assert sorted(get_backend().ids(BANK)) == sorted([_key("Newer draft"), _key("Final")])
+
+
+def test_sweep_keeps_an_old_entry_a_concurrent_save_reuses(engine, monkeypatch: pytest.MonkeyPatch) -> None:
+    save_item("papers", "gone", Paper(id="gone", questions=[_question("Shared", "q1")]))
+    delete_item("papers", "gone")
+    grace = _age_entries(monkeypatch)
+    bank = get_bank(get_backend())
+    scan = bank.referenced_keys
+
+    def scan_then_save() -> set[str]:
+        keys = scan()  # the new paper is not stored yet when the sweep looks
+        save_item("papers", "new", Paper(id="new", questions=[_question("Shared", "x")]))
+        return keys
+
+    monkeypatch.setattr(bank, "referenced_keys", scan_then_save)
+    assert bank.sweep(grace) == 0
+    storage.get_model_cache().clear()
+    assert load_item("papers", "new", Paper).questions[0].content == _doc("Shared")
+
+
+def test_writes_schedule_background_sweeps(monkeypatch: pytest.MonkeyPatch) -> None:
+    paper = Paper(questions=[_question("Draft", "q1")])
+    save_item("papers", paper.id, paper)
+    _age_entries(monkeypatch)
+    paper.questions[0].content = _doc("Final")
+    save_item("papers", paper.id, paper)
+    monkeypatch.setenv("BANK_SWEEP_INTERVAL", "0.01")
+    save_item("papers", "other", Paper(id="other"))  # the next write starts a sweep
+    deadline = time.monotonic() + 5
+    while _key("Draft") in get_backend().ids(BANK) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert get_backend().ids(BANK) == [_key("Final")]
+
+
+def test_write_behind_entries_count_as_just_written(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("STORAGE_WRITE_BEHIND_MS", "60000")
+    backend = get_backend()
+    try:
+        save_item("papers", "a", Paper(id="a", questions=[_question("Shared", "q1")]))
+        before = time.time_ns()
+        assert backend.modified_ns(BANK, _key("Shared")) >= before  # still buffered
+        save_item("papers", "b", Paper(id="b", questions=[_question("Shared", "x")]))  # reuses the buffered entry
+        assert get_bank(backend).stats()["reused"] == 1
+        delete_item("papers", "a")
+        delete_item("papers", "b")
+        assert get_bank(backend).sweep(60) == 0
+    finally:
+        backend.close()
+
+
+def test_expanded_questions_do_not_share_cached_entries() -> None:
+    paper = Paper(questions=[_question("Keep me", "q1")])
+    save_item("papers", paper.id, paper)
+    expanded = load_document("papers", paper.id)
+    expanded["questions"][0]["content"]["content"].clear()
+    expanded["questions"][0]["marks"] = 9
+    again = load_document("papers", paper.id)
+    assert again["questions"][0]["content"] == _doc("Keep me")
+    assert again["questions"][0]["marks"] == 2
+
+
+def test_missing_entry_is_reported() -> None:
+    paper = Paper(questions=[_question("Lost", "q1")])
+    save_item("papers", paper.id, paper)
+    get_backend().delete(BANK, _key("Lost"))
+    get_bank(get_backend()).sweep()  # drop the bank's cached copies
+    storage.get_model_cache().clear()
+    with pytest.raises(MissingQuestion):
+        load_item("papers", paper.id, Paper)
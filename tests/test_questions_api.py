@@ -0,0 +1,107 @@
+"""Tests for the per-question endpoints under /api/papers/{id}/questions."""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import storage
+from backend.main import app
+
+client = TestClient(app)
+
+
+def _mcq(qid: str, stem: str = "Pick one") -> dict:
+    return {
+        "type": "mcq",
+        "id": qid,
+        "stem": {"type": "doc", "content": [{"type": "paragraph", "content": [{"type": "text", "text": stem}]}]},
+        "options": [{"label": "A", "text": "x"}],
+    }
+
+
+@pytest.fixture
+def paper() -> dict:
+    payload = {"header": {"title": "Quiz"}, "questions": [_mcq("q1"), _mcq("q2")]}
+    return client.post("/api/papers", json=payload).json()
+
+
+def _ids(paper_id: str) -> list[str]:
+    return [q["id"] for q in client.get(f"/api/papers/{paper_id}").json()["questions"]]
+
+
+def test_get_question(paper) -> None:
+    response = client.get(f"/api/papers/{paper['id']}/questions/q2")
+    assert response.status_code == 200
+    assert response.json() == paper["questions"][1]
+    assert client.get(f"/api/papers/{paper['id']}/questions/nope").status_code == 404
+    assert client.get("/api/papers/missing/questions/q1").status_code == 404
+
+
+def test_put_replaces_question_and_bumps_updated_at(paper) -> None:
+    response = client.put(f"/api/papers/{paper['id']}/questions/q1", json=_mcq("ignored", "Edited"))
+    assert response.status_code == 200
+    assert response.json()["id"] == "q1"
+    stored = client.get(f"/api/papers/{paper['id']}").json()
+    assert stored["questions"][0]["stem"]["content"][0]["content"][0]["text"] == "Edited"
+    assert stored["updated_at"] > paper["updated_at"]
+    listed = client.get("/api/papers").json()
+    assert listed[0]["updated_at"] == stored["updated_at"]
+
+
+def test_put_inserts_new_question_at_index(paper) -> None:
+    text = {"type": "text", "content": {"type": "doc", "content": []}}
+    assert client.put(f"/api/papers/{paper['id']}/questions/q0", json=text, params={"index": 0}).status_code == 200
+    assert _ids(paper["id"]) == ["q0", "q1", "q2"]
+    response = client.put(f"/api/papers/{paper['id']}/questions/q9", json=text, params={"index": 9})
+    assert response.status_code == 400
+
+
+def test_put_validates_question_body(paper) -> None:
+    response = client.put(f"/api/papers/{paper['id']}/questions/q1", json={"type": "mcq"})
+    assert response.status_code == 422
+    assert client.put("/api/papers/missing/questions/q1", json=_mcq("q1")).status_code == 404
+
+
+def test_unchanged_put_does_not_write(paper, temp_data_dir) -> None:
+    path = temp_data_dir / "papers" / f"{paper['id']}.json"
+    before = path.stat().st_mtime_ns
+    assert client.put(f"/api/papers/{paper['id']}/questions/q1", json=paper["questions"][0]).status_code == 200
+    assert path.stat().st_mtime_ns == before
+
+
+def test_delete_question(paper) -> None:
+    assert client.delete(f"/api/papers/{paper['id']}/questions/q1").json() == {"deleted": "q1"}
+    assert _ids(paper["id"]) == ["q2"]
+    assert client.delete(f"/api/papers/{paper['id']}/questions/q1").status_code == 404
+
+
+def test_reorder_questions(paper) -> None:
+    url = f"/api/papers/{paper['id']}/question-order"
+    assert client.put(url, json={"order": ["q2", "q1"]}).status_code == 200
+    assert _ids(paper["id"]) == ["q2", "q1"]
+    assert client.put(url, json={"order": ["q2"]}).status_code == 400
+
+
+def test_question_writes_honour_if_match(paper) -> None:
+    url = f"/api/papers/{paper['id']}"
+    etag = client.get(url).headers["ETag"]
+    first = client.put(f"{url}/questions/q1", json=_mcq("q1", "Editor one"), headers={"If-Match": etag})
+    assert first.status_code == 200
+    assert first.headers["ETag"] == client.get(url).headers["ETag"] != etag
+
+    stale = {"If-Match": etag}
+    response = client.put(f"{url}/questions/q1", json=_mcq("q1", "Editor two"), headers=stale)
+    assert response.status_code == 412 and response.headers["ETag"] == first.headers["ETag"]
+    assert client.delete(f"{url}/questions/q2", headers=stale).status_code == 412
+    assert client.put(f"{url}/question-order", json={"order": ["q2", "q1"]}, headers=stale).status_code == 412
+    assert client.put(f"{url}/questions/q1", json=_mcq("q1"), headers={"If-Match": f"W/{first.headers['ETag']}"}).status_code == 412
+    assert _ids(paper["id"]) == ["q1", "q2"]
+    assert client.get(f"{url}/questions/q1").json()["stem"] == _mcq("q1", "Editor one")["stem"]
+
+
+def test_question_write_hashes_the_paper_once(paper, monkeypatch: pytest.MonkeyPatch) -> None:
+    calls = []
+    original = storage.json_content_hash
+    monkeypatch.setattr(storage, "json_content_hash", lambda data: calls.append(1) or original(data))
+    response = client.put(f"/api/papers/{paper['id']}/questions/q1", json=_mcq("q1", "Once"))
+    assert response.status_code == 200 and len(calls) == 1
+    assert response.headers["ETag"] == client.get(f"/api/papers/{paper['id']}").headers["ETag"]
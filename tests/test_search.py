@@ -0,0 +1,115 @@
+"""Tests for the full-text question search index and /api/search."""
+
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import search
+from backend.main import app
+from backend.models import Paper, PaperHeader
+from backend.search import match_expression, question_text
+from backend.storage import save_item
+
+client = TestClient(app)
+
+
+def _doc(*paragraphs: str) -> dict:
+    return {
+        "type": "doc",
+        "content": [{"type": "paragraph", "content": [{"type": "text", "text": p}]} for p in paragraphs],
+    }
+
+
+def _paper(title: str, *questions: dict) -> dict:
+    return client.post("/api/papers", json={"header": {"title": title}, "questions": list(questions)}).json()
+
+
+def _hits(q: str) -> list[tuple[str, str]]:
+    response = client.get("/api/search", params={"q": q})
+    assert response.status_code == 200
+    return [(hit["paper_title"], hit["question_id"]) for hit in response.json()]
+
+
+def test_question_text_covers_every_type() -> None:
+    assert question_text({"type": "text", "content": _doc("Define", "osmosis")}) == "Define osmosis"
+    mcq = {"type": "mcq", "stem": _doc("Capital of France?"), "options": [{"label": "A", "text": "Paris"}]}
+    assert question_text(mcq) == "Capital of France? Paris"
+    assert question_text({"type": "image", "filename": "x.png", "caption": "A plant cell"}) == "A plant cell"
+
+
+def test_match_expression_quotes_user_input() -> None:
+    assert match_expression('photo* OR "cell') == '"photo"* "or"* "cell"*'
+    assert match_expression("?!") is None
+
+
+def test_search_finds_questions_across_papers() -> None:
+    _paper(
+        "Biology 2025",
+        {"type": "text", "id": "b1", "content": _doc("Explain photosynthesis in plants")},
+        {"type": "image", "id": "b2", "filename": "cell.png", "caption": "Label the plant cell"},
+    )
+    _paper(
+        "Chemistry",
+        {"type": "mcq", "id": "c1", "stem": _doc("Which gas do plants absorb?"),
+         "options": [{"label": "A", "text": "Carbon dioxide"}, {"label": "B", "text": "Helium"}]},
+    )
+    assert _hits("photosynth") == [("Biology 2025", "b1")]
+    assert _hits("carbon dioxide") == [("Chemistry", "c1")]
+    assert {hit for hit in _hits("plant")} == {("Biology 2025", "b1"), ("Biology 2025", "b2"), ("Chemistry", "c1")}
+    assert _hits("plant helium") == [("Chemistry", "c1")]
+
+
+def test_ranking_prefers_more_relevant_questions() -> None:
+    _paper(
+        "Ranking",
+        {"type": "text", "id": "weak", "content": _doc("A long question that mentions enzymes once among many other words")},
+        {"type": "text", "id": "strong", "content": _doc("Enzymes: how do enzymes work?")},
+    )
+    assert [qid for _, qid in _hits("enzymes")] == ["strong", "weak"]
+
+
+def test_index_follows_edits_and_deletes() -> None:
+    paper = _paper("Edits", {"type": "text", "id": "q1", "content": _doc("Old wording")})
+    paper["questions"][0]["content"] = _doc("New phrasing")
+    client.post("/api/papers", json=paper)
+    assert _hits("wording") == []
+    assert _hits("phrasing") == [("Edits", "q1")]
+
+    question = {"type": "text", "content": _doc("Added through the question endpoint")}
+    client.put(f"/api/papers/{paper['id']}/questions/q2", json=question)
+    assert _hits("endpoint") == [("Edits", "q2")]
+
+    client.delete(f"/api/papers/{paper['id']}")
+    assert _hits("phrasing") == []
+
+
+def test_sync_indexes_papers_written_behind_its_back() -> None:
+    search.get_index().sync()
+    paper = Paper(header=PaperHeader(title="Imported"), questions=[{"type": "text", "content": _doc("Tectonic plates")}])
+    save_item("papers", paper.id, paper)
+    assert search.get_index().sync() == 1
+    assert _hits("tectonic") == [("Imported", paper.questions[0].id)]
+    assert search.get_index().sync() == 0
+
+
+@pytest.mark.parametrize("q", ["", "x" * 201])
+def test_query_validation(q) -> None:
+    assert client.get("/api/search", params={"q": q}).status_code == 422
+
+
+def test_search_stays_fast_on_a_large_corpus() -> None:
+    index = search.get_index()
+    index.sync()  # so the first search does not drop these unsaved papers
+    words = ["alpha", "beta", "gamma", "delta", "epsilon", "zeta", "theta", "kappa"]
+    for n in range(300):
+        questions = [
+            {"type": "text", "id": f"q{i}", "content": _doc(f"{words[(n + i) % 8]} question {n}-{i} tag{n}x")}
+            for i in range(20)
+        ]
+        index.index_paper({"id": f"p{n}", "header": {"title": f"P{n}"}, "questions": questions})
+    index.search("alpha")  # warm up
+    started = time.perf_counter()
+    hits = index.search("tag17x alpha")
+    assert time.perf_counter() - started < 0.05
+    assert hits and all(hit.paper_id == "p17" for hit in hits)
@@ -0,0 +1,100 @@
+"""Tests for single-flight coalescing of identical concurrent exports."""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from backend import export_cache, export_engine
+from backend.main import app
+from backend.singleflight import SingleFlight
+
+
+async def test_concurrent_calls_share_one_execution() -> None:
+    flight = SingleFlight()
+    calls = 0
+
+    async def work() -> str:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "result"
+
+    results = await asyncio.gather(*(flight.run("k", work) for _ in range(5)))
+    assert results == ["result"] * 5
+    assert calls == 1
+    assert flight.stats() == {"in_flight": 0, "leaders": 1, "coalesced": 4}
+
+
+async def test_different_keys_run_separately() -> None:
+    flight = SingleFlight()
+
+    async def work(value: str) -> str:
+        await asyncio.sleep(0.01)
+        return value
+
+    assert await asyncio.gather(flight.run("a", lambda: work("a")), flight.run("b", lambda: work("b"))) == ["a", "b"]
+    assert flight.stats()["coalesced"] == 0
+
+
+async def test_exception_shared_with_followers() -> None:
+    flight = SingleFlight()
+
+    async def fail() -> None:
+        await asyncio.sleep(0.02)
+        raise ValueError("bad paper")
+
+    results = await asyncio.gather(*(flight.run("k", fail) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(r, ValueError) for r in results)
+
+
+async def test_follower_takes_over_from_cancelled_leader() -> None:
+    flight = SingleFlight()
+    calls = 0
+
+    async def work() -> str:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "done"
+
+    leader = asyncio.create_task(flight.run("k", work))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flight.run("k", work))
+    await asyncio.sleep(0.01)
+    leader.cancel()
+    assert await follower == "done"
+    assert calls == 2
+
+
+@pytest.fixture
+def slow_build(monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    monkeypatch.setenv("EXPORT_EXECUTOR", "thread")
+    export_engine.shutdown_engine()
+    calls: list[str] = []
+
+    def build(paper) -> bytes:
+        calls.append(paper.header.title)
+        time.sleep(0.2)
+        return b"docx-bytes"
+
+    monkeypatch.setitem(export_cache.BUILDERS, "paper", build)
+    yield calls
+    export_engine.shutdown_engine()
+
+
+async def test_identical_export_requests_share_one_build(slow_build) -> None:
+    before = export_cache.flights.stats()["coalesced"]
+    payload = {"header": {"title": "Shared"}, "questions": [], "style": {}}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        responses = await asyncio.gather(
+            *(client.post("/api/papers/export", json=payload) for _ in range(6))
+        )
+        stats = (await client.get("/api/papers/export/stats")).json()
+
+    assert [r.status_code for r in responses] == [200] * 6
+    assert {r.content for r in responses} == {b"docx-bytes"}
+    assert slow_build == ["Shared"]
+    assert stats["coalesced"] - before == 5
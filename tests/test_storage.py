@@ -1,7 +1,17 @@
 """Tests for the JSON file storage layer."""
 
-from backend.models import Paper, PaperHeader, Template
-from backend.storage import delete_item, list_items, load_item, save_item
+import importlib
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from backend.models import Paper, PaperHeader, PaperSummary, Template
+from backend.storage import delete_item, list_items, list_summaries, load_item, save_item
+from backend.storage import files
+from backend.storage.files import FileBackend
 
 
 def test_save_and_load_paper() -> None:
@@ -74,3 +84,125 @@ def test_storage_works_for_templates() -> None:
     loaded = load_item("templates", template.id, Template)
     assert loaded is not None
     assert loaded.name == "My Template"
+
+
+# ── Summary index ─────────────────────────────────────────────────────────────
+
+
+def test_list_summaries_tracks_save_and_delete() -> None:
+    p1 = Paper(header=PaperHeader(title="Algebra", subject="Math"))
+    p2 = Paper(header=PaperHeader(title=""))
+    save_item("papers", p1.id, p1)
+    save_item("papers", p2.id, p2)
+    summaries = {s.id: s for s in list_summaries("papers", Paper, PaperSummary)}
+    assert summaries[p1.id].subject == "Math"
+    assert summaries[p2.id].title == "Untitled"
+
+    delete_item("papers", p1.id)
+    assert [s.id for s in list_summaries("papers", Paper, PaperSummary)] == [p2.id]
+
+
+def test_list_summaries_sorted_newest_first() -> None:
+    old = Paper(header=PaperHeader(title="Old"))
+    save_item("papers", old.id, old)
+    time.sleep(0.01)
+    new = Paper(header=PaperHeader(title="New"))
+    save_item("papers", new.id, new)
+    assert [s.title for s in list_summaries("papers", Paper, PaperSummary)] == ["New", "Old"]
+
+
+def test_list_summaries_does_not_read_item_files(monkeypatch) -> None:
+    list_summaries("papers", Paper, PaperSummary)  # startup reconciliation
+    paper = Paper(header=PaperHeader(title="Indexed"))
+    save_item("papers", paper.id, paper)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("listing must be served from the index")
+
+    monkeypatch.setattr(Paper, "model_validate_json", fail)
+    assert list_summaries("papers", Paper, PaperSummary)[0].title == "Indexed"
+
+
+def test_index_rebuilt_when_missing(temp_data_dir) -> None:
+    import backend.storage as storage_mod
+
+    paper = Paper(header=PaperHeader(title="Survivor"))
+    save_item("papers", paper.id, paper)
+    list_summaries("papers", Paper, PaperSummary)
+    (temp_data_dir / ".index" / "papers.json").unlink()
+    importlib.reload(storage_mod)  # simulate a fresh process
+    assert [s.title for s in storage_mod.list_summaries("papers", Paper, PaperSummary)] == ["Survivor"]
+
+
+def test_index_reconciled_with_files_changed_behind_its_back(temp_data_dir) -> None:
+    import backend.storage as storage_mod
+
+    kept = Paper(header=PaperHeader(title="Kept"))
+    gone = Paper(header=PaperHeader(title="Gone"))
+    for p in (kept, gone):
+        save_item("papers", p.id, p)
+    list_summaries("papers", Paper, PaperSummary)
+
+    # Edit the directory directly, as a restore from backup would
+    (temp_data_dir / "papers" / f"{gone.id}.json").unlink()
+    added = Paper(header=PaperHeader(title="Added"))
+    (temp_data_dir / "papers" / f"{added.id}.json").write_text(added.model_dump_json())
+    (temp_data_dir / "papers" / "corrupt.json").write_text("{not json")
+
+    importlib.reload(storage_mod)
+    storage_mod.rebuild_index("papers", Paper)
+    titles = {s.title for s in storage_mod.list_summaries("papers", Paper, PaperSummary)}
+    assert titles == {"Kept", "Added"}
+
+
+def _summarise(payload: str) -> dict:
+    return {"title": json.loads(payload)["title"]}
+
+
+def test_index_updates_from_several_workers_are_not_lost(temp_data_dir) -> None:
+    # Two engines on one root stand in for two worker processes: each has its
+    # own in-process lock, so only the file lock keeps their updates apart.
+    workers = [FileBackend(temp_data_dir), FileBackend(temp_data_dir)]
+    workers[0].summaries("papers", _summarise)  # create the index
+
+    def save(worker: FileBackend, prefix: str) -> None:
+        for i in range(40):
+            worker.write("papers", f"{prefix}{i}", json.dumps({"title": f"{prefix}{i}"}), {"title": f"{prefix}{i}"})
+
+    threads = [threading.Thread(target=save, args=(w, p)) for w, p in zip(workers, "ab")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    index = json.loads((temp_data_dir / ".index" / "papers.json").read_text())
+    assert len(index) == 80
+
+
+def test_lost_index_update_is_repaired_by_the_next_listing(temp_data_dir) -> None:
+    backend = FileBackend(temp_data_dir)
+    backend.summaries("papers", _summarise)  # create the index
+    for title in ("kept", "lost"):
+        backend.write("papers", title, json.dumps({"title": title}), {"title": title})
+    index_path = temp_data_dir / ".index" / "papers.json"
+    index = json.loads(index_path.read_text())
+    del index["lost"]  # as if the index write had not survived a crash
+    index_path.write_text(json.dumps(index))
+    assert {s["title"] for s in backend.summaries("papers", _summarise)} == {"kept", "lost"}
+
+
+def test_unchanged_directory_is_not_rescanned(temp_data_dir, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(files, "_MTIME_SLACK_NS", 0)
+    listdir = os.listdir
+    scans = []
+    monkeypatch.setattr(files.os, "listdir", lambda path: scans.append(path) or listdir(path))
+    backend = FileBackend(temp_data_dir)
+    backend.write("papers", "a", json.dumps({"title": "a"}), {"title": "a"})
+    backend.summaries("papers", _summarise)
+    backend.write("papers", "b", json.dumps({"title": "b"}), {"title": "b"})  # our own write keeps the check valid
+    assert len(backend.summaries("papers", _summarise)) == 2
+    assert scans == []
+
+    time.sleep(0.05)  # let the directory mtime move on
+    (temp_data_dir / "papers" / "c.json").write_text(json.dumps({"title": "c"}))  # written by another writer
+    assert {s["title"] for s in backend.summaries("papers", _summarise)} == {"a", "b", "c"}
+    assert len(scans) == 1
@@ -0,0 +1,98 @@
+"""Tests for the validated-model read cache behind storage.load_item."""
+
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import storage
+from backend.main import app
+from backend.models import MCQOption, MCQQuestion, Paper, PaperHeader
+from backend.storage import delete_item, load_item, save_item
+
+client = TestClient(app)
+
+
+def _paper() -> Paper:
+    paper = Paper(header=PaperHeader(title="Cached"), questions=[MCQQuestion(id="q1", stem={})])
+    save_item("papers", paper.id, paper)
+    return paper
+
+
+def test_repeated_loads_hit_cache(monkeypatch: pytest.MonkeyPatch) -> None:
+    paper = _paper()
+    load_item("papers", paper.id, Paper)
+    monkeypatch.setattr(Paper, "model_validate_json", classmethod(lambda cls, *a, **k: pytest.fail("revalidated")))
+    assert load_item("papers", paper.id, Paper).header.title == "Cached"
+    stats = storage.cache_stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+
+def test_loaded_objects_are_detached_from_cache() -> None:
+    paper = _paper()
+    first = load_item("papers", paper.id, Paper)
+    first.updated_at = "mutated"
+    first.header.title = "mutated"
+    first.questions[0].marks = 99
+    first.questions.append(MCQQuestion(stem={}))
+    second = load_item("papers", paper.id, Paper)
+    assert second.updated_at == paper.updated_at
+    assert second.header.title == "Cached"
+    assert second.questions[0].marks == 0
+    assert len(second.questions) == 1
+
+
+def test_nested_content_is_detached_from_cache() -> None:
+    stem = {"type": "doc", "content": [{"type": "paragraph", "content": [{"type": "text", "text": "Cached"}]}]}
+    paper = Paper(questions=[MCQQuestion(id="q1", stem=stem, options=[MCQOption(label="A", text="one")])])
+    save_item("papers", paper.id, paper)
+    first = load_item("papers", paper.id, Paper)
+    first.questions[0].stem["content"][0]["content"][0]["text"] = "mutated"
+    first.questions[0].stem["content"].append({"type": "paragraph"})
+    first.questions[0].options[0].text = "mutated"
+    second = load_item("papers", paper.id, Paper)
+    assert second.questions[0].stem == stem
+    assert second.questions[0].options[0].text == "one"
+
+
+def test_cache_notices_changes_made_elsewhere(temp_data_dir) -> None:
+    paper = _paper()
+    load_item("papers", paper.id, Paper)
+    path = temp_data_dir / "papers" / f"{paper.id}.json"
+    edited = paper.model_copy(update={"header": PaperHeader(title="Edited by another worker")})
+    path.write_text(edited.model_dump_json())
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert load_item("papers", paper.id, Paper).header.title == "Edited by another worker"
+
+
+def test_save_and_delete_invalidate() -> None:
+    paper = _paper()
+    load_item("papers", paper.id, Paper)
+    paper.header.title = "Saved again"
+    save_item("papers", paper.id, paper)
+    assert load_item("papers", paper.id, Paper).header.title == "Saved again"
+    delete_item("papers", paper.id)
+    assert load_item("papers", paper.id, Paper) is None
+    assert storage.cache_stats()["entries"] == 0
+
+
+def test_budget_evicts_least_recently_used(monkeypatch: pytest.MonkeyPatch) -> None:
+    size = len(Paper(header=PaperHeader(title="Cached"), questions=[MCQQuestion(id="q1", stem={})]).model_dump_json())
+    monkeypatch.setenv("STORAGE_CACHE_MB", str(size * 1.5 / 1024 / 1024))
+    first, second = _paper(), _paper()
+    load_item("papers", first.id, Paper)
+    load_item("papers", second.id, Paper)
+    stats = storage.cache_stats()
+    assert (stats["entries"], stats["evictions"]) == (1, 1)
+
+
+def test_stats_endpoint_and_sqlite_engine(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("STORAGE_BACKEND", "sqlite")
+    paper = _paper()
+    load_item("papers", paper.id, Paper)
+    paper.header.title = "Changed"
+    save_item("papers", paper.id, paper)
+    assert load_item("papers", paper.id, Paper).header.title == "Changed"
+    assert load_item("papers", paper.id, Paper).header.title == "Changed"
+    assert client.get("/api/storage/stats").json()["cache"]["hits"] == 1
@@ -0,0 +1,107 @@
+"""Tests for the SQLite storage engine and the file-to-SQLite migration."""
+
+import sqlite3
+import time
+
+import pytest
+
+from backend.models import Paper, PaperHeader, PaperSummary, Template, TemplateSummary
+from backend.storage import (
+    delete_item,
+    get_backend,
+    list_items,
+    list_summaries,
+    load_item,
+    save_item,
+)
+from backend.storage.files import FileBackend
+from backend.storage.migrate import migrate
+from backend.storage.sqlite import SQLiteBackend
+
+
+@pytest.fixture
+def sqlite_backend(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("STORAGE_BACKEND", "sqlite")
+
+
+def test_backend_selected_by_env(monkeypatch: pytest.MonkeyPatch, temp_data_dir) -> None:
+    assert isinstance(get_backend(), FileBackend)
+    monkeypatch.setenv("STORAGE_BACKEND", "sqlite")
+    backend = get_backend()
+    assert isinstance(backend, SQLiteBackend)
+    assert backend.db_path == temp_data_dir / "exam-builder.db"
+    assert get_backend() is backend
+
+
+def test_unknown_backend_rejected(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("STORAGE_BACKEND", "mongo")
+    with pytest.raises(ValueError):
+        get_backend()
+
+
+def test_sqlite_round_trip(sqlite_backend) -> None:
+    paper = Paper(header=PaperHeader(title="Chemistry", subject="Science"))
+    save_item("papers", paper.id, paper)
+    loaded = load_item("papers", paper.id, Paper)
+    assert loaded == paper
+    assert load_item("papers", "missing", Paper) is None
+
+    assert delete_item("papers", paper.id) is True
+    assert delete_item("papers", paper.id) is False
+    assert load_item("papers", paper.id, Paper) is None
+
+
+def test_sqlite_uses_wal(sqlite_backend, temp_data_dir) -> None:
+    save_item("papers", "p", Paper(id="p"))
+    conn = sqlite3.connect(temp_data_dir / "exam-builder.db")
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_sqlite_subject_pages_are_index_range_scans(sqlite_backend, temp_data_dir) -> None:
+    save_item("papers", "p", Paper(id="p"))
+    conn = sqlite3.connect(temp_data_dir / "exam-builder.db")
+    plan = conn.execute(
+        "EXPLAIN QUERY PLAN SELECT summary FROM items WHERE directory = ? AND summary IS NOT NULL"
+        " AND (subject, id) > (?, ?) ORDER BY subject ASC, id ASC LIMIT 50",
+        ("papers", "Maths", "p"),
+    ).fetchall()
+    details = " ".join(row[3] for row in plan)
+    assert "items_by_subject_id" in details and "TEMP B-TREE" not in details
+
+
+def test_sqlite_listing_newest_first_and_paged(sqlite_backend) -> None:
+    for n in range(5):
+        paper = Paper(id=f"p{n}", header=PaperHeader(title=f"Paper {n}"))
+        save_item("papers", paper.id, paper)
+        time.sleep(0.001)
+    summaries = list_summaries("papers", Paper, PaperSummary)
+    assert [s.id for s in summaries] == ["p4", "p3", "p2", "p1", "p0"]
+    page = list_summaries("papers", Paper, PaperSummary, limit=2, offset=1)
+    assert [s.id for s in page] == ["p3", "p2"]
+    assert [p.id for p in list_items("papers", Paper)][0] == "p4"
+
+
+def test_sqlite_keeps_directories_apart(sqlite_backend) -> None:
+    save_item("papers", "shared-id", Paper(id="shared-id"))
+    save_item("templates", "shared-id", Template(id="shared-id", name="T"))
+    assert [s.name for s in list_summaries("templates", Template, TemplateSummary)] == ["T"]
+    assert len(list_summaries("papers", Paper, PaperSummary)) == 1
+
+
+def test_migrate_imports_json_files(temp_data_dir, monkeypatch: pytest.MonkeyPatch) -> None:
+    old = Paper(header=PaperHeader(title="Old"))
+    new = Paper(header=PaperHeader(title="New"), questions=[{"type": "image", "filename": "a.png"}])
+    save_item("papers", old.id, old)
+    time.sleep(0.01)
+    save_item("papers", new.id, new)
+    save_item("templates", "t1", Template(id="t1", name="Layout"))
+    (temp_data_dir / "papers" / "broken.json").write_text("{oops")
+
+    counts = migrate(temp_data_dir, temp_data_dir / "exam-builder.db")
+    assert counts == {"questions": 1, "papers": 2, "templates": 1}
+    assert migrate(temp_data_dir, temp_data_dir / "exam-builder.db") == counts  # idempotent
+
+    monkeypatch.setenv("STORAGE_BACKEND", "sqlite")
+    assert [s.title for s in list_summaries("papers", Paper, PaperSummary)] == ["New", "Old"]
+    assert load_item("templates", "t1", Template).name == "Layout"
+    assert load_item("papers", new.id, Paper).questions == new.questions
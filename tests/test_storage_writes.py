@@ -0,0 +1,97 @@
+"""Tests for crash-safe item writes and the write-behind buffer."""
+
+import os
+import time
+
+import pytest
+
+from backend import storage
+from backend.models import Paper, PaperHeader, PaperSummary
+from backend.storage import delete_item, list_items, list_summaries, load_item, save_item
+from backend.storage.files import atomic_write
+from backend.storage.writebehind import WriteBehindBackend
+
+
+def test_atomic_write_replaces_file_and_leaves_no_temp(tmp_path) -> None:
+    target = tmp_path / "papers" / "item.json"
+    target.write_text("old")
+    atomic_write(target, "new")
+    assert target.read_text() == "new"
+    assert [p.name for p in target.parent.iterdir()] == ["item.json"]
+
+
+def test_failed_write_keeps_previous_version(temp_data_dir, monkeypatch: pytest.MonkeyPatch) -> None:
+    paper = Paper(header=PaperHeader(title="Intact"))
+    save_item("papers", paper.id, paper)
+
+    def crash(*args) -> None:
+        raise OSError("disk full")
+
+    with monkeypatch.context() as patched:
+        patched.setattr(os, "replace", crash)
+        with pytest.raises(OSError):
+            save_item("papers", paper.id, paper.model_copy(update={"header": PaperHeader(title="Lost")}))
+
+    assert load_item("papers", paper.id, Paper).header.title == "Intact"
+    assert [p.name for p in (temp_data_dir / "papers").iterdir()] == [f"{paper.id}.json"]
+
+
+@pytest.fixture
+def write_behind(monkeypatch: pytest.MonkeyPatch) -> WriteBehindBackend:
+    monkeypatch.setenv("STORAGE_WRITE_BEHIND_MS", "60000")
+    backend = storage.get_backend()
+    assert isinstance(backend, WriteBehindBackend)
+    yield backend
+    backend.close()
+
+
+def test_write_behind_coalesces_saves(write_behind, temp_data_dir) -> None:
+    paper = Paper(header=PaperHeader(title="v0"))
+    for version in range(5):
+        paper.header.title = f"v{version}"
+        save_item("papers", paper.id, paper)
+
+    path = temp_data_dir / "papers" / f"{paper.id}.json"
+    assert not path.exists()
+    assert load_item("papers", paper.id, Paper).header.title == "v4"
+    assert [s.title for s in list_summaries("papers", Paper, PaperSummary)] == ["v4"]
+
+    storage.flush()
+    assert Paper.model_validate_json(path.read_text()).header.title == "v4"
+    assert write_behind.stats() == {"pending": 0, "coalesced": 4, "flushed": 1}
+
+
+def test_write_behind_listing_puts_buffered_items_first(write_behind) -> None:
+    old = Paper(header=PaperHeader(title="Old"))
+    new = Paper(header=PaperHeader(title="New"))
+    save_item("papers", old.id, old)
+    write_behind.flush()
+    save_item("papers", new.id, new)
+    save_item("papers", old.id, old.model_copy(update={"header": PaperHeader(title="Old, edited")}))
+
+    titles = [s.title for s in list_summaries("papers", Paper, PaperSummary)]
+    assert titles == ["Old, edited", "New"]
+    assert [s.title for s in list_summaries("papers", Paper, PaperSummary, limit=1, offset=1)] == ["New"]
+    assert {p.header.title for p in list_items("papers", Paper)} == {"Old, edited", "New"}
+
+
+def test_write_behind_delete_drops_buffered_write(write_behind, temp_data_dir) -> None:
+    paper = Paper(header=PaperHeader(title="Gone"))
+    save_item("papers", paper.id, paper)
+    assert delete_item("papers", paper.id)
+    storage.flush()
+    assert load_item("papers", paper.id, Paper) is None
+    assert not (temp_data_dir / "papers" / f"{paper.id}.json").exists()
+
+
+def test_write_behind_flushes_after_window(monkeypatch: pytest.MonkeyPatch, temp_data_dir) -> None:
+    monkeypatch.setenv("STORAGE_WRITE_BEHIND_MS", "20")
+    backend = storage.get_backend()
+    paper = Paper(header=PaperHeader(title="Soon"))
+    save_item("papers", paper.id, paper)
+    path = temp_data_dir / "papers" / f"{paper.id}.json"
+    deadline = time.monotonic() + 5
+    while not path.exists() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert path.exists()
+    backend.close()
@@ -0,0 +1,91 @@
+"""Tests for compiling TipTap JSON into the node tree renderers consume."""
+
+import copy
+from collections import OrderedDict
+
+import pytest
+
+from backend import tiptap
+from backend.tiptap import compile_doc, plain_text
+
+
+def _para(*inlines: dict) -> dict:
+    return {"type": "paragraph", "content": list(inlines)}
+
+
+def _text(text: str, *marks: str) -> dict:
+    return {"type": "text", "text": text, "marks": [{"type": m} for m in marks]}
+
+
+def _image(src: str) -> dict:
+    return {"type": "image", "attrs": {"src": src}}
+
+
+DOC = {"type": "doc", "content": [
+    {"type": "heading", "attrs": {"level": 2}, "content": [_text("Part A")]},
+    _para(_text("Find "), _text("x", "bold", "italic"), _image("/api/uploads/fig.png")),
+    {"type": "orderedList", "content": [
+        {"type": "listItem", "content": [_para(_text("one"))]},
+        {"type": "listItem", "content": [_para(_text("two"))]},
+    ]},
+    {"type": "table", "content": [{"type": "tableRow", "content": [
+        {"type": "tableHeader", "attrs": {"colspan": 2, "rowspan": "x"}, "content": [_para(_text("h"))]},
+        {"type": "tableCell", "content": [_para(_image("https://example.com/a.png"), _image("/api/uploads/cell.png"))]},
+    ]}]},
+]}
+
+
+def test_marks_images_and_spans_are_resolved() -> None:
+    doc = compile_doc(DOC)
+    heading, para, items, table = doc.blocks
+
+    assert isinstance(heading, tiptap.Heading) and heading.level == 2
+    text, bold, image = para.inlines
+    assert (text.bold, bold.bold, bold.italic, bold.underline) == (False, True, True, False)
+    assert image.upload == "fig.png"
+    assert isinstance(items, tiptap.List) and items.ordered
+    assert [item.text() for item in items.items] == ["one", "two"]
+
+    header, cell = table.rows[0].cells
+    assert header.header and (header.colspan, header.rowspan) == (2, 1)
+    assert not cell.header and (cell.colspan, cell.rowspan) == (1, 1)
+    assert cell.blocks[0].inlines[0].upload is None
+    assert doc.uploads == ("fig.png", "cell.png")
+
+
+def test_equal_content_is_compiled_once() -> None:
+    assert compile_doc(DOC) is compile_doc(copy.deepcopy(DOC))
+    changed = copy.deepcopy(DOC)
+    changed["content"][0]["attrs"]["level"] = 3
+    assert compile_doc(changed) is not compile_doc(DOC)
+
+
+def test_cache_is_bounded(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(tiptap, "CACHE_ENTRIES", 2)
+    monkeypatch.setattr(tiptap, "_cache", OrderedDict())
+    docs = [{"type": "doc", "content": [_para(_text(f"q{i}"))]} for i in range(3)]
+    first = compile_doc(docs[0])
+    for doc in docs[1:]:
+        compile_doc(doc)
+    assert len(tiptap._cache) == 2
+    assert compile_doc(docs[0]) is not first  # evicted, so compiled again
+
+
+@pytest.mark.parametrize(("separator", "expected"), [
+    ("", "Part AFind xonetwoh"),
+    (" ", "Part A Find x one two h "),
+])
+def test_plain_text_joins_blocks_not_inline_runs(separator: str, expected: str) -> None:
+    assert plain_text(DOC, separator) == expected
+    assert compile_doc(DOC).text(separator) == expected
+
+
+def test_nested_docs_are_flattened_and_unknown_nodes_keep_their_text() -> None:
+    doc = compile_doc({"type": "doc", "content": [
+        {"type": "doc", "content": [_para(_text("inner"))]},
+        {"type": "blockquote", "content": [_para(_text("quoted"))]},
+        {"type": "codeBlock", "content": [_text("a"), _text("b")]},
+    ]})
+    assert isinstance(doc.blocks[0], tiptap.Paragraph)
+    assert isinstance(doc.blocks[1], tiptap.Other) and doc.blocks[1].type == "blockquote"
+    assert doc.text(" ") == "inner quoted ab"